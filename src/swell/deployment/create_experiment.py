@@ -10,19 +10,27 @@
 
 import copy
 import datetime
+import hashlib
+import itertools
 import os
+import re
 import shutil
 import sys
+import tempfile
+import time
 import yaml
 from typing import Union, Optional
 
+from swell import __version__
 from swell.deployment.prepare_config_and_suite.prepare_config_and_suite import \
      PrepareExperimentConfigAndSuite
 from swell.swell_path import get_swell_path
-from swell.utilities.dictionary import add_comments_to_dictionary, dict_get
+from swell.utilities.config import write_config_snapshot
+from swell.utilities.dictionary import add_comments_to_dictionary, dict_get, update_dict
 from swell.utilities.jinja2 import template_string_jinja2
 from swell.utilities.logger import Logger
-from swell.utilities.slurm import prepare_scheduling_dict
+from swell.utilities.slurm import experiment_scheduling_dict
+from swell.utilities.worker_pool import run_in_pool
 
 
 # --------------------------------------------------------------------------------------------------
@@ -162,16 +170,24 @@ def create_experiment_directory(
     platform: str,
     override: str,
     advanced: bool,
-    slurm: Optional[str]
+    slurm: Optional[str],
+    configuration_files: str = 'all',
+    materialize: str = 'copy'
 ) -> None:
 
     # Create a logger
     # ---------------
     logger = Logger('SwellCreateExperiment')
 
+    # Time taken by each step of the creation
+    # ---------------------------------------
+    timings = {}
+    step_start = time.perf_counter()
+
     # Call the experiment config and suite generation
     # ------------------------------------------------
     experiment_dict_str = prepare_config(suite, method, platform, override, advanced, slurm)
+    timings['configuration'] = time.perf_counter() - step_start
 
     # Load the string using yaml
     # --------------------------
@@ -195,9 +211,14 @@ def create_experiment_directory(
 
     # Write dictionary (with comments) to YAML file
     # ---------------------------------------------
+    step_start = time.perf_counter()
     with open(os.path.join(exp_suite_path, 'experiment.yaml'), 'w') as file:
         file.write(experiment_dict_str)
 
+    # Precompile the configuration of every task so that tasks do not have to parse the YAML
+    # --------------------------------------------------------------------------------------
+    write_config_snapshot(logger, os.path.join(exp_suite_path, 'experiment.yaml'))
+
     # At this point we need to write the complete suite file with all templates resolved. Call the
     # function to build the scheduling dictionary, combine with the experiment dictionary,
     # resolve the templates and write the suite file to the experiment suite directory.
@@ -210,21 +231,42 @@ def create_experiment_directory(
     swell_suite_path = os.path.join(get_swell_path(), 'suites', suite)
     copy_platform_files(logger, exp_suite_path, platform)
 
-    if os.path.exists(os.path.join(swell_suite_path, 'eva')):
-        copy_eva_files(swell_suite_path, exp_suite_path)
-
     # Set the swell paths in the modules file and create csh versions
     # ---------------------------------------------------------------
     template_modules_file(logger, experiment_dict, exp_suite_path)
     create_modules_csh(logger, exp_suite_path)
+    timings['suite'] = time.perf_counter() - step_start
+
+    # Materialize the eva and JEDI configuration files in the experiment, either all of them or
+    # only those referenced by the model components and observations of the experiment
+    # -----------------------------------------------------------------------------------------
+    step_start = time.perf_counter()
+    snapshot_path = None
+    if materialize != 'copy':
+        snapshot_path = configuration_snapshot(logger, experiment_root)
+
+    number_of_files = 0
+    if os.path.exists(os.path.join(swell_suite_path, 'eva')):
+        number_of_files += copy_eva_files(swell_suite_path, exp_suite_path, experiment_dict,
+                                          configuration_files)
 
-    # Copy config directory to experiment
-    # -----------------------------------
     src = os.path.join(get_swell_path(), 'configuration')
     dst = os.path.join(exp_path, 'configuration')
-    if os.path.exists(dst) and os.path.isdir(dst):
-        shutil.rmtree(dst)
-    shutil.copytree(src, dst, ignore=shutil.ignore_patterns('*.py*', '*__*'))
+    relative_paths = list_configuration_files(src)
+    if configuration_files == 'referenced':
+        relative_paths = referenced_configuration_files(relative_paths, experiment_dict, src)
+    if snapshot_path is not None:
+        src = os.path.join(snapshot_path, 'configuration')
+    materialize_files(src, dst, relative_paths, materialize)
+    number_of_files += len(relative_paths)
+    timings['configuration files'] = time.perf_counter() - step_start
+
+    # Report the time taken by each step
+    # ----------------------------------
+    logger.info(f'Created in {sum(timings.values()):0.2f} seconds ({number_of_files} ' +
+                f'configuration files, {configuration_files}, {materialize}):')
+    for step, seconds in timings.items():
+        logger.info(f'  {step}: {seconds:0.2f} seconds', False)
 
     # Write out launch command for convenience
     # ----------------------------------------
@@ -238,10 +280,140 @@ def create_experiment_directory(
 # --------------------------------------------------------------------------------------------------
 
 
+def override_matrix(logger: Logger, matrix: dict) -> list:
+
+    """
+    Overrides of the experiments of a batch. The matrix has an optional base override shared by
+    all the experiments and either a list of experiments, each with its own override, or a
+    product, a dictionary of keys and the values each key takes. Every combination of the values
+    of a product is an experiment, named after the experiment_id of the base with the index of
+    the combination appended. Keys can be nested with dots, e.g. models.geos_atmosphere.npx_proc.
+    """
+
+    base = matrix.get('base', {})
+
+    if 'experiments' in matrix:
+        variations = matrix['experiments']
+    elif 'product' in matrix:
+        keys = list(matrix['product'].keys())
+        variations = [dict(zip(keys, values))
+                      for values in itertools.product(*matrix['product'].values())]
+        experiment_id = base.get('experiment_id', 'swell')
+        for index, variation in enumerate(variations):
+            variation['experiment_id'] = f'{experiment_id}-{index:03}'
+    else:
+        logger.abort('The batch matrix needs a list of \'experiments\' or a \'product\'.')
+
+    overrides = []
+    for variation in variations:
+
+        # Dotted keys are expanded to nested dictionaries
+        nested_variation = {}
+        for key, value in variation.items():
+            for part in reversed(key.split('.')):
+                value = {part: value}
+            nested_variation = update_dict(nested_variation, value)
+
+        overrides.append(update_dict(copy.deepcopy(base), nested_variation))
+
+    # Every experiment must have its own directory
+    experiment_ids = [override.get('experiment_id') for override in overrides]
+    duplicates = sorted(set([eid for eid in experiment_ids if experiment_ids.count(eid) > 1]))
+    if None in experiment_ids or duplicates:
+        logger.abort(f'Every experiment of the batch needs a unique experiment_id. Missing or ' +
+                     f'duplicated: {duplicates}')
+
+    return overrides
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def create_batch_member(
+    suite: str,
+    platform: str,
+    override: dict,
+    advanced: bool,
+    slurm: Optional[str],
+    configuration_files: str,
+    materialize: str
+) -> float:
+
+    # Create one experiment of a batch and return the seconds it took
+    start = time.perf_counter()
+    create_experiment_directory(suite, 'defaults', platform, override, advanced, slurm,
+                                configuration_files, materialize)
+    return time.perf_counter() - start
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def create_experiment_batch(
+    suite: str,
+    platform: str,
+    matrix_file: str,
+    advanced: bool,
+    slurm: Optional[str],
+    configuration_files: str = 'all',
+    materialize: str = 'copy',
+    max_workers: int = 1
+) -> None:
+
+    """
+    Create the experiments of a matrix of overrides, see override_matrix, with up to max_workers
+    processes. The question, suite, platform and model files are parsed once before the
+    experiments are created so that the worker processes start with them parsed.
+    """
+
+    logger = Logger('SwellCreateExperimentBatch')
+
+    with open(matrix_file, 'r') as f:
+        overrides = override_matrix(logger, yaml.safe_load(f))
+    logger.info(f'Creating {len(overrides)} experiments of suite {suite}')
+
+    # Parse the inputs shared by all the experiments and create the configuration snapshots
+    # -------------------------------------------------------------------------------------
+    start = time.perf_counter()
+    PrepareExperimentConfigAndSuite(logger, suite, platform, 'defaults', overrides[0])
+    if materialize != 'copy':
+        experiment_roots = [override.get('experiment_root') for override in overrides]
+        for experiment_root in sorted(set([root for root in experiment_roots if root])):
+            configuration_snapshot(logger, os.path.expandvars(experiment_root))
+    logger.info(f'Parsed the shared inputs in {time.perf_counter() - start:0.2f} seconds')
+
+    # Create the experiments
+    # ----------------------
+    start = time.perf_counter()
+    results = run_in_pool(create_batch_member, [(suite, platform, override, advanced, slurm,
+                                                 configuration_files, materialize)
+                                                for override in overrides], max_workers)
+
+    # Report the time taken by each experiment and the failures
+    # ---------------------------------------------------------
+    failures = []
+    for override, (seconds, output, error) in zip(overrides, results):
+        if error is not None:
+            failures.append(f'{override["experiment_id"]}:\n{output}{error}')
+            continue
+        logger.info(f'  {override["experiment_id"]}: {seconds:0.2f} seconds', False)
+    logger.info(f'Created {len(overrides) - len(failures)} experiments in ' +
+                f'{time.perf_counter() - start:0.2f} seconds with {max_workers} worker(s)')
+
+    if failures:
+        logger.abort(f'Creating failed for {len(failures)} experiment(s):\n\n' +
+                     '\n\n'.join(failures), wrap=False)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
 def copy_eva_files(
     swell_suite_path: str,
-    exp_suite_path: str
-) -> None:
+    exp_suite_path: str,
+    experiment_dict: Optional[dict] = None,
+    configuration_files: str = 'all'
+) -> int:
 
     # Repo eva files
     eva_directory = os.path.join(swell_suite_path, 'eva')
@@ -249,12 +421,177 @@ def copy_eva_files(
     # Destination for eva files
     destination_directory = os.path.join(exp_suite_path, 'eva')
 
-    # If destination directory exists, delete it
-    if os.path.exists(destination_directory):
-        shutil.rmtree(destination_directory)
+    # Eva files are named after the model component they plot, e.g. observations-geos_ocean.yaml
+    eva_files = sorted(os.listdir(eva_directory))
+    if configuration_files == 'referenced':
+        model_components = experiment_dict.get('model_components', [])
+        eva_files = [eva_file for eva_file in eva_files
+                     if os.path.splitext(eva_file)[0].split('-')[-1] in model_components]
+
+    # The eva files are templated by the eva tasks so they are always copied
+    materialize_files(eva_directory, destination_directory, eva_files, 'copy')
+
+    return len(eva_files)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def list_configuration_files(configuration_path: str) -> list:
 
-    # Copy all the files
-    shutil.copytree(eva_directory, destination_directory)
+    # Configuration files relative to configuration_path, without the python package files
+    relative_paths = []
+    for directory, directories, files in os.walk(configuration_path):
+        directories[:] = sorted([d for d in directories if '__' not in d])
+        for name in sorted(files):
+            if '.py' not in name and '__' not in name:
+                relative_paths.append(os.path.relpath(os.path.join(directory, name),
+                                                      configuration_path))
+
+    return relative_paths
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def referenced_configuration_files(
+    relative_paths: list,
+    experiment_dict: dict,
+    configuration_path: str
+) -> list:
+
+    """
+    Configuration files used by an experiment. The interfaces of the model components that are
+    not part of the experiment and the observation files of observations that are not used are
+    left out, all other files are kept. Files of configuration_path referenced by the files that
+    are kept, e.g. the observation alias file obsop_name_map.yaml, are kept too.
+    """
+
+    model_components = experiment_dict.get('model_components', [])
+    models = experiment_dict.get('models', {})
+
+    referenced_paths = []
+    for relative_path in relative_paths:
+        parts = relative_path.split(os.sep)
+        if parts[:2] == ['jedi', 'interfaces'] and len(parts) > 3:
+            model = parts[2]
+            if model not in model_components:
+                continue
+            if parts[3] == 'observations':
+                observations = models.get(model, {}).get('observations', []) + ['ufo_tests']
+                if os.path.splitext(parts[-1])[0] not in observations:
+                    continue
+        referenced_paths.append(relative_path)
+
+    # Add the files that the kept files point to in the configuration of the experiment, e.g.
+    # {{experiment_root}}/{{experiment_id}}/configuration/jedi/interfaces/{{model_component}}/...
+    # until no new file is found
+    all_paths = set(relative_paths)
+    kept_paths = set(referenced_paths)
+    new_paths = list(referenced_paths)
+    while new_paths:
+        found_paths = []
+        for relative_path in new_paths:
+            parts = relative_path.split(os.sep)
+            if parts[:2] == ['jedi', 'interfaces'] and len(parts) > 3:
+                file_models = [parts[2]]
+            else:
+                file_models = model_components
+            try:
+                with open(os.path.join(configuration_path, relative_path), 'r') as f:
+                    references = re.findall(r'configuration/([^\'"\s]+)', f.read())
+            except UnicodeDecodeError:
+                continue
+            for reference in references:
+                for model in file_models:
+                    path = re.sub(r'{{\s*model_component\s*}}', model, reference)
+                    path = os.path.normpath(path)
+                    if path in all_paths and path not in kept_paths:
+                        kept_paths.add(path)
+                        found_paths.append(path)
+        new_paths = found_paths
+
+    return [relative_path for relative_path in relative_paths if relative_path in kept_paths]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def configuration_snapshot(logger: Logger, experiment_root: str) -> str:
+
+    """
+    Read-only copy of the swell configuration shared by the experiments of experiment_root,
+    named after the swell version and the contents of the configuration so that experiments
+    linked to it are not affected by a later change of swell.
+    """
+
+    src = os.path.join(get_swell_path(), 'configuration')
+    relative_paths = list_configuration_files(src)
+
+    checksum = hashlib.sha256()
+    for relative_path in relative_paths:
+        checksum.update(relative_path.encode())
+        with open(os.path.join(src, relative_path), 'rb') as f:
+            checksum.update(hashlib.sha256(f.read()).digest())
+
+    snapshots_path = os.path.join(experiment_root, '.swell_snapshots')
+    snapshot_path = os.path.join(snapshots_path, f'{__version__}-{checksum.hexdigest()[:12]}')
+    if os.path.isdir(snapshot_path):
+        return snapshot_path
+
+    # Build the snapshot aside and rename it in place, another creation may be building it too
+    logger.info(f'Creating configuration snapshot {snapshot_path}')
+    os.makedirs(snapshots_path, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=snapshots_path, suffix='.tmp')
+    materialize_files(src, os.path.join(tmp_path, 'configuration'), relative_paths, 'copy')
+
+    # Files hard-linked in experiments are shared, they must not be modified in place
+    for relative_path in relative_paths:
+        os.chmod(os.path.join(tmp_path, 'configuration', relative_path), 0o444)
+    os.chmod(tmp_path, 0o755)
+
+    try:
+        os.rename(tmp_path, snapshot_path)
+    except OSError:
+        shutil.rmtree(tmp_path)
+
+    return snapshot_path
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def materialize_files(src: str, dst: str, relative_paths: list, materialize: str) -> None:
+
+    """
+    Create the relative_paths files of src in dst by copying, hard-linking or symbolically
+    linking them. Hard links fall back to copies where the file system does not support them.
+    Anything already in dst is removed.
+    """
+
+    if os.path.lexists(dst):
+        if os.path.isdir(dst) and not os.path.islink(dst):
+            shutil.rmtree(dst)
+        else:
+            os.remove(dst)
+
+    os.makedirs(dst, exist_ok=True)
+    for directory in sorted(set([os.path.dirname(path) for path in relative_paths])):
+        os.makedirs(os.path.join(dst, directory), exist_ok=True)
+
+    for relative_path in relative_paths:
+        src_file = os.path.join(src, relative_path)
+        dst_file = os.path.join(dst, relative_path)
+        if materialize == 'symlink':
+            os.symlink(os.path.abspath(src_file), dst_file)
+            continue
+        if materialize == 'hardlink':
+            try:
+                os.link(src_file, dst_file)
+                continue
+            except OSError:
+                pass
+        shutil.copy(src_file, dst_file)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -484,7 +821,8 @@ def prepare_cylc_suite_jinja2(
             logger.abort('The suite file required marine_models but ' +
                          'geos_marine is not in the model components.')
 
-    render_dictionary['scheduling'] = prepare_scheduling_dict(logger, experiment_dict, platform)
+    render_dictionary['scheduling'] = experiment_scheduling_dict(logger, experiment_dict, platform,
+                                                                 exp_suite_path)
 
     # Default execution time limit for everthing is PT1H
     for slurm_task in render_dictionary['scheduling'].keys():
@@ -9,9 +9,12 @@
 
 
 import os
-import yaml
 
 from swell.swell_path import get_swell_path
+from swell.utilities.lazy_import import lazy_import
+
+# Only needed for platform properties, not for listing the platforms
+yaml = lazy_import('yaml')
 
 
 # --------------------------------------------------------------------------------------------------
@@ -18,7 +18,7 @@ from swell.deployment.prepare_config_and_suite.question_and_answer_cli import Ge
 from swell.deployment.prepare_config_and_suite.question_and_answer_defaults import GetAnswerDefaults
 from swell.utilities.logger import Logger
 from swell.utilities.jinja2 import template_string_jinja2
-from swell.utilities.dictionary import update_dict
+from swell.utilities.dictionary import load_yaml_file, update_dict
 
 
 # --------------------------------------------------------------------------------------------------
@@ -124,13 +124,11 @@ class PrepareExperimentConfigAndSuite:
 
         # Read suite questions into a dictionary
         suite_questions_file = os.path.join(get_swell_path(), 'suites', 'suite_questions.yaml')
-        with open(suite_questions_file, 'r') as ymlfile:
-            question_dictionary = yaml.safe_load(ymlfile)
+        question_dictionary = load_yaml_file(suite_questions_file)
 
         # Read task questions into a dictionary
         task_questions_file = os.path.join(get_swell_path(), 'tasks', 'task_questions.yaml')
-        with open(task_questions_file, 'r') as ymlfile:
-            question_dictionary_tasks = yaml.safe_load(ymlfile)
+        question_dictionary_tasks = load_yaml_file(task_questions_file)
 
         # Loop through question_dictionary_tasks. If the key does not already exist add to the
         # question_dictionary. If the key does exist then only add the tasks key to the existing
@@ -241,8 +239,7 @@ class PrepareExperimentConfigAndSuite:
         for suite_task in ['suite', 'task']:
             platform_dict_file = os.path.join(get_swell_path(), 'deployment', 'platforms',
                                               self.platform, f'{suite_task}_questions.yaml')
-            with open(platform_dict_file, 'r') as ymlfile:
-                platform_defaults.update(yaml.safe_load(ymlfile))
+            platform_defaults.update(load_yaml_file(platform_dict_file))
 
         # Loop over the keys in self.question_dictionary_model_ind and update with platform_defaults
         # if that dictionary shares the key
@@ -261,8 +258,7 @@ class PrepareExperimentConfigAndSuite:
                     model_dict_file = os.path.join(get_swell_path(), 'configuration', 'jedi',
                                                    'interfaces', model,
                                                    f'{suite_task}_questions.yaml')
-                    with open(model_dict_file, 'r') as ymlfile:
-                        model_defaults.update(yaml.safe_load(ymlfile))
+                    model_defaults.update(load_yaml_file(model_dict_file))
 
                 # Loop over the keys in self.question_dictionary_model_ind and update with
                 # model_defaults or platform_defaults if that dictionary shares the key
@@ -296,15 +292,13 @@ class PrepareExperimentConfigAndSuite:
         test_file = os.path.join(get_swell_path(), 'test', 'suite_tests',
                                  self.suite + '-tier1.yaml')
         if os.path.exists(test_file):
-            with open(test_file, 'r') as ymlfile:
-                override_dict = yaml.safe_load(ymlfile)
+            override_dict = load_yaml_file(test_file)
 
         # Update overrides with tier2 suite test file if available
         tier2_test_file = os.path.join(get_swell_path(), 'test', 'suite_tests',
                                        self.suite + '-tier2.yaml')
         if os.path.exists(tier2_test_file):
-            with open(tier2_test_file, 'r') as ymlfile:
-                tier2_override_dict = yaml.safe_load(ymlfile)
+            tier2_override_dict = load_yaml_file(tier2_test_file)
             override_dict = update_dict(override_dict, tier2_override_dict)
 
         # Now append with any user provided override
@@ -560,10 +554,7 @@ class PrepareExperimentConfigAndSuite:
         # Now get the task part
         tasks = []
         for line in swell_task_lines:
-            # Split by 'swell task'
-            # Remove any leading spaces
-            # Split by space
-            tasks.append(line.split('swell task')[1].strip().split(' ')[0])
+            tasks += self.get_line_tasks(line)
 
         # Ensure there are no duplicate tasks
         tasks = list(set(tasks))
@@ -573,6 +564,18 @@ class PrepareExperimentConfigAndSuite:
 
     # ----------------------------------------------------------------------------------------------
 
+    def get_line_tasks(self, line: str) -> list:
+
+        # Split by 'swell task', a 'swell task-batch' line runs a comma separated list of tasks
+        # Remove any leading spaces
+        # Split by space
+        command = line.split('swell task')[1]
+        if command.startswith('-batch'):
+            command = command[len('-batch'):]
+        return command.strip().split(' ')[0].split(',')
+
+    # ----------------------------------------------------------------------------------------------
+
     def get_suite_task_list_model_dep(self, suite_str: str) -> Tuple[dict, list]:
 
         # Search the suite string for lines containing 'swell task' and '-m'
@@ -604,7 +607,7 @@ class PrepareExperimentConfigAndSuite:
             # Get task name
             tasks = []
             for line in model_tasks_this_model:
-                tasks.append(line.split('swell task ')[1].split(' ')[0])
+                tasks += self.get_line_tasks(line)
 
             # Unique model tasks
             model_tasks[model] = list(set(tasks))
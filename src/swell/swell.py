@@ -12,15 +12,19 @@ import click
 from typing import Union, Optional, Literal
 
 from swell.deployment.platforms.platforms import get_platforms
-from swell.deployment.create_experiment import clone_config, create_experiment_directory
-from swell.deployment.launch_experiment import launch_experiment
-from swell.tasks.base.task_base import task_wrapper, get_tasks
+from swell.tasks.base.task_base import task_batch_wrapper, task_wrapper, get_tasks
 from swell.test.test_driver import test_wrapper, valid_tests
-from swell.test.suite_tests.suite_tests import run_suite, TestSuite
+from swell.utilities.lazy_import import lazy_import
 from swell.utilities.suite_utils import get_suites
 from swell.utilities.welcome_message import write_welcome_message
 from swell.utilities.scripts.utility_driver import get_utilities, utility_wrapper
 
+# Every cylc task goes through this module so the commands that need the heavier deployment and
+# testing code import it on first use
+create_experiment = lazy_import('swell.deployment.create_experiment')
+launch_experiment = lazy_import('swell.deployment.launch_experiment')
+suite_tests = lazy_import('swell.test.suite_tests.suite_tests')
+
 
 # --------------------------------------------------------------------------------------------------
 
@@ -77,6 +81,18 @@ model_help = 'Data assimilation system. I.e. the model being initialized by data
 ensemble_help = 'When handling ensemble workflows using a parallel strategy, ' + \
                 'specify which packet of ensemble members to consider.'
 
+profile_startup_help = 'Report the time spent importing modules before the task is run.'
+
+configuration_files_help = 'Which JEDI configuration files to put in the experiment, all of ' + \
+                           'them or only those referenced by the model components and ' + \
+                           'observations of the experiment.'
+
+materialize_help = 'How configuration files are put in the experiment. Links point to a ' + \
+                   'read-only snapshot of the configuration, per swell version, under the ' + \
+                   'experiment root.'
+
+workers_help = 'Number of experiments created at the same time.'
+
 slurm_help = """
 Customize SLURM directives, globally (e.g., account name), for specific tasks,
 or for task-model combinations.
@@ -95,13 +111,19 @@ or for task-model combinations.
 @click.option('-o', '--override', 'override', default=None, help=override_help)
 @click.option('-a', '--advanced', 'advanced', default=False, help=advanced_help)
 @click.option('-s', '--slurm', 'slurm', default=None, help=slurm_help)
+@click.option('-c', '--configuration_files', 'configuration_files', default='all',
+              type=click.Choice(['all', 'referenced']), help=configuration_files_help)
+@click.option('-l', '--materialize', 'materialize', default='copy',
+              type=click.Choice(['copy', 'hardlink', 'symlink']), help=materialize_help)
 def create(
     suite: str,
     input_method: str,
     platform: str,
     override: Union[dict, str, None],
     advanced: bool,
-    slurm: str
+    slurm: str,
+    configuration_files: str,
+    materialize: str
 ) -> None:
     """
     Create a new experiment
@@ -113,7 +135,52 @@ def create(
 
     """
     # Create the experiment directory
-    create_experiment_directory(suite, input_method, platform, override, advanced, slurm)
+    create_experiment.create_experiment_directory(suite, input_method, platform, override,
+                                                  advanced, slurm, configuration_files,
+                                                  materialize)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+@swell_driver.command()
+@click.argument('suite', type=click.Choice(get_suites()))
+@click.argument('matrix')
+@click.option('-p', '--platform', 'platform', default='nccs_discover_sles15',
+              type=click.Choice(get_platforms()), help=platform_help)
+@click.option('-a', '--advanced', 'advanced', default=False, help=advanced_help)
+@click.option('-s', '--slurm', 'slurm', default=None, help=slurm_help)
+@click.option('-c', '--configuration_files', 'configuration_files', default='all',
+              type=click.Choice(['all', 'referenced']), help=configuration_files_help)
+@click.option('-l', '--materialize', 'materialize', default='copy',
+              type=click.Choice(['copy', 'hardlink', 'symlink']), help=materialize_help)
+@click.option('-w', '--workers', 'workers', default=4, type=click.IntRange(min=1),
+              help=workers_help)
+def create_batch(
+    suite: str,
+    matrix: str,
+    platform: str,
+    advanced: bool,
+    slurm: str,
+    configuration_files: str,
+    materialize: str,
+    workers: int
+) -> None:
+    """
+    Create a batch of experiments
+
+    This command creates one experiment directory per entry of a matrix of overrides, using the
+    default configuration of the suite otherwise.
+
+    Arguments: \n
+        suite (str): Name of the suite you wish to run. \n
+        matrix (str): Path to a YAML containing the matrix of overrides, with an optional base
+        override and either a list of experiments or a product of values. \n
+
+    """
+    # Create the experiment directories
+    create_experiment.create_experiment_batch(suite, platform, matrix, advanced, slurm,
+                                              configuration_files, materialize, workers)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -144,11 +211,11 @@ def clone(
 
     """
     # Create experiment configuration by cloning from existing experiment
-    experiment_dict_str = clone_config(configuration, experiment_id, input_method, platform,
-                                       advanced)
+    experiment_dict_str = create_experiment.clone_config(configuration, experiment_id,
+                                                         input_method, platform, advanced)
 
     # Create the experiment directory
-    create_experiment_directory(experiment_dict_str)
+    create_experiment.create_experiment_directory(experiment_dict_str)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -172,7 +239,7 @@ def launch(
         suite_path (str): Path to where the flow.cylc and associated suite files are located. \n
 
     """
-    launch_experiment(suite_path, no_detach, log_path)
+    launch_experiment.launch_experiment(suite_path, no_detach, log_path)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -184,12 +251,15 @@ def launch(
 @click.option('-d', '--datetime', 'datetime', default=None, help=datetime_help)
 @click.option('-m', '--model', 'model', default=None, help=model_help)
 @click.option('-p', '--ensemblePacket', 'ensemblePacket', default=None, help=ensemble_help)
+@click.option('--profile-startup', 'profile_startup', is_flag=True, default=False,
+              help=profile_startup_help)
 def task(
     task: str,
     config: str,
     datetime: Optional[str],
     model: Optional[str],
-    ensemblePacket: Optional[str]
+    ensemblePacket: Optional[str],
+    profile_startup: bool
 ) -> None:
     """
     Run a workflow task
@@ -201,7 +271,43 @@ def task(
         config (str): Path to the configuration file for the task.\n
 
     """
-    task_wrapper(task, config, datetime, model, ensemblePacket)
+    task_wrapper(task, config, datetime, model, ensemblePacket, profile_startup)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+@swell_driver.command()
+@click.argument('tasks')
+@click.argument('config')
+@click.option('-d', '--datetime', 'datetime', default=None, help=datetime_help)
+@click.option('-m', '--model', 'model', default=None, help=model_help)
+@click.option('-p', '--ensemblePacket', 'ensemblePacket', default=None, help=ensemble_help)
+def task_batch(
+    tasks: str,
+    config: str,
+    datetime: Optional[str],
+    model: Optional[str],
+    ensemblePacket: Optional[str]
+) -> None:
+    """
+    Run several workflow tasks in one process
+
+    This command executes the tasks, in order, with the same configuration file and options,
+    stopping at the first task that fails.
+
+    Arguments:\n
+        tasks (str): Comma separated names of the tasks to execute, e.g.
+        SaveRestart,MoveDaRestart.\n
+        config (str): Path to the configuration file for the tasks.\n
+
+    """
+    task_list = tasks.split(',')
+    invalid_tasks = [task for task in task_list if task not in get_tasks()]
+    if invalid_tasks:
+        raise click.BadParameter(f'Not valid tasks: {invalid_tasks}', param_hint='TASKS')
+
+    task_batch_wrapper(task_list, config, datetime, model, ensemblePacket)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -257,7 +363,7 @@ def t1test(
     Arguments:
         suite (str): Name of the suite to run (e.g., hofx, 3dvar, ufo_testing)
     """
-    run_suite(suite, platform, TestSuite.TIER1)
+    suite_tests.run_suite(suite, platform, suite_tests.TestSuite.TIER1)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -279,7 +385,7 @@ def t2test(
     Arguments:
         suite (str): Name of the suite to run (e.g., hofx, 3dvar, ufo_testing)
     """
-    run_suite(suite, platform, TestSuite.TIER2)
+    suite_tests.run_suite(suite, platform, suite_tests.TestSuite.TIER2)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -24,9 +24,15 @@ from swell.utilities.case_switching import camel_case_to_snake_case, snake_case_
 from swell.utilities.config import Config
 from swell.utilities.data_assimilation_window_params import DataAssimilationWindowParams
 from swell.utilities.datetime_util import Datetime
+from swell.utilities.lazy_import import lazy_import
 from swell.utilities.logger import Logger
-from swell.utilities.render_jedi_interface_files import JediConfigRendering
-from swell.utilities.geos import Geos
+from swell.utilities.startup_profile import report_task_startup
+from swell.utilities.task_metrics import TaskMetrics, set_active_metrics
+
+# Helpers that pull in netCDF4 and jinja2 are only imported by the tasks that use them
+swell_geos = lazy_import('swell.utilities.geos')
+jedi_interface_rendering = lazy_import('swell.utilities.render_jedi_interface_files')
+swell_observation_inventory = lazy_import('swell.utilities.observation_inventory')
 
 
 # --------------------------------------------------------------------------------------------------
@@ -66,6 +72,12 @@ class taskBase(ABC):
         # ---------------------------
         self.__ensemble_packet__ = ensemblePacket
 
+        # Timing and input/output record of the task
+        # ------------------------------------------
+        cycle = None if self.__datetime__ is None else self.__datetime__.string_directory()
+        self.metrics = TaskMetrics(task_name, model, cycle, ensemblePacket)
+        set_active_metrics(self.metrics)
+
         # Keep copy of model directive
         # ----------------------------
         self.__model__ = model
@@ -102,15 +114,11 @@ class taskBase(ABC):
                 cycle_dir = self.cycle_dir()
                 os.makedirs(cycle_dir, 0o755, exist_ok=True)
 
-        # Add JEDI config rendering helper
-        # --------------------------------
-        self.jedi_rendering = JediConfigRendering(self.logger, self.__experiment_root__,
-                                                  self.__experiment_id__, cycle_dir,
-                                                  self.__datetime__, self.__model__)
-
-        # Add GEOS utils
-        # --------------
-        self.geos = Geos(self.logger, self.cycle_forecast_dir)
+        # JEDI config rendering and GEOS helpers are created on first use
+        # ---------------------------------------------------------------
+        self.__cycle_dir__ = cycle_dir
+        self.__jedi_rendering__ = None
+        self.__geos__ = None
 
         # Create some extra helpers available when the datetime is present
         # ----------------------------------------------------------------
@@ -130,6 +138,26 @@ class taskBase(ABC):
 
     # ----------------------------------------------------------------------------------------------
 
+    # JEDI config rendering helper
+    @property
+    def jedi_rendering(self) -> 'jedi_interface_rendering.JediConfigRendering':
+        if self.__jedi_rendering__ is None:
+            self.__jedi_rendering__ = jedi_interface_rendering.JediConfigRendering(
+                self.logger, self.__experiment_root__, self.__experiment_id__,
+                self.__cycle_dir__, self.__datetime__, self.__model__)
+        return self.__jedi_rendering__
+
+    # ----------------------------------------------------------------------------------------------
+
+    # GEOS utils
+    @property
+    def geos(self) -> 'swell_geos.Geos':
+        if self.__geos__ is None:
+            self.__geos__ = swell_geos.Geos(self.logger, self.cycle_forecast_dir)
+        return self.__geos__
+
+    # ----------------------------------------------------------------------------------------------
+
     # Method to get the experiment root
     def experiment_root(self) -> str:
         return self.__experiment_root__
@@ -161,6 +189,16 @@ class taskBase(ABC):
 
     # ----------------------------------------------------------------------------------------------
 
+    # Path of the JSON file receiving the metrics of this try of the task
+    def metrics_file(self) -> str:
+        name = '-'.join([self.metrics.task_name] +
+                        [part for part in [self.__model__, self.__ensemble_packet__] if part])
+        cycle = '' if self.metrics.cycle is None else self.metrics.cycle
+        return os.path.join(self.experiment_path(), 'metrics', cycle,
+                            f'{name}.try{self.metrics.try_number}.json')
+
+    # ----------------------------------------------------------------------------------------------
+
     def get_ensemble_packet(self) -> Optional[str]:
         return self.__ensemble_packet__
 
@@ -199,6 +237,13 @@ class taskBase(ABC):
 
     # ----------------------------------------------------------------------------------------------
 
+    # Which observations are used, answered from the observation inventory. The files recorded by
+    # the tasks that created them (GetObservations, GsiNcdiagToIoda) are not accessed again.
+    def observations_in_use(self, obs_dicts: list) -> list:
+        return swell_observation_inventory.observations_in_use(obs_dicts, validate=False)
+
+    # ----------------------------------------------------------------------------------------------
+
     def forecast_dir(self, paths: Union[str, list[str]] = []) -> Optional[str]:
 
         # Make sure forecast directory exists
@@ -303,9 +348,14 @@ def task_wrapper(
     config: str,
     datetime: Union[str, dt, None],
     model: Optional[str],
-    ensemblePacket: Optional[str]
+    ensemblePacket: Optional[str],
+    profile_startup: bool = False
 ) -> None:
 
+    # Optionally report what the task spends its startup time importing
+    if profile_startup:
+        report_task_startup(Logger(task), 'swell.tasks.'+camel_case_to_snake_case(task))
+
     # Create the object
     constrc_start = time.perf_counter()
     creator = taskFactory()
@@ -313,9 +363,27 @@ def task_wrapper(
     constrc_final = time.perf_counter()
     constrc_time = f'Constructed in {constrc_final - constrc_start:0.4f} seconds'
 
-    # Execute task
+    # Tasks of the experiment share the compiled Jinja2 templates through a bytecode cache, unless
+    # SWELL_JINJA2_CACHE_DIR is set to another directory or to an empty string to disable it
+    os.environ.setdefault('SWELL_JINJA2_CACHE_DIR', os.path.join(task_object.experiment_path(),
+                                                                 'jinja2_cache'))
+
+    # Execute task, the metrics are written whether or not it succeeds
+    task_object.metrics.add_span('construct', constrc_start, constrc_final)
     execute_start = time.perf_counter()
-    task_object.execute()
+    status = 'failed'
+    try:
+        with task_object.metrics.span('execute'):
+            task_object.execute()
+        status = 'succeeded'
+    finally:
+        if task_object.__jedi_rendering__ is not None:
+            task_object.metrics.add_counters('jedi_rendering_cache',
+                                             jedi_interface_rendering.rendering_cache_counters())
+        try:
+            task_object.metrics.write(task_object.metrics_file(), status)
+        except OSError as e:
+            task_object.logger.info(f'Unable to write the task metrics: {e}')
     execute_final = time.perf_counter()
     execute_time = f'Executed in {execute_final - execute_start:0.4f} seconds'
 
@@ -330,3 +398,38 @@ def task_wrapper(
 
 
 # --------------------------------------------------------------------------------------------------
+
+
+def task_batch_wrapper(
+    tasks: list,
+    config: str,
+    datetime: Union[str, dt, None],
+    model: Optional[str],
+    ensemblePacket: Optional[str]
+) -> None:
+
+    """
+    Run several tasks, in order, in this process. The tasks share the modules imported, the
+    configuration snapshot, the Jinja2 templates and the JEDI rendering caches so each task only
+    costs its own work. The batch stops at the first task that fails and fails with it.
+    """
+
+    logger = Logger('TaskBatch')
+    logger.info(f'Running the tasks {", ".join(tasks)} in one process')
+
+    timings = []
+    for task in tasks:
+        task_start = time.perf_counter()
+        task_wrapper(task, config, datetime, model, ensemblePacket)
+        timings.append((task, time.perf_counter() - task_start))
+
+    # Output timing stats
+    logger.info('-----------------------------')
+    logger.info('     Task Batch Complete     ')
+    logger.info('-----------------------------')
+    for task, seconds in timings:
+        logger.info(f'{task}: {seconds:0.4f} seconds')
+    logger.info('-----------------------------')
+
+
+# --------------------------------------------------------------------------------------------------
@@ -9,7 +9,7 @@
 
 import os
 from swell.tasks.base.task_base import taskBase
-import glob
+from swell.utilities.cycle_cleanup import check_pattern, clean_directory
 
 # --------------------------------------------------------------------------------------------------
 
@@ -29,61 +29,42 @@ class CleanCycle(taskBase):
 
         # Parse config
         clean_patterns = self.config.clean_patterns(None)
+        clean_recursive = self.config.clean_recursive(False)
+        clean_workers = self.config.clean_workers(8)
 
         # If no cleaning requested then exit
         if clean_patterns is None:
             return
 
-        # Move to the cycle directory
-        os.chdir(self.cycle_dir())
-
-        # Remove all specified files
+        # Things can only be deleted relative to the cycle directory, check all the patterns
+        # before removing anything
         for pattern in clean_patterns:
+            error = check_pattern(pattern)
+            if error is not None:
+                self.logger.abort(error)
 
-            # ---------------------------
-            # Perform some safety checks:
-            # ---------------------------
-
-            # 1. Check that path is not absolute. Things can only be deleted relative to the cycle
-            #    directory.
-            if os.path.isabs(pattern):
-                self.logger.abort(f'Absolute paths are forbidden. Offending entry: {pattern}')
-
-            # 2. Check that the pattern does not begin with a / or ./
-            if pattern[0] == '/' or pattern[0] == '.':
-                self.logger.abort(f'Patterns beginning with \'/\' or \'.\' are forbidden. '
-                                  f'Offending entry: {pattern}')
-
-            # 3. Check that the pattern is not a blanket removal of all files
-            if any(ele == '*' for ele in os.path.split(pattern)):
-                self.logger.abort(f'Deleting all files from any directory is forbidden. Offending '
-                                  f'entry: {pattern}')
-
-            # ---------------------------
-            # ---------------------------
-
-            # Assemble list of files to remove
-            items_to_remove = glob.glob(pattern)
-
-            # Loop over files and remove
-            for item_to_remove in items_to_remove:
-
-                # Print info about what will be removed
-                self.logger.info(f'Removing item {item_to_remove}')
-
-                # Only allow removing of empty directories
-                if os.path.isdir(item_to_remove):
-
-                    if len(os.listdir(item_to_remove)) == 0:
-                        os.rmdir(item_to_remove)
-                    else:
-                        self.logger.info(f'Trying to remove directory {item_to_remove} but code '
-                                         f'can only remove empty directories. Reorder removal '
-                                         f'to empty directory first.')
-
-                else:
-
-                    os.remove(item_to_remove)
+        # Remove all specified files
+        report = clean_directory(self.cycle_dir(), clean_patterns, clean_recursive,
+                                 clean_workers)
+
+        errors = []
+        for pattern, pattern_report in report.items():
+
+            # Print info about what was removed
+            self.logger.info(f'Removed {pattern_report["removed"]} item(s) matching {pattern}, ' +
+                             f'{pattern_report["bytes"]/1024**2:.1f} MiB reclaimed')
+            for directory in pattern_report['not_empty']:
+                self.logger.info(f'Trying to remove directory {directory} but code can only ' +
+                                 f'remove empty directories. Reorder removal to empty directory ' +
+                                 f'first or set clean_recursive.')
+            errors += pattern_report['errors']
+
+        self.metrics.add_counters('clean', {pattern: pattern_report['bytes']
+                                            for pattern, pattern_report in report.items()})
+
+        if errors:
+            self.logger.abort(f'Removing failed for {len(errors)} item(s):\n\n' +
+                              '\n\n'.join(errors), wrap=False)
 
         # Save cycle_done file to cycle_dir
         with open(os.path.join(self.cycle_dir(), 'cycle_done'), 'w') as file:
@@ -8,7 +8,6 @@
 # --------------------------------------------------------------------------------------------------
 
 
-from multiprocessing import Pool
 import os
 import yaml
 
@@ -19,7 +18,7 @@ from swell.tasks.base.task_base import taskBase
 from swell.utilities.dictionary import remove_matching_keys, replace_string_in_dictionary
 from swell.utilities.jinja2 import template_string_jinja2
 from swell.utilities.observations import ioda_name_to_long_name
-from swell.utilities.run_jedi_executables import check_obs
+from swell.utilities.plot_scheduler import run_plots
 
 # --------------------------------------------------------------------------------------------------
 
@@ -53,12 +52,12 @@ class EvaObservations(taskBase):
         # -------------
         model = self.get_model()
 
-        # Determine if running on login or compute node and set workers
-        # -------------------------------------------------------------
-        number_of_workers = 6
-        if login_or_compute(self.platform()) == 'compute':
-            number_of_workers = 40
-        self.logger.info(f'Running parallel plot generation with {number_of_workers} workers')
+        # Limit the workers when running on a shared login node, on compute nodes the workers
+        # are sized from the cores and memory available
+        # ------------------------------------------------------------------------------------
+        max_workers = None
+        if login_or_compute(self.platform()) == 'login':
+            max_workers = 6
 
         # Read Eva template file into dictionary
         # --------------------------------------
@@ -85,19 +84,23 @@ class EvaObservations(taskBase):
 
         # Loop over observations and create dictionaries
         # ----------------------------------------------
-        eva_dicts = []  # Empty list of dictionaries
+        eva_jobs = []  # Empty list of (observation, file size, dictionary)
 
         # Set the observing system records path
         self.jedi_rendering.set_obs_records_path(self.config.observing_system_records_path(None))
 
-        for observation in self.config.observations():
+        # Load the observation dictionaries
+        observations = self.config.observations()
+        observation_dicts = [self.jedi_rendering.render_interface_observations(observation)
+                             for observation in observations]
+
+        # Check which observations were used, answered from the observation inventory
+        use_observations = self.observations_in_use(observation_dicts)
 
-            # Load the observation dictionary
-            observation_dict = self.jedi_rendering.render_interface_observations(observation)
+        for observation, observation_dict, use_obs in zip(observations, observation_dicts,
+                                                          use_observations):
 
-            # Check if observation was used
-            use_obs = check_obs(self.jedi_rendering.observing_system_records_path, observation,
-                                observation_dict, self.cycle_time_dto())
+            # Skip observations that were not used
             if not use_obs:
                 continue
 
@@ -180,11 +183,27 @@ class EvaObservations(taskBase):
             with open(conf_output, 'w') as outfile:
                 yaml.dump(eva_dict, outfile, default_flow_style=False)
 
-            # Add eva dictionary to list
-            # --------------------------
-            eva_dicts.append(eva_dict)
+            # Add eva dictionary to list, eva loads the observation file once for all the plots
+            # and channels of the dictionary
+            # ------------------------------------------------------------------------------
+            eva_jobs.append((ioda_name, os.path.getsize(obs_path_file), eva_dict))
+
+        # Call eva in parallel, largest observation files first
+        # -----------------------------------------------------
+        plot_jobs = [(size, (eva_dict,)) for _, size, eva_dict in eva_jobs]
+        number_of_workers, eva_results = run_plots(run_eva, plot_jobs, max_workers)
+        self.logger.info(f'Ran parallel plot generation with {number_of_workers} workers')
+
+        # Report the time taken by each observation and the failures
+        # ----------------------------------------------------------
+        eva_failures = []
+        for (ioda_name, size, _), (seconds, output, error) in zip(eva_jobs, eva_results):
+            print(output, end='')
+            if error is not None:
+                eva_failures.append(f'{ioda_name}:\n{error}')
+                continue
+            self.logger.info(f'Plotted {ioda_name} ({size/1024**2:.1f} MiB) in {seconds:.1f} s')
 
-        # Call eva in parallel
-        # --------------------
-        with Pool(processes=number_of_workers) as pool:
-            pool.map(run_eva, eva_dicts)
+        if eva_failures:
+            self.logger.abort(f'Plotting failed for {len(eva_failures)} observation type(s):' +
+                              f'\n\n' + '\n\n'.join(eva_failures), wrap=False)
@@ -11,6 +11,7 @@
 import os
 
 from swell.tasks.base.task_base import taskBase
+from swell.utilities.get_channels import compile_channel_index
 from swell.utilities.observing_system_records import ObservingSystemRecords
 
 # --------------------------------------------------------------------------------------------------
@@ -30,8 +31,8 @@ class GenerateObservingSystemRecords(taskBase):
             self.logger.info('Skipping GenerateObservingSystemRecords for: ' + self.get_model())
             return
 
-        # Parse GSI records and save yamls
-        # --------------------------------
+        # Parse GSI records and save yamls, only the yamls whose records changed are written
+        # -----------------------------------------------------------------------------------
         observing_system_records_path = self.config.observing_system_records_path(None)
         if observing_system_records_path == 'None':
             cycle_dir = self.cycle_dir()
@@ -47,17 +48,17 @@ class GenerateObservingSystemRecords(taskBase):
         observations = self.config.observations()
         path_to_gsi_records = os.path.join(path_to_geos_mksi, 'sidb')
         sat_records = ObservingSystemRecords(record_type)
-        sat_records.parse_records(path_to_gsi_records)
-        sat_records.save_yamls(observing_system_records_path, observations)
-        self.logger.info('Completed sidb processing.')
+        updated = sat_records.update_yamls(path_to_gsi_records, observing_system_records_path,
+                                           observations)
+        compile_channel_index(observing_system_records_path)
+        self.logger.info(f'Completed sidb processing, {len(updated)} records written.')
 
         # Parse ozone.db
         # --------------
         record_type = 'level'
         path_to_gsi_records = os.path.join(path_to_geos_mksi, 'ozinfo.db')
         sat_records = ObservingSystemRecords(record_type)
-        sat_records.parse_records(path_to_gsi_records)
-        sat_records.save_yamls(observing_system_records_path)
-        self.logger.info('Completed ozinfo.db processing')
+        updated = sat_records.update_yamls(path_to_gsi_records, observing_system_records_path)
+        self.logger.info(f'Completed ozinfo.db processing, {len(updated)} records written.')
 
 # ----------------------------------------------------------------------------------------------
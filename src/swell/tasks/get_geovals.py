@@ -11,6 +11,7 @@
 import os
 
 from swell.tasks.base.task_base import taskBase
+from swell.utilities.observation_cache import ObservationCache
 from swell.utilities.r2d2 import create_r2d2_config
 from r2d2 import fetch
 
@@ -31,6 +32,8 @@ class GetGeovals(taskBase):
         window_length = self.config.window_length()
         crtm_coeff_dir = self.config.crtm_coeff_dir(None)
         r2d2_local_path = self.config.r2d2_local_path()
+        observation_cache_path = self.config.observation_cache_path(None)
+        observation_cache_max_size_gb = self.config.observation_cache_max_size_gb(100)
 
         # Get window begin time
         window_begin = self.da_window_params.window_begin(window_offset)
@@ -41,6 +44,13 @@ class GetGeovals(taskBase):
         # --------------------
         create_r2d2_config(self.logger, self.platform(), self.cycle_dir(), r2d2_local_path)
 
+        # Geovals files are fetched through the shared cache when one is configured
+        # -------------------------------------------------------------------------
+        fetcher = fetch
+        if observation_cache_path not in [None, 'None']:
+            fetcher = ObservationCache(self.logger, observation_cache_path,
+                                       observation_cache_max_size_gb*1024**3, fetch).fetch
+
         # Add to JEDI template rendering dictionary
         self.jedi_rendering.add_key('background_time', background_time)
         self.jedi_rendering.add_key('crtm_coeff_dir', crtm_coeff_dir)
@@ -56,15 +66,16 @@ class GetGeovals(taskBase):
                                        f'{observation}_geovals.{window_begin}.nc4')
             self.logger.info("Processing observation file "+target_file)
 
-            fetch(date=window_begin,
-                  target_file=target_file,
-                  provider=geovals_provider,
-                  obs_type=observation,
-                  time_window=window_length,
-                  type='ob',
-                  experiment=geovals_experiment)
-
-            # Change permission
-            os.chmod(target_file, 0o644)
+            fetcher(date=window_begin,
+                    target_file=target_file,
+                    provider=geovals_provider,
+                    obs_type=observation,
+                    time_window=window_length,
+                    type='ob',
+                    experiment=geovals_experiment)
+
+            # Change permission, files from the cache are read-only links to the shared copy
+            if fetcher is fetch:
+                os.chmod(target_file, 0o644)
 
     # ----------------------------------------------------------------------------------------------
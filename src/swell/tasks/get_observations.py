@@ -8,21 +8,78 @@
 # --------------------------------------------------------------------------------------------------
 
 import isodate
-import numpy as np
 import os
-import netCDF4 as nc
-from typing import Union
+from typing import Callable, Optional, Union
 
 from datetime import timedelta, datetime as dt
 from swell.tasks.base.task_base import taskBase
+from swell.utilities.logger import Logger
+from swell.utilities.netcdf_files import concatenate_files
+from swell.utilities.observation_cache import ObservationCache
+from swell.utilities.observation_inventory import record_files
 from swell.utilities.r2d2 import create_r2d2_config
 from swell.utilities.datetime_util import datetime_formats
+from swell.utilities.worker_pool import run_in_pool
 from r2d2 import fetch
 
 
 # --------------------------------------------------------------------------------------------------
 
 
+def fetch_observation_file(
+    fetcher: Callable,
+    date: str,
+    target_file: str,
+    provider: str,
+    obs_type: str,
+    time_window: str,
+    experiment: str
+) -> None:
+
+    # Fetch a single sub-window observation file, missing files are ignored
+    fetcher(date=date,
+            target_file=target_file,
+            provider=provider,
+            ignore_missing=True,
+            obs_type=obs_type,
+            time_window=time_window,
+            type='ob',
+            experiment=experiment)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def combine_observation_files(
+    logger: Logger,
+    input_filenames: list,
+    output_filename: str,
+    cache: Optional[ObservationCache],
+    window_bounds: tuple
+) -> None:
+
+    # Only the sub-window files that were found are combined, along the Location dimension
+    input_filenames = [f for f in input_filenames if os.path.exists(f)]
+
+    # Without a cache simply combine the files
+    if cache is None:
+        concatenate_files(logger, input_filenames, output_filename, 'Location')
+        return
+
+    # Reuse the combined file when these inputs were already combined over the same window
+    key = cache.product_key('concatenate_files', input_filenames,
+                            window_begin=window_bounds[0], window_end=window_bounds[1])
+    if cache.lookup(key, output_filename):
+        logger.info(f'Using cached combined file for {os.path.basename(output_filename)}')
+        return
+
+    concatenate_files(logger, input_filenames, output_filename, 'Location')
+    cache.store_product(key, output_filename)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
 class GetObservations(taskBase):
 
     def execute(self) -> None:
@@ -31,8 +88,8 @@ class GetObservations(taskBase):
         Acquires observation files for a given experiment and cycle.
 
         To have additional flexibility in terms of R2D2 files, this task combines
-        observation files that are organized under sub-windows. Currently, this
-        combination can only handle Location and Channel dimensions.
+        observation files that are organized under sub-windows. The files are
+        concatenated along the Location dimension.
 
         First, it finds the observation files that encompass the desired
         time window. For example, if the file time window is 6 hours and the middle
@@ -101,6 +158,9 @@ class GetObservations(taskBase):
         window_offset = self.config.window_offset()
         r2d2_local_path = self.config.r2d2_local_path()
         cycling_varbc = self.config.cycling_varbc(None)
+        max_concurrent_fetches = self.config.max_concurrent_fetches(1)
+        observation_cache_path = self.config.observation_cache_path(None)
+        observation_cache_max_size_gb = self.config.observation_cache_max_size_gb(100)
 
         # Set the observing system records path
         self.jedi_rendering.set_obs_records_path(self.config.observing_system_records_path(None))
@@ -132,61 +192,39 @@ class GetObservations(taskBase):
         # --------------------
         create_r2d2_config(self.logger, self.platform(), self.cycle_dir(), r2d2_local_path)
 
+        # Observation files are fetched and combined through the shared cache when one is
+        # configured
+        # --------------------------------------------------------------------------------
+        cache = None
+        if observation_cache_path not in [None, 'None']:
+            cache = ObservationCache(self.logger, observation_cache_path,
+                                     observation_cache_max_size_gb*1024**3, fetch)
+
+        # Open the observation operator dictionaries
+        # ------------------------------------------
+        observation_dicts = {}
+        for observation in observations:
+            observation_dicts[observation] = \
+                self.jedi_rendering.render_interface_observations(observation)
+
+        # Fetch and combine the observation files of all the observation types
+        # --------------------------------------------------------------------
+        observation_failures = self.fetch_and_combine_observations(observations,
+                                                                   observation_dicts,
+                                                                   obs_providers,
+                                                                   obs_experiment,
+                                                                   obs_list_dto,
+                                                                   obs_window_length,
+                                                                   max_concurrent_fetches,
+                                                                   cache)
+
         # Loop over observation operators
         # -------------------------------
         for observation in observations:
 
             # Open the observation operator dictionary
             # ----------------------------------------
-            observation_dict = self.jedi_rendering.render_interface_observations(observation)
-
-            # Until R2D2v3 is fully implemented we will assume there could be multiple
-            # observation providers for a given observation type.
-            # We have to ensure obs_providers is a list for this loop to work
-            for obs_provider in (obs_providers if isinstance(obs_providers, list)
-                                 else [obs_providers]):
-                # Fetch observation files
-                # -----------------------
-                combine_input_files = []
-                # Here, we are fetching
-                for obs_num, obs_time in enumerate(obs_list_dto):
-                    obs_window_begin = dt.strftime(obs_time, datetime_formats['iso_format'])
-                    target_file = os.path.join(self.cycle_dir(), f'{observation}.{obs_num}.nc4')
-                    combine_input_files.append(target_file)
-                    fetch(date=obs_window_begin,
-                          target_file=target_file,
-                          provider=obs_provider,
-                          ignore_missing=True,
-                          obs_type=observation,
-                          time_window=obs_window_length,
-                          type='ob',
-                          experiment=obs_experiment)
-
-                # Check how many of the combine_input_files exist in the cycle directory.
-                # If all of them are missing proceed without creating an observation input
-                # file since bias correction files still need to be propagated to the next cycle
-                # for cycling VarBC.
-                # -----------------------------------------------------------------------
-                if not any([os.path.exists(f) for f in combine_input_files]):
-                    self.logger.info(f'None of the {observation} files exist for this cycle!')
-                    # continue
-                else:
-                    jedi_obs_file = observation_dict['obs space']['obsdatain']['engine']['obsfile']
-                    self.logger.info(f'Processing observation file {jedi_obs_file}')
-
-                    # If obs_list_dto has one member, then just rename the file
-                    # ---------------------------------------------------------
-                    if len(obs_list_dto) == 1:
-                        os.rename(combine_input_files[0], jedi_obs_file)
-                    else:
-                        self.read_and_combine(combine_input_files, jedi_obs_file)
-
-                    # Change permission
-                    os.chmod(jedi_obs_file, 0o644)
-
-                    # Observations were found for this provider, so we can break
-                    # the provider loop
-                    break
+            observation_dict = observation_dicts[observation]
 
             # TODO: This part is not tested yet for cycling VarBC
             # Aircraft bias correction files
@@ -291,6 +329,192 @@ class GetObservations(taskBase):
                 # Change permission
                 os.chmod(target_file, 0o644)
 
+        # Report all the observation types that could not be fetched or combined
+        # ----------------------------------------------------------------------
+        if observation_failures:
+            failure_summary = ''
+            for observation, failures in observation_failures.items():
+                failure_summary += f'\n\n{observation}:\n' + '\n'.join(failures)
+            self.logger.abort(f'Fetching or combining failed for {len(observation_failures)} ' +
+                              f'observation type(s): {", ".join(observation_failures)}' +
+                              failure_summary, wrap=False)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def fetch_and_combine_observations(
+        self,
+        observations: list,
+        observation_dicts: dict,
+        obs_providers: Union[str, list],
+        obs_experiment: str,
+        obs_list_dto: list,
+        obs_window_length: str,
+        max_concurrent_fetches: int,
+        cache: Optional[ObservationCache] = None
+    ) -> dict:
+
+        """
+        Fetches the sub-window files of all observation types and combines them into the files
+        read by JEDI.
+
+        The fetches of all the observation types are run concurrently by up to
+        max_concurrent_fetches threads and the combines, which are independent of one another,
+        by up to max_concurrent_fetches processes. Providers are tried in order, each one only
+        for the observation types that have not been found with a previous provider. The log
+        output is printed grouped per observation type in the order of the observations list,
+        whatever the order in which the work completed.
+
+        When a cache is given files are fetched through it and the combined files are memoized
+        in it, keyed by the checksums of their inputs and the bounds of the sub-windows.
+
+        The files created are recorded in the observation inventory of the cycle with the R2D2
+        keys of the sub-window files they were created from.
+
+        Returns a dictionary with the failures of each observation type that failed.
+        """
+
+        observation_logs = {observation: [] for observation in observations}
+        observation_failures = {}
+
+        # Until R2D2v3 is fully implemented we will assume there could be multiple
+        # observation providers for a given observation type.
+        # We have to ensure obs_providers is a list for this loop to work
+        # -----------------------------------------------------------------------
+        combine_input_files = {}
+        observation_sources = {}
+        pending_observations = list(observations)
+        fetcher = fetch if cache is None else cache.fetch
+
+        for obs_provider in (obs_providers if isinstance(obs_providers, list)
+                             else [obs_providers]):
+
+            if not pending_observations:
+                break
+
+            # Fetch the sub-window files of every observation type still missing
+            # ------------------------------------------------------------------
+            fetch_observations = []
+            fetch_arguments = []
+            fetch_keys = {}
+            for observation in pending_observations:
+                combine_input_files[observation] = []
+                fetch_keys[observation] = []
+                for obs_num, obs_time in enumerate(obs_list_dto):
+                    obs_window_begin = dt.strftime(obs_time, datetime_formats['iso_format'])
+                    target_file = os.path.join(self.cycle_dir(), f'{observation}.{obs_num}.nc4')
+                    combine_input_files[observation].append(target_file)
+                    fetch_observations.append(observation)
+                    fetch_arguments.append((fetcher, obs_window_begin, target_file, obs_provider,
+                                            observation, obs_window_length, obs_experiment))
+                    fetch_keys[observation].append({'date': obs_window_begin,
+                                                    'provider': obs_provider,
+                                                    'obs_type': observation,
+                                                    'time_window': obs_window_length,
+                                                    'experiment': obs_experiment})
+
+            with self.metrics.span('fetch'):
+                fetch_results = run_in_pool(fetch_observation_file, fetch_arguments,
+                                            max_concurrent_fetches, use_processes=False)
+
+            for observation, arguments, (_, output, error) in zip(fetch_observations,
+                                                                  fetch_arguments, fetch_results):
+                observation_logs[observation].append(output)
+                if error is not None:
+                    observation_failures.setdefault(observation, []).append(
+                        f'Fetching {arguments[2]} from provider {obs_provider} failed:\n{error}')
+
+            # Observations were found for this provider when any of the sub-window files exist,
+            # only the others are tried with the next provider
+            # -----------------------------------------------------------------------------
+            found_files = {observation: [os.path.exists(f) for f in
+                                         combine_input_files[observation]]
+                           for observation in pending_observations}
+            for observation, found in found_files.items():
+                if any(found):
+                    observation_sources[observation] = \
+                        [key for key, exists in zip(fetch_keys[observation], found) if exists]
+            pending_observations = [observation for observation in pending_observations
+                                    if not any(found_files[observation])]
+
+        # Combined files are reused when the same inputs were already combined over the same
+        # sub-windows, by a rerun of the cycle or by another experiment sharing the cache
+        # ----------------------------------------------------------------------------------
+        window_bounds = (obs_list_dto[0],
+                         obs_list_dto[-1] + isodate.parse_duration(obs_window_length))
+
+        # Rename single files and gather the combines to run for the observations found
+        # -----------------------------------------------------------------------------
+        combine_observations = []
+        combine_arguments = []
+        for observation in observations:
+
+            # Check how many of the combine_input_files exist in the cycle directory.
+            # If all of them are missing proceed without creating an observation input
+            # file since bias correction files still need to be propagated to the next cycle
+            # for cycling VarBC.
+            # -----------------------------------------------------------------------
+            if observation in pending_observations:
+                continue
+
+            jedi_obs_file = \
+                observation_dicts[observation]['obs space']['obsdatain']['engine']['obsfile']
+
+            # If obs_list_dto has one member, then just rename the file
+            # ---------------------------------------------------------
+            if len(obs_list_dto) == 1:
+                os.rename(combine_input_files[observation][0], jedi_obs_file)
+            else:
+                combine_observations.append(observation)
+                combine_arguments.append((self.logger, combine_input_files[observation],
+                                          jedi_obs_file, cache, window_bounds))
+
+        with self.metrics.span('combine'):
+            combine_results = run_in_pool(combine_observation_files, combine_arguments,
+                                          max_concurrent_fetches)
+
+            # The combines may run in other processes so count their input and output here
+            for arguments in combine_arguments:
+                self.metrics.add_bytes(
+                    read=sum([os.path.getsize(f) for f in arguments[1] if os.path.exists(f)]),
+                    written=os.path.getsize(arguments[2]) if os.path.exists(arguments[2]) else 0)
+        combine_results = dict(zip(combine_observations, combine_results))
+
+        # Print the log of each observation type and set the permissions of the files created
+        # -----------------------------------------------------------------------------------
+        inventory_files = []
+        for observation in observations:
+
+            for output in observation_logs[observation]:
+                print(output, end='')
+
+            if observation in pending_observations:
+                self.logger.info(f'None of the {observation} files exist for this cycle!')
+                continue
+
+            jedi_obs_file = \
+                observation_dicts[observation]['obs space']['obsdatain']['engine']['obsfile']
+            self.logger.info(f'Processing observation file {jedi_obs_file}')
+
+            if observation in combine_results:
+                _, output, error = combine_results[observation]
+                print(output, end='')
+                if error is not None:
+                    observation_failures.setdefault(observation, []).append(
+                        f'Combining into {jedi_obs_file} failed:\n{error}')
+                    continue
+
+            # Change permission, files from the cache are read-only links to the shared copy
+            if cache is None:
+                os.chmod(jedi_obs_file, 0o644)
+            inventory_files.append((jedi_obs_file, observation_sources[observation]))
+
+        # Record the files created so later tasks of the cycle can query them from the inventory
+        # ------------------------------------------------------------------------------------
+        with self.metrics.span('inventory'):
+            record_files(inventory_files)
+
+        return observation_failures
+
     # ----------------------------------------------------------------------------------------------
 
     def get_tlapse_files(self, observation_dict: dict) -> Union[None, int]:
@@ -345,9 +569,6 @@ class GetObservations(taskBase):
 
     # ----------------------------------------------------------------------------------------------
 
-    # Read and combine variable data from multiple files
-    # --------------------------------------------------
-
     def create_obs_time_list(
         self,
         obs_times: list,
@@ -389,117 +610,5 @@ class GetObservations(taskBase):
         subset_list = [dt for dt in obs_time_list if start_date <= dt < end_date]
 
         return subset_list
-    # ----------------------------------------------------------------------------------------------
-
-    # Get the target data from the netcdf file
-    # ----------------------------------------
-    def get_data(self, input_file: str, group: str, var_name: str) -> object:
-        with nc.Dataset(input_file, 'r') as ds:
-            return ds[group][var_name][:]
-
-    # ----------------------------------------------------------------------------------------------
-
-    def read_and_combine(self, input_filenames: list, output_filename: str) -> None:
-        '''
-        Combines multiple IODA v3 netcdf input files into a single output.
-        Combining multiple files require final (total) location dimension size to be
-        calculated in advance.
-
-        Basically, this function creates an output file that duplicates the first
-        input file's attributes and then fills with appended data from the input files.
-
-        Channel dimension shows up as a second dimension and sometimes as a single
-        dimension. Both cases require special handling and introduces additional
-        exceptions to the code. Final channel dimension size remains the same.
-        '''
-
-        # Create a new file for writing, remove the file if it already exists
-        # --------------------------------------------------------------------------
-        self.logger.info(f"Creating file {output_filename}")
-        if os.path.exists(output_filename):
-            os.remove(output_filename)
-
-        # Reduce the list of input files to only those that exist
-        # -------------------------------------------------------------
-        existing_files = [f for f in input_filenames if os.path.exists(f)]
-        input_filenames = existing_files
-
-        # Loop through the input files and get the total dimension size for each dimension
-        # Location requires special handling to get the cumulative sum of the dimension size
-        # ---------------------------------------------------------------------------------
-        out_dim_size = {'Location': 0}
-        for input_filename in input_filenames:
-            with nc.Dataset(input_filename, 'r') as ds:
-                for dim_name, dim in ds.dimensions.items():
-                    if dim_name == 'Location':
-                        out_dim_size[dim_name] += dim.size
-                    else:
-                        out_dim_size[dim_name] = dim.size
-
-        with nc.Dataset(output_filename, 'w') as out_ds:
-            # Open the input NetCDF files for reading
-            # ---------------------------------------
-            self.logger.info(f"Combining files {input_filenames} ")
-
-            # Create an output file template based on the first input file
-            # ------------------------------------------------------------
-            with nc.Dataset(input_filenames[0], 'r') as ds:
-                # Access groups and create dimensions
-                # -----------------------------------
-                input_groups = ds.groups.keys()
-
-                for dim_name, dim in ds.dimensions.items():
-                    out_ds.createDimension(dim_name, out_dim_size[dim_name])
-
-                # Loop through groups and process variables
-                # -----------------------------------------
-                for group_name in input_groups:
-                    group = ds[group_name]
-
-                    # Create the groups in output file
-                    # --------------------------------
-                    out_group = out_ds.createGroup(group_name)
-
-                    # Access variables within a group
-                    # -------------------------------
-                    variables_in_group = group.variables.keys()
-
-                    # Loop over variables from input files, combine, and write to the new file
-                    # ------------------------------------------------------------------------
-                    for var_name in variables_in_group:
-                        list_data = []
-
-                        # Get the dimensions of the variable
-                        # ----------------------------------
-                        var_dims = group[var_name].dimensions
-
-                        # Loop over all the files and combine the variable data into a list
-                        # Channel dimensions remain the same, so we can break the loop
-                        # ----------------------------------------------------------------
-                        for input_file in input_filenames:
-                            list_data.append(self.get_data(input_file, group_name, var_name))
-                            # Only break if the first dimension is Channel
-                            if var_dims[0] == 'Channel':
-                                break
-
-                        # Concatenate the masked arrays along the first dimension
-                        # --------------------------------------------------------
-                        variable_data = np.ma.concatenate(list_data, axis=0)
-
-                        # Fill value needs to be assigned while creating variables
-                        # --------------------------------------------------------
-                        subset_var = out_group.createVariable(var_name,
-                                                              variable_data.dtype,
-                                                              var_dims,
-                                                              fill_value=group[var_name].
-                                                              getncattr('_FillValue'))
-                        for attr_name in group[var_name].ncattrs():
-                            if attr_name == '_FillValue':
-                                continue
-                            subset_var.setncattr(attr_name, group[var_name].getncattr(attr_name))
-
-                        # Write subset data to the new file
-                        # --------------------------------
-                        subset_var[:] = variable_data
 
 # ----------------------------------------------------------------------------------------------
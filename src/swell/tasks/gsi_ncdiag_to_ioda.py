@@ -13,6 +13,7 @@ import datetime
 import glob
 import os
 import re
+from typing import Optional
 
 # Ioda converters
 import pyiodaconv.gsi_ncdiag as gsid
@@ -20,7 +21,66 @@ from pyiodaconv.combine_obsspace import combine_obsspace
 
 from swell.tasks.base.task_base import taskBase
 from swell.utilities.datetime_util import datetime_formats
-from swell.utilities.shell_commands import run_subprocess, create_executable_file
+from swell.utilities.logger import Logger
+from swell.utilities.netcdf_files import subset_locations, subset_locations_in_files
+from swell.utilities.observation_inventory import record_files
+from swell.utilities.worker_pool import run_in_pool
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def convert_ncdiag_file(
+    logger: Logger,
+    diag_type: str,
+    gsi_file: str,
+    output_dir: str,
+    produce_geovals: bool,
+    platforms: Optional[list]
+) -> None:
+
+    # Convert a single GSI ncdiag file (conventional, radiance or ozone) to IODA, and to GeoVaLs
+    # if requested. Conversions of different files do not depend on each other.
+    # --------------------------------------------------------------------------------------
+    if diag_type == 'conventional':
+
+        # Open the file
+        Diag = gsid.Conv(gsi_file)
+        Diag.read()
+
+        # Extract data
+        Diag.toIODAobs(output_dir, platforms=platforms)
+
+        if produce_geovals:
+            logger.info('', wrap=False)
+            logger.info(f'Processing GeoVaLs from {os.path.basename(gsi_file)}')
+            Diag.toGeovals(output_dir)
+
+        Diag.close()
+
+    elif diag_type == 'radiance':
+
+        # Radiances
+        Diag = gsid.Radiances(gsi_file)
+        Diag.read()
+        Diag.toIODAobs(output_dir, False, False, False, False)
+
+        # GeoVaLs call
+        if produce_geovals:
+            Diag.toGeovals(output_dir)
+
+        Diag.close()
+
+    else:
+
+        # Ozone
+        Diag = gsid.Ozone(gsi_file)
+        Diag.read()
+        Diag.toIODAobs(output_dir)
+
+        # GeoVaLs call
+        if produce_geovals:
+            Diag.toGeovals(output_dir)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -28,6 +88,28 @@ from swell.utilities.shell_commands import run_subprocess, create_executable_fil
 
 class GsiNcdiagToIoda(taskBase):
 
+    def convert_files(self, labels: list, conversion_arguments: list, workers: int) -> None:
+
+        # Each GSI file is independent of the others so they are converted by a pool of
+        # processes. Logs are shown per file once all are converted.
+        conversion_results = run_in_pool(convert_ncdiag_file, conversion_arguments, workers)
+
+        conversion_failures = []
+        for label, (_, output, error) in zip(labels, conversion_results):
+            log_str = f'Converting {label} to IODA format'
+            self.logger.info('', wrap=False)
+            self.logger.info(log_str)
+            self.logger.info('-'*len(log_str))
+            print(output, end='')
+            if error is not None:
+                conversion_failures.append(f'{label}:\n{error}')
+
+        if conversion_failures:
+            self.logger.abort(f'Conversion to IODA failed for {len(conversion_failures)} GSI ' +
+                              f'file(s):\n\n' + '\n\n'.join(conversion_failures), wrap=False)
+
+    # ----------------------------------------------------------------------------------------------
+
     def execute(self) -> None:
 
         # Parse configuration
@@ -35,6 +117,7 @@ class GsiNcdiagToIoda(taskBase):
         observations = self.config.observations()
         single_observations = self.config.single_observations()
         produce_geovals = self.config.produce_geovals()
+        ncdiag_conversion_workers = self.config.ncdiag_conversion_workers(1)
         window_offset = self.config.window_offset()
 
         # Get window beginning time
@@ -111,15 +194,12 @@ class GsiNcdiagToIoda(taskBase):
                 if os.path.exists(os.path.join(self.cycle_dir(), geo_file)):
                     os.remove(os.path.join(self.cycle_dir(), geo_file))
 
-        # First process the conventional data (if needed)
+        # First convert the conventional data (if needed)
         # -----------------------------------------------
+        conversion_labels = []
+        conversion_arguments = []
         for gsi_type_to_process in gsi_types_to_process:
 
-            log_str = f'Processing GSI file {gsi_type_to_process}'
-            self.logger.info('', wrap=False)
-            self.logger.info(log_str)
-            self.logger.info('-'*len(log_str))
-
             # If prof in the name then it is aircraft data. Adjust path and rename
             if 'prof' in gsi_type_to_process:
                 gsi_type_to_process_actual = gsi_type_to_process.replace('_prof', '')
@@ -143,25 +223,18 @@ class GsiNcdiagToIoda(taskBase):
             self.logger.assert_abort(len(gsi_conv_file) == 1, 'The search for GSI ncdiags files ' +
                                      f'returned more than one file. Files: \'{gsi_conv_file}\'')
 
-            # Open the file
-            Diag = gsid.Conv(gsi_conv_file[0])
-            Diag.read()
-
             # Assemble list of needed platforms
             needed_platforms = []
             for platform in gsid.conv_platforms[gsi_type_to_process_actual]:
                 if platform in needed_ioda_types:
                     needed_platforms.append(platform)
 
-            # Extract data
-            Diag.toIODAobs(self.cycle_dir(), platforms=needed_platforms)
-
-            if produce_geovals:
-                self.logger.info('', wrap=False)
-                self.logger.info(f'Processing GeoVaLs from {gsi_type_to_process_actual}')
-                Diag.toGeovals(self.cycle_dir())
+            conversion_labels.append(f'GSI file {gsi_type_to_process}')
+            conversion_arguments.append((self.logger, 'conventional', gsi_conv_file[0],
+                                         self.cycle_dir(), produce_geovals, needed_platforms))
 
-            Diag.close()
+        # Convert the conventional files, they are combined by type below
+        self.convert_files(conversion_labels, conversion_arguments, ncdiag_conversion_workers)
 
         # Rename gps files from gps_bend if they exist
         if 'gps' in observations_orig:
@@ -195,27 +268,10 @@ class GsiNcdiagToIoda(taskBase):
                     ioda_path_geovalfiles = glob.glob(os.path.join(self.cycle_dir(),
                                                       ioda_type_geoval_pattern))
                     ioda_path_geovalfiles = sorted(ioda_path_geovalfiles)
-                    for ioda_geoval_file_name in ioda_path_geovalfiles:
-                        self.logger.info('Converting to a singler-observation file: ' +
-                                         f'{ioda_geoval_file_name}')
-                        os.system(f'ncks -d nlocs,0,0,1 -Q -O {ioda_geoval_file_name} ' +
-                                  f'{ioda_geoval_file_name}')
+                    subset_locations_in_files(self.logger, ioda_path_geovalfiles, 0, 1)
 
                 # Save single observation in obs files
-                for ioda_obs_file_name in ioda_path_files:
-                    # Create a bash file to process ioda_obs files because command lines fails.
-                    module_path_miniconda = '/discover/nobackup/drholdaw/opt/modulefiles/core/'
-                    make_file_name = ioda_obs_file_name + '.sh'
-                    make_file = f'#!/bin/bash \n' + \
-                                f'module use -a {module_path_miniconda} \n' + \
-                                f'ml miniconda/py39_23.3.1 \n' + \
-                                f'ncks -d Location,0,0,1 -Q -O {ioda_obs_file_name} ' + \
-                                f'{ioda_obs_file_name}'
-                    self.logger.info('Making a single-observation file by executing ' +
-                                     f'{make_file_name}')
-                    create_executable_file(self.logger, make_file_name, make_file)
-                    run_subprocess(self.logger, make_file_name)
-                    os.remove(make_file_name)
+                subset_locations_in_files(self.logger, ioda_path_files, 0, 1)
 
             # For sfc make sure there are no surface ship files
             if needed_ioda_type == 'sfc':
@@ -286,12 +342,12 @@ class GsiNcdiagToIoda(taskBase):
                 if ozone_sensor in observation:
                     ozone_observations.append(observation)
 
-        # Transform radiances and ozone
-        # -----------------------------
+        # Gather the conversions of radiances and ozone
+        # ---------------------------------------------
+        conversion_labels = []
+        conversion_arguments = []
         for observation in observations:
 
-            self.logger.info(f'Converting {observation} to IODA format')
-
             observation_search_name = copy.copy(observation)
 
             # For avhrr replace the search with just avhrr
@@ -305,26 +361,13 @@ class GsiNcdiagToIoda(taskBase):
                 self.logger.info(f'No observation files found for {observation}. Skipping convert')
                 continue
 
-            if observation not in ozone_observations:
-
-                # Radiances
-                Diag = gsid.Radiances(gsi_obs_file[0])
-                Diag.read()
-                Diag.toIODAobs(self.cycle_dir(), False, False, False, False)
-
-            else:
-
-                # Ozone
-                Diag = gsid.Ozone(gsi_obs_file[0])
-                Diag.read()
-                Diag.toIODAobs(self.cycle_dir())
-
-            # GeoVaLs call
-            if produce_geovals:
-                Diag.toGeovals(self.cycle_dir())
+            diag_type = 'ozone' if observation in ozone_observations else 'radiance'
+            conversion_labels.append(f'{observation}')
+            conversion_arguments.append((self.logger, diag_type, gsi_obs_file[0],
+                                         self.cycle_dir(), produce_geovals, None))
 
-            if observation not in ozone_observations:
-                Diag.close()
+        # Convert the radiance and ozone files
+        self.convert_files(conversion_labels, conversion_arguments, ncdiag_conversion_workers)
 
         # Rename avhrr files to avhrr3
         # ----------------------------
@@ -341,6 +384,7 @@ class GsiNcdiagToIoda(taskBase):
 
         # Rename files to be swell compliant
         # ----------------------------------
+        inventory_files = []
         for observation in observations_orig:
 
             self.logger.info(f'Renaming \'{observation}\' to be swell compliant')
@@ -368,7 +412,10 @@ class GsiNcdiagToIoda(taskBase):
 
             # Make single ozone or radiance observation files
             if single_observations and observation in observations:
-                os.system(f'ncks -d Location,0,0,1 -Q -O {ioda_obs_out} {ioda_obs_out}')
+                subset_locations(self.logger, ioda_obs_out, 0, 1)
+
+            # The files are converted from GSI ncdiags, there are no R2D2 sources to record
+            inventory_files.append((ioda_obs_out, []))
 
             # Rename GeoVaLs file if need be
             if produce_geovals:
@@ -383,7 +430,11 @@ class GsiNcdiagToIoda(taskBase):
                 os.rename(ioda_geoval_in, ioda_geoval_out)
 
                 if single_observations and observation in observations:
-                    os.system(f'ncks -d nlocs,0,0,1 -Q -O {ioda_geoval_out} {ioda_geoval_out}')
+                    subset_locations(self.logger, ioda_geoval_out, 0, 1)
+
+        # Record the observation files so later tasks of the cycle can query them
+        # -----------------------------------------------------------------------
+        record_files(inventory_files)
 
         # Remove left over files
         # ------------------------------
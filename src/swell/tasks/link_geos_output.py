@@ -75,8 +75,9 @@ class LinkGeosOutput(taskBase):
                 self.src_dst_dict[src] = dst
 
         # Loop through the dictionary and create links
-        for src, dst in self.src_dst_dict.items():
-            self.geos.linker(src, dst, self.cycle_dir())
+        with self.metrics.span('link'):
+            for src, dst in self.src_dst_dict.items():
+                self.geos.linker(src, dst, self.cycle_dir())
 
     # ----------------------------------------------------------------------------------------------
 
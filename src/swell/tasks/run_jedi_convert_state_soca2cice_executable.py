@@ -12,6 +12,7 @@ import os
 import yaml
 
 from swell.tasks.base.task_base import taskBase
+from swell.utilities.dictionary import YamlDumper
 from swell.utilities.run_jedi_executables import jedi_dictionary_iterator, run_executable
 
 
@@ -95,17 +96,19 @@ class RunJediConvertStateSoca2ciceExecutable(taskBase):
 
             # Open the JEDI config file and fill initial templates
             # ----------------------------------------------------
-            jedi_config_dict = self.jedi_rendering.render_oops_file(f'{jedi_application}')
+            with self.metrics.span('render'):
+                jedi_config_dict = self.jedi_rendering.render_oops_file(f'{jedi_application}')
 
-            # Perform complete template rendering
-            # -----------------------------------
-            jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
-                                     observations, jedi_forecast_model)
+                # Perform complete template rendering
+                # -----------------------------------
+                jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
+                                         observations, jedi_forecast_model)
 
             # Write the expanded dictionary to YAML file
             # ------------------------------------------
             with open(jedi_config_file, 'w') as jedi_config_file_open:
-                yaml.dump(jedi_config_dict, jedi_config_file_open, default_flow_style=False)
+                yaml.dump(jedi_config_dict, jedi_config_file_open,
+                          Dumper=YamlDumper, default_flow_style=False)
 
             # Get the JEDI interface metadata
             # -------------------------------
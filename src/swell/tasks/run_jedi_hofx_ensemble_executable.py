@@ -12,6 +12,7 @@ import os
 import yaml
 
 from swell.tasks.base.task_base import taskBase
+from swell.utilities.dictionary import YamlDumper
 from swell.utilities.run_jedi_executables import jedi_dictionary_iterator
 
 from swell.utilities.run_jedi_executables import run_executable
@@ -125,21 +126,26 @@ class RunJediHofxEnsembleExecutable(RunJediHofxExecutable, taskBase):
 
         # Open the JEDI config file and fill initial templates
         # ----------------------------------------------------
-        jedi_config_dict = self.jedi_rendering.render_oops_file(f'{jedi_application}{window_type}')
+        with self.metrics.span('render'):
+            jedi_config_dict = \
+                self.jedi_rendering.render_oops_file(f'{jedi_application}{window_type}')
 
-        # Perform complete template rendering
-        # -----------------------------------
-        jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type, observations,
-                                 self.cycle_time_dto(), jedi_forecast_model)
+            # Perform complete template rendering
+            # -----------------------------------
+            jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
+                                     observations, self.cycle_time_dto(), jedi_forecast_model,
+                                     validate_observations=False)
 
         # Write the expanded dictionary to YAML file
         # ------------------------------------------
         with open(jedi_config_file, 'w') as jedi_config_file_open:
-            yaml.dump(jedi_config_dict, jedi_config_file_open, default_flow_style=False)
+            yaml.dump(jedi_config_dict, jedi_config_file_open,
+                      Dumper=YamlDumper, default_flow_style=False)
 
         # Call execute of RunJediHofxExecutable to render hofx templates for each member
         # ------------------------------------------------------------------------------
-        super().execute(ensemble_members=packet_ensemble_members)
+        super().execute(ensemble_members=packet_ensemble_members,
+                        ensemble_config_workers=self.config.ensemble_config_workers(1))
 
         # Get the JEDI interface metadata
         # -------------------------------
@@ -14,8 +14,10 @@ import yaml
 from typing import Optional
 
 from swell.tasks.base.task_base import taskBase
+from swell.utilities.dictionary import YamlDumper
 from swell.utilities.netcdf_files import combine_files_without_groups
 from swell.utilities.run_jedi_executables import jedi_dictionary_iterator, run_executable
+from swell.utilities.worker_pool import run_in_pool
 
 
 # --------------------------------------------------------------------------------------------------
@@ -25,7 +27,11 @@ class RunJediHofxExecutable(taskBase):
 
     # ----------------------------------------------------------------------------------------------
 
-    def execute(self, ensemble_members: Optional[list] = None) -> None:
+    def execute(
+        self,
+        ensemble_members: Optional[list] = None,
+        ensemble_config_workers: int = 1
+    ) -> None:
 
         # Jedi application name
         # ---------------------
@@ -110,13 +116,15 @@ class RunJediHofxExecutable(taskBase):
 
             # Open the JEDI config file and fill initial templates
             # ----------------------------------------------------
-            jedi_config_dict = \
-                self.jedi_rendering.render_oops_file(f'{jedi_application}{window_type}')
+            with self.metrics.span('render'):
+                jedi_config_dict = \
+                    self.jedi_rendering.render_oops_file(f'{jedi_application}{window_type}')
 
-            # Perform complete template rendering
-            # -----------------------------------
-            jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
-                                     observations, self.cycle_time_dto(), jedi_forecast_model)
+                # Perform complete template rendering
+                # -----------------------------------
+                jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
+                                         observations, self.cycle_time_dto(), jedi_forecast_model,
+                                         validate_observations=False)
 
             # If window type is 4D add time interpolation to each observer
             # ------------------------------------------------------------
@@ -136,7 +144,8 @@ class RunJediHofxExecutable(taskBase):
             # Write the expanded dictionary to YAML file
             # ------------------------------------------
             with open(jedi_config_file, 'w') as jedi_config_file_open:
-                yaml.dump(jedi_config_dict, jedi_config_file_open, default_flow_style=False)
+                yaml.dump(jedi_config_dict, jedi_config_file_open,
+                          Dumper=YamlDumper, default_flow_style=False)
 
             # Jedi executable name
             # --------------------
@@ -184,74 +193,62 @@ class RunJediHofxExecutable(taskBase):
                                                  True)
 
         else:
-            for mem in ensemble_members:
-                # Jedi configuration file
-                # -----------------------
-                jedi_config_file = os.path.join(self.cycle_dir(),
-                                                f'jedi_{jedi_application}_mem{mem}_config.yaml')
 
-                # Output log file
-                # ---------------
-                output_log_file = os.path.join(self.cycle_dir(),
-                                               f'jedi_{jedi_application}_mem{mem}_log.log')
-
-                # Open the JEDI config file and fill initial templates
-                # ----------------------------------------------------
+            # The configuration is the same for every member apart from the output files, so it
+            # is rendered once and only the member specific parts are patched for each member
+            # ---------------------------------------------------------------------------------
+            with self.metrics.span('render'):
                 jedi_config_dict = \
                     self.jedi_rendering.render_oops_file(f'{jedi_application}{window_type}')
 
                 # Perform complete template rendering
                 # -----------------------------------
                 jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
-                                         observations, self.cycle_time_dto(), jedi_forecast_model)
-
-                # Continue with the yaml edits below some of which need to be
-                # done for each observation and ensemble member
+                                         observations, self.cycle_time_dto(),
+                                         jedi_forecast_model,
+                                         validate_observations=False)
 
-                # If window type is 4D add time interpolation to each observer
-                # ------------------------------------------------------------
-                if window_type == '4D':
-                    for observer in jedi_config_dict['observations']['observers']:
-                        observer['get values'] = {
-                            'time interpolation': 'linear'
-                        }
-
-                # For each observation, add the ensemble member to the output
-                # filename to create seperate files for each ensemble member
-                # ------------------------------------------------------------
-                for index, observation in enumerate(observations):
-
-                    # Get pointer to observer
-                    observer = jedi_config_dict['observations']['observers'][index]
+            # If window type is 4D add time interpolation to each observer
+            # ------------------------------------------------------------
+            if window_type == '4D':
+                for observer in jedi_config_dict['observations']['observers']:
+                    observer['get values'] = {
+                        'time interpolation': 'linear'
+                    }
 
-                    # Get the output file string
-                    outfile = observer['obs space']['obsdataout']['engine']['obsfile']
+            # Patch and write the configuration of each member, optionally in parallel
+            # ------------------------------------------------------------------------
+            write_arguments = []
+            for mem in ensemble_members:
 
-                    # Replace '.nc4' with '_mem.nc4' and update the 'obsfile' string in the observer
-                    observer['obs space']['obsdataout']['engine']['obsfile'] = \
-                        outfile.replace('.nc4', f'_{mem:02}.nc4')
+                # Jedi configuration file
+                # -----------------------
+                jedi_config_file = os.path.join(self.cycle_dir(),
+                                                f'jedi_{jedi_application}_mem{mem}_config.yaml')
 
-                # Update config filters to save the GeoVaLs from the model interface.
-                # Add GOMsaver to either obs filters OR obs prior filters, if neither
-                # exists then create obs prior filters and add GOMsaver
+                # Update config filters to save the GeoVaLs from the model interface
                 # ------------------------------------------------------------------
+                gomsaver_files = None
                 if save_geovals:
-                    self.append_gomsaver(observations, jedi_config_dict, window_begin, mem=mem)
+                    gomsaver_files = self.gomsaver_files(observations, window_begin, mem=mem)
+
+                write_arguments.append((jedi_config_dict, mem, gomsaver_files, jedi_config_file))
 
-                # Write the expanded dictionary to YAML file
-                # ------------------------------------------
-                with open(jedi_config_file, 'w') as jedi_config_file_open:
-                    yaml.dump(jedi_config_dict, jedi_config_file_open, default_flow_style=False)
+            with self.metrics.span('write_member_configs'):
+                results = run_in_pool(write_member_config, write_arguments,
+                                      ensemble_config_workers)
+
+            for arguments, (_, _, error) in zip(write_arguments, results):
+                self.logger.assert_abort(error is None, f'Writing {arguments[3]} failed:\n{error}')
 
     # ----------------------------------------------------------------------------------------------
 
-    def append_gomsaver(
+    def gomsaver_files(
         self,
         observations: list,
-        jedi_config_dict: dict,
         window_begin: str,
         mem: Optional[str] = None
-    ) -> None:
+    ) -> list:
 
         # We may need to save the GeoVaLs for ensemble members. This will
         # prevent code repetition.
@@ -260,28 +257,109 @@ class RunJediHofxExecutable(taskBase):
         # Add mem to the filename if it is not None
         mem_str = f'_mem{mem}' if mem is not None else ''
 
-        for index, observation in enumerate(observations):
+        return [os.path.join(self.cycle_dir(), f'{observation}-geovals.{window_begin}{mem_str}.nc4')
+                for observation in observations]
+
+    # ----------------------------------------------------------------------------------------------
+
+    def append_gomsaver(
+        self,
+        observations: list,
+        jedi_config_dict: dict,
+        window_begin: str,
+        mem: Optional[str] = None
+    ) -> None:
 
-            # Define the GeoVaLs saver dictionary
-            gom_saver_dict = {
-                'filter': 'GOMsaver',
-                'filename': os.path.join(self.cycle_dir(),
-                                         f'{observation}-geovals.{window_begin}{mem_str}.nc4')
-            }
+        gomsaver_files = self.gomsaver_files(observations, window_begin, mem)
+        for observer, gomsaver_file in zip(jedi_config_dict['observations']['observers'],
+                                           gomsaver_files):
+            add_gomsaver(observer, gomsaver_file)
 
-            # Get pointer to observer
-            observer = jedi_config_dict['observations']['observers'][index]
 
-            # Check if observer has obs filters and if so add them to the jedi_config_dict
-            if 'obs filters' in observer:
-                filter_dict = 'obs filters'
-            elif 'obs prior filters' in observer:
-                filter_dict = 'obs prior filters'
-            else:
-                # Create some prior filters
-                observer['obs prior filters'] = []
-                filter_dict = 'obs prior filters'
+# --------------------------------------------------------------------------------------------------
+
+
+def add_gomsaver(observer: dict, gomsaver_file: str) -> None:
+
+    # Define the GeoVaLs saver dictionary
+    gom_saver_dict = {
+        'filter': 'GOMsaver',
+        'filename': gomsaver_file
+    }
+
+    # Check if observer has obs filters and if so add them to the jedi_config_dict
+    if 'obs filters' in observer:
+        filter_dict = 'obs filters'
+    elif 'obs prior filters' in observer:
+        filter_dict = 'obs prior filters'
+    else:
+        # Create some prior filters
+        observer['obs prior filters'] = []
+        filter_dict = 'obs prior filters'
+
+    # Append the GOMsaver dictionary to the observer filters
+    observer[filter_dict].append(gom_saver_dict)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def member_config(
+    jedi_config_dict: dict,
+    mem: int,
+    gomsaver_files: Optional[list] = None
+) -> dict:
+
+    """
+    Returns the configuration of ensemble member mem from the configuration rendered once for all
+    the members. Only the dictionaries and lists on the path to the values that differ between
+    members (the obsdataout file and the filters saving the GeoVaLs) are copied, everything else
+    is shared with jedi_config_dict, which is left unchanged.
+    """
+
+    member_dict = dict(jedi_config_dict)
+    member_dict['observations'] = dict(jedi_config_dict['observations'])
+
+    observers = []
+    for index, observer in enumerate(jedi_config_dict['observations']['observers']):
+
+        # Add the ensemble member to the output filename to create seperate files for each
+        # ensemble member, replacing '.nc4' with '_mem.nc4'
+        observer = dict(observer)
+        obs_space = observer['obs space'] = dict(observer['obs space'])
+        obsdataout = obs_space['obsdataout'] = dict(obs_space['obsdataout'])
+        engine = obsdataout['engine'] = dict(obsdataout['engine'])
+        engine['obsfile'] = engine['obsfile'].replace('.nc4', f'_{mem:02}.nc4')
+
+        # Add GOMsaver to either obs filters OR obs prior filters, if neither exists then create
+        # obs prior filters and add GOMsaver
+        if gomsaver_files is not None and index < len(gomsaver_files):
+            for filter_dict in ['obs filters', 'obs prior filters']:
+                if filter_dict in observer:
+                    observer[filter_dict] = list(observer[filter_dict])
+            add_gomsaver(observer, gomsaver_files[index])
+
+        observers.append(observer)
+
+    member_dict['observations']['observers'] = observers
+
+    return member_dict
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def write_member_config(
+    jedi_config_dict: dict,
+    mem: int,
+    gomsaver_files: Optional[list],
+    jedi_config_file: str
+) -> None:
+
+    # Write the expanded dictionary of the member to YAML file
+    with open(jedi_config_file, 'w') as jedi_config_file_open:
+        yaml.dump(member_config(jedi_config_dict, mem, gomsaver_files), jedi_config_file_open,
+                  Dumper=YamlDumper, default_flow_style=False)
+
 
-            # Append the GOMsaver dictionary to the observer filters
-            observer[filter_dict].append(gom_saver_dict)
 # --------------------------------------------------------------------------------------------------
@@ -13,6 +13,7 @@ import yaml
 
 from swell.swell_path import get_swell_path
 from swell.tasks.base.task_base import taskBase
+from swell.utilities.dictionary import YamlDumper
 from swell.utilities.run_jedi_executables import jedi_dictionary_iterator, run_executable
 
 # --------------------------------------------------------------------------------------------------
@@ -144,12 +145,14 @@ class RunJediLocalEnsembleDaExecutable(taskBase):
 
         # Open the JEDI config file and fill initial templates
         # ----------------------------------------------------
-        jedi_config_dict = self.jedi_rendering.render_oops_file('LocalEnsembleDA')
+        with self.metrics.span('render'):
+            jedi_config_dict = self.jedi_rendering.render_oops_file('LocalEnsembleDA')
 
-        # Perform complete template rendering
-        # -----------------------------------
-        jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type, observations,
-                                 self.cycle_time_dto(), jedi_forecast_model)
+            # Perform complete template rendering
+            # -----------------------------------
+            jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
+                                     observations, self.cycle_time_dto(), jedi_forecast_model,
+                                     validate_observations=False)
 
         # Assemble localizations
         # ----------------------
@@ -197,7 +200,8 @@ class RunJediLocalEnsembleDaExecutable(taskBase):
         # Write the expanded dictionary to YAML file
         # ------------------------------------------
         with open(jedi_config_file, 'w') as jedi_config_file_open:
-            yaml.dump(jedi_config_dict, jedi_config_file_open, default_flow_style=False)
+            yaml.dump(jedi_config_dict, jedi_config_file_open,
+                      Dumper=YamlDumper, default_flow_style=False)
 
         # Get the JEDI interface metadata
         # -------------------------------
@@ -13,6 +13,7 @@ import yaml
 from typing import Optional
 import subprocess
 from swell.tasks.base.task_base import taskBase
+from swell.utilities.dictionary import YamlDumper
 from swell.utilities.run_jedi_executables import jedi_dictionary_iterator
 
 # --------------------------------------------------------------------------------------------------
@@ -105,12 +106,14 @@ class RunJediObsfiltersExecutable(taskBase):
 
         # Open the JEDI config file and fill initial templates
         # ----------------------------------------------------
-        jedi_config_dict = self.jedi_rendering.render_oops_file('qc_thinning')
+        with self.metrics.span('render'):
+            jedi_config_dict = self.jedi_rendering.render_oops_file('qc_thinning')
 
-        # Perform complete template rendering
-        # -----------------------------------
-        jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
-                                 observations, self.cycle_time_dto(), jedi_forecast_model)
+            # Perform complete template rendering
+            # -----------------------------------
+            jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
+                                     observations, self.cycle_time_dto(), jedi_forecast_model,
+                                     validate_observations=False)
 
         # Filter Thinning
         # ----------------------
@@ -146,7 +149,8 @@ class RunJediObsfiltersExecutable(taskBase):
         # Write the expanded dictionary to YAML file
         # ------------------------------------------
         with open(jedi_config_file, 'w') as jedi_config_file_open:
-            yaml.dump(jedi_config_dict, jedi_config_file_open, default_flow_style=False)
+            yaml.dump(jedi_config_dict, jedi_config_file_open,
+                      Dumper=YamlDumper, default_flow_style=False)
 
         # Jedi executable name
         # --------------------
@@ -13,7 +13,7 @@ import os
 import yaml
 
 from swell.tasks.base.task_base import taskBase
-from swell.utilities.dictionary import update_dict
+from swell.utilities.dictionary import update_dict, YamlDumper
 from swell.utilities.run_jedi_executables import jedi_dictionary_iterator, run_executable
 
 
@@ -60,12 +60,13 @@ class RunJediUfoTestsExecutable(taskBase):
 
         # Open the JEDI config file and fill initial templates
         # ----------------------------------------------------
-        jedi_config_dict = self.jedi_rendering.render_oops_file(f'{jedi_application}')
+        with self.metrics.span('render'):
+            jedi_config_dict = self.jedi_rendering.render_oops_file(f'{jedi_application}')
 
-        # Perform complete template rendering
-        # -----------------------------------
-        jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, '3D',
-                                 observations, self.cycle_time_dto())
+            # Perform complete template rendering
+            # -----------------------------------
+            jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, '3D',
+                                     observations, self.cycle_time_dto())
 
         # Make modifications needed for testing
         # -------------------------------------
@@ -151,7 +152,8 @@ class RunJediUfoTestsExecutable(taskBase):
 
         file = os.path.join(self.cycle_dir(), 'jedi_test_ObsFilters_config.yaml')
         with open(file, 'w') as jedi_config_file_open:
-            yaml.dump(jedi_filter_dict, jedi_config_file_open, default_flow_style=False)
+            yaml.dump(jedi_filter_dict, jedi_config_file_open,
+                      Dumper=YamlDumper, default_flow_style=False)
 
         # Tests to run
         # ------------
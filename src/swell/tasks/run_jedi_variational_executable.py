@@ -109,12 +109,15 @@ class RunJediVariationalExecutable(taskBase):
 
         # Open the JEDI config file and fill initial templates
         # ----------------------------------------------------
-        jedi_config_dict = self.jedi_rendering.render_oops_file(f'{jedi_application}{window_type}')
-
-        # Perform complete template rendering
-        # -----------------------------------
-        jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type, observations,
-                                 self.cycle_time_dto(), jedi_forecast_model)
+        with self.metrics.span('render'):
+            jedi_config_dict = \
+                self.jedi_rendering.render_oops_file(f'{jedi_application}{window_type}')
+
+            # Perform complete template rendering
+            # -----------------------------------
+            jedi_dictionary_iterator(jedi_config_dict, self.jedi_rendering, window_type,
+                                     observations, self.cycle_time_dto(), jedi_forecast_model,
+                                     validate_observations=False)
 
         def represent_ordereddict(dumper, data):
             # Serialize an OrderedDict as a YAML mapping
@@ -11,7 +11,7 @@ import os
 from swell.tasks.base.task_base import taskBase
 from r2d2 import store
 from swell.utilities.r2d2 import create_r2d2_config
-from swell.utilities.run_jedi_executables import check_obs
+from swell.utilities.store_ledger import StoreLedger, store_files
 
 # --------------------------------------------------------------------------------------------------
 
@@ -31,6 +31,7 @@ class SaveObsDiags(taskBase):
         observations = self.config.observations()
         window_offset = self.config.window_offset()
         r2d2_local_path = self.config.r2d2_local_path()
+        max_concurrent_stores = self.config.max_concurrent_stores(1)
 
         # Set the observing system records path
         self.jedi_rendering.set_obs_records_path(self.config.observing_system_records_path(None))
@@ -51,14 +52,16 @@ class SaveObsDiags(taskBase):
 
         # Loop over observation operators
         # -------------------------------
-        for observation in observations:
+        observation_dicts = [self.jedi_rendering.render_interface_observations(observation)
+                             for observation in observations]
 
-            # Load the observation dictionary
-            observation_dict = self.jedi_rendering.render_interface_observations(observation)
+        # Check which observations were used, answered from the observation inventory
+        use_observations = self.observations_in_use(observation_dicts)
 
-            # Check if observation was used
-            use_obs = check_obs(self.jedi_rendering.observing_system_records_path, observation,
-                                observation_dict, self.cycle_time_dto())
+        store_arg_list = []
+        for observation_dict, use_obs in zip(observation_dicts, use_observations):
+
+            # Skip observations that were not used
             if not use_obs:
                 continue
 
@@ -76,9 +79,31 @@ class SaveObsDiags(taskBase):
                                       f'{obs_path_file_0000}')
                 obs_path_file = obs_path_file_0000
 
-            store(date=window_begin,
-                  provider='ncdiag',
-                  source_file=obs_path_file,
-                  obs_type=name,
-                  type='ob',
-                  experiment=self.experiment_id())
+            store_arg_list.append({'date': window_begin,
+                                   'provider': 'ncdiag',
+                                   'source_file': obs_path_file,
+                                   'obs_type': name,
+                                   'type': 'ob',
+                                   'experiment': self.experiment_id()})
+
+        # Store the files concurrently, skipping those a previous attempt of the task already
+        # stored. Each file is recorded in the ledger of the cycle as soon as it is stored.
+        # -----------------------------------------------------------------------------------
+        ledger = StoreLedger(self.cycle_dir())
+        with self.metrics.span('store'):
+            skipped, store_results = store_files(store, ledger, store_arg_list,
+                                                 max_concurrent_stores)
+
+        for store_args in skipped:
+            self.logger.info(f'Skipping {os.path.basename(store_args["source_file"])}, ' +
+                             f'already stored')
+
+        store_failures = []
+        for store_args, (_, output, error) in store_results:
+            print(output, end='')
+            if error is not None:
+                store_failures.append(f'{store_args["source_file"]}:\n{error}')
+
+        if store_failures:
+            self.logger.abort(f'Storing failed for {len(store_failures)} file(s):\n\n' +
+                              '\n\n'.join(store_failures), wrap=False)
@@ -13,6 +13,23 @@ import unittest
 
 from swell.utilities.logger import Logger
 from swell.test.code_tests.slurm_test import SLURMConfigTest
+from swell.test.code_tests.observation_cache_test import ObservationCacheTest
+from swell.test.code_tests.netcdf_files_test import NetcdfFilesTest
+from swell.test.code_tests.config_test import ConfigTest
+from swell.test.code_tests.startup_test import StartupTest
+from swell.test.code_tests.task_metrics_test import TaskMetricsTest
+from swell.test.code_tests.ensemble_hofx_config_test import EnsembleHofxConfigTest
+from swell.test.code_tests.jedi_rendering_cache_test import JediRenderingCacheTest
+from swell.test.code_tests.get_channels_test import GetChannelsTest
+from swell.test.code_tests.observing_system_records_test import ObservingSystemRecordsTest
+from swell.test.code_tests.observation_inventory_test import ObservationInventoryTest
+from swell.test.code_tests.plot_scheduler_test import PlotSchedulerTest
+from swell.test.code_tests.store_ledger_test import StoreLedgerTest
+from swell.test.code_tests.cycle_cleanup_test import CycleCleanupTest
+from swell.test.code_tests.jinja2_cache_test import Jinja2CacheTest
+from swell.test.code_tests.materialize_configuration_test import MaterializeConfigurationTest
+from swell.test.code_tests.create_batch_test import CreateBatchTest
+from swell.test.code_tests.worker_pool_test import WorkerPoolTest
 from swell.test.code_tests.test_pinned_versions import PinnedVersionsTest
 from swell.test.code_tests.unused_variables_test import UnusedVariablesTest
 from swell.test.code_tests.question_dictionary_comparison_test import QuestionDictionaryTest
@@ -46,6 +63,57 @@ def code_tests() -> None:
     # Load Observing System Generation tests
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(GenerateObservingSystemTest))
 
+    # Load observation cache tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(ObservationCacheTest))
+
+    # Load netCDF file utilities tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(NetcdfFilesTest))
+
+    # Load configuration snapshot tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(ConfigTest))
+
+    # Load task startup tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(StartupTest))
+
+    # Load task metrics tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(TaskMetricsTest))
+
+    # Load ensemble hofx configuration tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(EnsembleHofxConfigTest))
+
+    # Load JEDI rendering cache tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(JediRenderingCacheTest))
+
+    # Load channel records index tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(GetChannelsTest))
+
+    # Load observing system records tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(ObservingSystemRecordsTest))
+
+    # Load observation inventory tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(ObservationInventoryTest))
+
+    # Load plot scheduler tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(PlotSchedulerTest))
+
+    # Load R2D2 store ledger tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(StoreLedgerTest))
+
+    # Load cycle cleanup tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(CycleCleanupTest))
+
+    # Load Jinja2 template cache tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(Jinja2CacheTest))
+
+    # Load experiment configuration materialization tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(MaterializeConfigurationTest))
+
+    # Load batch experiment creation tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(CreateBatchTest))
+
+    # Load worker pool tests
+    test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(WorkerPoolTest))
+
     # Load Pinned Versions Test
     test_suite.addTests(unittest.TestLoader().loadTestsFromTestCase(PinnedVersionsTest))
 
@@ -0,0 +1,136 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import yaml
+
+from swell.utilities.config import Config, config_snapshot_path, loaded_config_snapshots, \
+    write_config_snapshot
+from swell.utilities.logger import Logger
+from swell.test.code_tests.testing_utilities import suppress_stdout
+
+# --------------------------------------------------------------------------------------------------
+
+
+experiment_dict = {
+    'experiment_id': 'swell-3dvar',
+    'experiment_root': '/discover/nobackup/user/SwellExperiments',
+    'platform': 'nccs_discover_sles15',
+    'start_cycle_point': '2021-12-12T00:00:00Z',
+    'suite_to_run': '3dvar',
+    'models': {
+        'geos_atmosphere': {
+            'observations': ['amsua_n19', 'sondes'],
+            'window_type': '3D',
+        },
+        'geos_ocean': {
+            'observations': ['adt_3a_egm2008'],
+            'window_type': '3D',
+        },
+    },
+}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class ConfigTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.tempdir = tempfile.mkdtemp()
+        self.logger = Logger('ConfigTest')
+        self.experiment_file = os.path.join(self.tempdir, 'experiment.yaml')
+        self.write_experiment(experiment_dict)
+
+    def tearDown(self) -> None:
+
+        loaded_config_snapshots.pop(config_snapshot_path(self.experiment_file), None)
+        shutil.rmtree(self.tempdir)
+
+    def write_experiment(self, experiment: dict) -> None:
+
+        with open(self.experiment_file, 'w') as f:
+            yaml.dump(experiment, f)
+
+    def config(self, task_name: str, model: str, parse_allowed: bool = True) -> Config:
+
+        # Fail if the YAML has to be parsed when the snapshot is expected to be used
+        side_effect = None if parse_allowed else AssertionError('YAML parsed')
+        with suppress_stdout(), mock.patch('swell.utilities.config.yaml.safe_load',
+                                           side_effect=side_effect, wraps=yaml.safe_load):
+            return Config(self.experiment_file, self.logger, task_name, model)
+
+    def test_snapshot_matches_yaml(self) -> None:
+
+        # Config read from the YAML files, no snapshot exists yet
+        from_yaml = {(t, m): self.config(t, m) for t in ['GetObservations', 'EvaIncrement']
+                     for m in ['geos_atmosphere', 'geos_ocean']}
+        self.assertTrue(os.path.exists(config_snapshot_path(self.experiment_file)))
+
+        for (task_name, model), expected in from_yaml.items():
+            config = self.config(task_name, model, parse_allowed=False)
+            self.assertEqual(vars(config).keys(), vars(expected).keys())
+            self.assertEqual(config.__experiment_id__, 'swell-3dvar')
+            self.assertEqual(config.__model_components__, ['geos_atmosphere', 'geos_ocean'])
+
+            # Each task only sees the questions it is listed for in task_questions.yaml
+            if task_name == 'GetObservations':
+                self.assertEqual(config.observations(),
+                                 experiment_dict['models'][model]['observations'])
+                self.assertEqual(config.window_type('missing'), 'missing')
+            else:
+                self.assertEqual(config.observations('missing'), 'missing')
+                self.assertEqual(config.window_type(), '3D')
+
+        # Suite level tasks without a model
+        config = self.config('CloneJedi', None, parse_allowed=False)
+        self.assertEqual(config.window_type('missing'), 'missing')
+
+    def test_edited_experiment_invalidates_snapshot(self) -> None:
+
+        with suppress_stdout():
+            write_config_snapshot(self.logger, self.experiment_file)
+
+        # Touching the file keeps the snapshot valid since the contents are unchanged
+        os.utime(self.experiment_file, (0, 0))
+        self.config('GetObservations', 'geos_atmosphere', parse_allowed=False)
+
+        # Editing the file is picked up and the snapshot is refreshed
+        edited_dict = yaml.safe_load(yaml.dump(experiment_dict))
+        edited_dict['models']['geos_atmosphere']['observations'] = ['sondes']
+        self.write_experiment(edited_dict)
+
+        config = self.config('GetObservations', 'geos_atmosphere')
+        self.assertEqual(config.observations(), ['sondes'])
+        config = self.config('GetObservations', 'geos_atmosphere', parse_allowed=False)
+        self.assertEqual(config.observations(), ['sondes'])
+
+    def test_snapshot_shared_in_process(self) -> None:
+
+        with suppress_stdout():
+            write_config_snapshot(self.logger, self.experiment_file)
+        config = self.config('GetObservations', 'geos_atmosphere', parse_allowed=False)
+
+        # Tasks run in the same process, e.g. by swell task-batch, do not load the snapshot again
+        with mock.patch('swell.utilities.config.pickle.load',
+                        side_effect=AssertionError('Snapshot loaded')):
+            config.observations().append('aircraft')
+            config = self.config('GetObservations', 'geos_atmosphere', parse_allowed=False)
+
+        # Each task gets its own copy of the configuration
+        self.assertEqual(config.observations(), ['amsua_n19', 'sondes'])
+
+
+# --------------------------------------------------------------------------------------------------
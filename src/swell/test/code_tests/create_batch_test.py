@@ -0,0 +1,92 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from swell.deployment.create_experiment import override_matrix
+from swell.utilities.dictionary import load_yaml_file, yaml_file_cache
+from swell.utilities.logger import Logger
+from swell.test.code_tests.testing_utilities import suppress_stdout
+
+# --------------------------------------------------------------------------------------------------
+
+
+class CreateBatchTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.logger = Logger('CreateBatchTest')
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_product(self) -> None:
+
+        matrix = {'base': {'experiment_id': 'sens', 'experiment_root': '/tmp',
+                           'models': {'geos_atmosphere': {'npx_proc': 2, 'npy_proc': 2}}},
+                  'product': {'start_cycle_point': ['2021-12-12T00:00:00Z',
+                                                    '2021-12-12T06:00:00Z'],
+                              'models.geos_atmosphere.npx_proc': [4, 6, 8]}}
+        overrides = override_matrix(self.logger, matrix)
+
+        self.assertEqual([override['experiment_id'] for override in overrides],
+                         [f'sens-{index:03}' for index in range(6)])
+        self.assertEqual(overrides[4]['start_cycle_point'], '2021-12-12T06:00:00Z')
+
+        # Nested keys are merged into the base and the base is not shared between experiments
+        self.assertEqual(overrides[4]['models'], {'geos_atmosphere': {'npx_proc': 6,
+                                                                      'npy_proc': 2}})
+        self.assertEqual(overrides[0]['experiment_root'], '/tmp')
+        self.assertIsNot(overrides[0]['models'], overrides[1]['models'])
+        self.assertEqual(matrix['base']['models']['geos_atmosphere']['npx_proc'], 2)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_experiments(self) -> None:
+
+        matrix = {'base': {'experiment_root': '/tmp'},
+                  'experiments': [{'experiment_id': 'a'}, {'experiment_id': 'b'}]}
+        self.assertEqual(override_matrix(self.logger, matrix),
+                         [{'experiment_root': '/tmp', 'experiment_id': 'a'},
+                          {'experiment_root': '/tmp', 'experiment_id': 'b'}])
+
+        # Experiments must not share a directory
+        for experiments in [[{'experiment_id': 'a'}, {'experiment_id': 'a'}],
+                            [{'experiment_id': 'a'}, {}]]:
+            with suppress_stdout(), self.assertRaises(SystemExit):
+                override_matrix(self.logger, {'experiments': experiments})
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_load_yaml_file(self) -> None:
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'questions.yaml')
+        try:
+            with open(path, 'w') as f:
+                f.write('question:\n  default_value: 1\n')
+
+            # Each caller gets its own copy of the parsed file
+            parsed = load_yaml_file(path)
+            parsed['question']['default_value'] = 2
+            self.assertEqual(load_yaml_file(path), {'question': {'default_value': 1}})
+            self.assertIn(path, yaml_file_cache)
+
+            # A changed file is parsed again
+            with open(path, 'w') as f:
+                f.write('question:\n  default_value: 10\n')
+            self.assertEqual(load_yaml_file(path), {'question': {'default_value': 10}})
+        finally:
+            yaml_file_cache.pop(path, None)
+            shutil.rmtree(directory)
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,116 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+from swell.utilities.cycle_cleanup import check_pattern, clean_directory, resolve_patterns
+
+# --------------------------------------------------------------------------------------------------
+
+
+# Files of the cycle directory and their sizes
+cycle_files = {
+    'aircraft.20211211T210000Z.nc4': 100,
+    'gps.20211211T210000Z.nc4': 50,
+    '.hidden.nc4': 10,
+    'log.txt': 7,
+    'logfile.0000.out': 3,
+    'eva/aircraft/aircraft_eva.yaml': 20,
+    'eva/aircraft/plot.png': 1000,
+    'geovals/aircraft_geoval_0000.nc4': 40,
+    'geovals/aircraft_geoval_0001.nc4': 40,
+    'background_error_model/bump.nc': 30,
+}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class CycleCleanupTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.cycle_dir = tempfile.mkdtemp()
+        self.outside_dir = tempfile.mkdtemp()
+
+        for name, size in cycle_files.items():
+            path = os.path.join(self.cycle_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('x' * size)
+        os.makedirs(os.path.join(self.cycle_dir, 'empty'))
+
+        # Link to a directory outside of the cycle that must never be walked into
+        with open(os.path.join(self.outside_dir, 'keep.nc4'), 'w') as f:
+            f.write('keep')
+        os.symlink(self.outside_dir, os.path.join(self.cycle_dir, 'linked'))
+
+    def tearDown(self) -> None:
+
+        shutil.rmtree(self.cycle_dir)
+        shutil.rmtree(self.outside_dir)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_check_pattern(self) -> None:
+
+        self.assertIsNone(check_pattern('*.nc4'))
+        self.assertIsNone(check_pattern('background_error_model/*.nc'))
+        for pattern in ['/tmp/*.nc4', './*.nc4', '.hidden', '*', 'eva/*']:
+            self.assertIsNotNone(check_pattern(pattern))
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_resolve_patterns(self) -> None:
+
+        # The single walk matches what glob finds for each pattern
+        patterns = ['*.nc4', '*.txt', 'logfile.*.out', 'geovals/*_geoval_*', 'eva/*/*.png',
+                    'background_error_model/*.nc', 'empty', 'link*']
+        matches = resolve_patterns(self.cycle_dir, patterns)
+        for pattern in patterns:
+            expected = sorted([os.path.relpath(path, self.cycle_dir) for path in
+                               glob.glob(os.path.join(self.cycle_dir, pattern))])
+            self.assertEqual(sorted([path for path, _ in matches[pattern]]), expected)
+
+        self.assertEqual(matches['link*'], [('linked', False)])
+        self.assertEqual(matches['empty'], [('empty', True)])
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_clean_directory(self) -> None:
+
+        patterns = ['*.nc4', 'geovals/*.nc4', 'geovals', 'eva', 'empty', 'linked']
+        report = clean_directory(self.cycle_dir, patterns, max_workers=4)
+
+        # Files first, then the directories they emptied, a non-empty directory is kept
+        self.assertEqual(report['*.nc4'], {'removed': 2, 'bytes': 150, 'not_empty': [],
+                                           'errors': []})
+        self.assertEqual(report['geovals/*.nc4']['bytes'], 80)
+        self.assertEqual(report['geovals']['removed'], 1)
+        self.assertEqual(report['eva']['not_empty'], ['eva'])
+        self.assertEqual(report['empty']['removed'], 1)
+        self.assertEqual(report['linked']['removed'], 1)
+
+        self.assertEqual(sorted(os.listdir(self.cycle_dir)),
+                         ['.hidden.nc4', 'background_error_model', 'eva', 'log.txt',
+                          'logfile.0000.out'])
+        self.assertTrue(os.path.exists(os.path.join(self.outside_dir, 'keep.nc4')))
+
+        # Directories are removed with their contents when asked to
+        report = clean_directory(self.cycle_dir, ['eva'], recursive=True, max_workers=4)
+        self.assertEqual(report['eva'], {'removed': 1, 'bytes': 1020, 'not_empty': [],
+                                         'errors': []})
+        self.assertFalse(os.path.exists(os.path.join(self.cycle_dir, 'eva')))
+
+
+# --------------------------------------------------------------------------------------------------
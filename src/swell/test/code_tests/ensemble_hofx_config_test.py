@@ -0,0 +1,72 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import copy
+import unittest
+
+from swell.tasks.run_jedi_hofx_executable import member_config
+
+# --------------------------------------------------------------------------------------------------
+
+
+def observer(name: str, filters: dict) -> dict:
+
+    return {'obs space': {'name': name,
+                          'obsdataout': {'engine': {'type': 'H5File',
+                                                    'obsfile': f'{name}.20211212T000000Z.nc4'}}},
+            **filters}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class EnsembleHofxConfigTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.jedi_config_dict = {
+            'geometry': {'npx': 91},
+            'observations': {'observers': [
+                observer('aircraft', {'obs filters': [{'filter': 'Bounds Check'}]}),
+                observer('sondes', {'obs prior filters': [{'filter': 'Domain Check'}]}),
+                observer('gps', {}),
+            ]}
+        }
+        self.rendered = copy.deepcopy(self.jedi_config_dict)
+
+    def test_member_obsfile(self) -> None:
+
+        member_dict = member_config(self.jedi_config_dict, 7)
+
+        obsfiles = [obs['obs space']['obsdataout']['engine']['obsfile']
+                    for obs in member_dict['observations']['observers']]
+        self.assertEqual(obsfiles, ['aircraft.20211212T000000Z_07.nc4',
+                                    'sondes.20211212T000000Z_07.nc4',
+                                    'gps.20211212T000000Z_07.nc4'])
+
+        # Unchanged parts of the configuration are shared, the rendered configuration is untouched
+        self.assertIs(member_dict['geometry'], self.jedi_config_dict['geometry'])
+        self.assertEqual(self.jedi_config_dict, self.rendered)
+
+    def test_member_gomsaver(self) -> None:
+
+        gomsaver_files = [f'{name}_geovals_07.nc4' for name in ['aircraft', 'sondes', 'gps']]
+        member_dict = member_config(self.jedi_config_dict, 7, gomsaver_files)
+        observers = member_dict['observations']['observers']
+
+        self.assertEqual(observers[0]['obs filters'][-1],
+                         {'filter': 'GOMsaver', 'filename': 'aircraft_geovals_07.nc4'})
+        self.assertEqual(observers[1]['obs prior filters'][-1],
+                         {'filter': 'GOMsaver', 'filename': 'sondes_geovals_07.nc4'})
+        self.assertEqual(observers[2]['obs prior filters'],
+                         [{'filter': 'GOMsaver', 'filename': 'gps_geovals_07.nc4'}])
+        self.assertEqual(self.jedi_config_dict, self.rendered)
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,121 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime as dt, timedelta
+from unittest import mock
+
+import yaml
+
+from swell.utilities import get_channels as gc
+from swell.utilities.logger import Logger
+from swell.test.code_tests.testing_utilities import suppress_stdout
+
+# --------------------------------------------------------------------------------------------------
+
+
+# Records with overlapping, unsorted and empty date ranges, the first matching element applies
+records = {
+    'available': [
+        {'begin date': '2009-04-14T00:00:00', 'end date': '2021-12-12T00:00:00',
+         'channels': ['1-5', '7', '9-10']},
+        {'begin date': '2021-12-12T00:00:00', 'end date': '2999-12-31T18:00:00',
+         'channels': ['1-10']},
+    ],
+    'active': [
+        {'begin date': '2021-12-12T00:00:00', 'end date': '2999-12-31T18:00:00',
+         'channels': ['2', '4-6']},
+        {'begin date': '2009-04-14T00:00:00', 'end date': '2021-12-13T00:00:00',
+         'channels': ['3', '4', '10']},
+        {'begin date': '2015-01-01T00:00:00', 'end date': '2015-01-01T00:00:00',
+         'channels': ['1']},
+        {'begin date': '2011-01-01T00:00:00', 'end date': '2012-01-01T00:00:00',
+         'channels': ['5']},
+    ],
+}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class GetChannelsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.records_path = tempfile.mkdtemp()
+        self.records_file = os.path.join(self.records_path, 'amsua_n19_channel_info.yaml')
+        with open(self.records_file, 'w') as f:
+            yaml.dump(records, f)
+
+        self.logger = Logger('GetChannelsTest')
+        gc.channel_indexes.clear()
+
+    def tearDown(self) -> None:
+
+        gc.channel_indexes.clear()
+        shutil.rmtree(self.records_path)
+
+    def test_find_channel_list(self) -> None:
+
+        # Every boundary, the times either side of them and times outside of all the records
+        times = [dt(2000, 1, 1), dt(3000, 1, 1)]
+        for record_type in ['available', 'active']:
+            for element in records[record_type]:
+                for date in [element['begin date'], element['end date']]:
+                    date = dt.strptime(date, "%Y-%m-%dT%H:%M:%S")
+                    times += [date - timedelta(hours=6), date, date + timedelta(hours=6)]
+
+        for record_type in ['available', 'active']:
+            compiled_list = gc.compile_channel_list(records[record_type])
+            for time in times:
+                index = gc.find_channel_list(compiled_list, time)
+                channels = None if index is None else records[record_type][index]['channels']
+                self.assertEqual(channels, gc.get_channel_list(records[record_type], time))
+
+    def test_get_channels(self) -> None:
+
+        self.assertEqual(gc.get_channels(self.records_path, 'amsua_n19', dt(2010, 1, 1),
+                                         self.logger),
+                         ('1-5, 7, 9-10', [-1, -1, 1, 1, -1, -1, -1, 1]))
+        self.assertEqual(gc.num_active_channels(self.records_path, 'amsua_n19',
+                                                dt(2021, 12, 12, 6)), 4)
+        self.assertEqual(gc.get_channels(self.records_path, 'mhs_n19', dt(2010, 1, 1),
+                                         self.logger), (None, None))
+
+        # Missing records still abort
+        with suppress_stdout(), self.assertRaises(SystemExit):
+            gc.get_channels(self.records_path, 'amsua_n19', dt(2000, 1, 1), self.logger)
+
+    def test_channel_index(self) -> None:
+
+        gc.compile_channel_index(self.records_path)
+        self.assertTrue(os.path.exists(os.path.join(self.records_path, gc.channel_index_file)))
+
+        # Another process loads the index instead of the records
+        gc.channel_indexes.clear()
+        with mock.patch.object(gc, 'compile_observation_records') as compile_records:
+            _, use_flags = gc.get_channels(self.records_path, 'amsua_n19', dt(2021, 12, 12, 6),
+                                           self.logger)
+        compile_records.assert_not_called()
+        self.assertEqual(use_flags, [-1, 1, -1, 1, 1, 1, -1, -1, -1, -1])
+
+        # Records that changed are compiled again
+        changed_records = {'available': records['available'], 'active': records['active'][1:]}
+        with open(self.records_file, 'w') as f:
+            yaml.dump(changed_records, f)
+
+        _, use_flags = gc.get_channels(self.records_path, 'amsua_n19', dt(2021, 12, 12, 6),
+                                       self.logger)
+        self.assertEqual(use_flags, [-1, -1, 1, 1, -1, -1, -1, -1, -1, 1])
+
+
+# --------------------------------------------------------------------------------------------------
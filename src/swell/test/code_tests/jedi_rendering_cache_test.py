@@ -0,0 +1,101 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from swell.utilities.logger import Logger
+from swell.utilities.render_jedi_interface_files import JediConfigRendering, \
+    rendering_cache_counters
+from swell.test.code_tests.testing_utilities import suppress_stdout
+
+# --------------------------------------------------------------------------------------------------
+
+
+template = """geometry:
+  npx: {{horizontal_resolution}}
+window begin: '{{window_begin_iso}}'
+"""
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class JediRenderingCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.experiment_root = tempfile.mkdtemp()
+        oops_path = os.path.join(self.experiment_root, 'swell-hofx', 'configuration', 'jedi',
+                                 'oops')
+        os.makedirs(oops_path)
+        self.template_file = os.path.join(oops_path, 'hofx3D.yaml')
+        with open(self.template_file, 'w') as f:
+            f.write(template)
+
+        self.rendering = JediConfigRendering(Logger('JediRenderingCacheTest'),
+                                             self.experiment_root, 'swell-hofx', None, None)
+        self.rendering.add_key('horizontal_resolution', 91)
+        self.rendering.add_key('window_begin_iso', '2021-12-11T21:00:00Z')
+
+    def tearDown(self) -> None:
+
+        shutil.rmtree(self.experiment_root)
+
+    def counts(self, before: dict) -> dict:
+
+        return {key: value - before[key] for key, value in rendering_cache_counters().items()}
+
+    def test_render_cache(self) -> None:
+
+        before = rendering_cache_counters()
+
+        first = self.rendering.render_oops_file('hofx3D')
+        first['geometry']['npx'] = 181
+        second = self.rendering.render_oops_file('hofx3D')
+
+        # The dictionary modified by the caller is not the one in the cache
+        self.assertEqual(second, {'geometry': {'npx': 91}, 'window begin': '2021-12-11T21:00:00Z'})
+        self.assertEqual(self.counts(before), {'template_hits': 1, 'template_misses': 1,
+                                               'render_hits': 1, 'render_misses': 1,
+                                               'render_uncacheable': 0})
+
+        # Keys that the template does not use do not change the rendered configuration
+        self.rendering.add_key('vertical_resolution', 72)
+        self.rendering.render_oops_file('hofx3D')
+        self.assertEqual(self.counts(before)['render_hits'], 2)
+
+        # Keys that the template uses do
+        self.rendering.add_key('horizontal_resolution', 181)
+        self.assertEqual(self.rendering.render_oops_file('hofx3D')['geometry']['npx'], 181)
+        self.assertEqual(self.counts(before)['render_misses'], 2)
+
+    def test_template_changed(self) -> None:
+
+        self.assertEqual(self.rendering.render_oops_file('hofx3D')['geometry']['npx'], 91)
+
+        with open(self.template_file, 'w') as f:
+            f.write(template.replace('npx', 'npx_proc'))
+
+        self.assertEqual(self.rendering.render_oops_file('hofx3D')['geometry'], {'npx_proc': 91})
+
+    def test_undefined_template(self) -> None:
+
+        # Templates that cannot be resolved still abort, whatever was rendered before
+        self.rendering.add_key('window_begin_iso', None)
+        self.rendering.render_oops_file('hofx3D')
+        del self.rendering.__template_dict__['window_begin_iso']
+
+        with suppress_stdout(), self.assertRaises(SystemExit):
+            self.rendering.render_oops_file('hofx3D')
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,90 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import jinja2 as j2
+
+from swell.utilities import jinja2 as swell_jinja2
+from swell.utilities.logger import Logger
+from swell.test.code_tests.testing_utilities import suppress_stdout
+
+# --------------------------------------------------------------------------------------------------
+
+
+template = """cycle_dir: {{cycle_dir}}
+members:
+{% for member in members %}  - mem{{ '%03d' % member }}
+{% endfor %}"""
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class Jinja2CacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.logger = Logger('Jinja2CacheTest')
+        swell_jinja2.jinja2_environment.cache_clear()
+
+    def tearDown(self) -> None:
+
+        swell_jinja2.jinja2_environment.cache_clear()
+        shutil.rmtree(self.cache_dir)
+
+    def render(self, templated_string: str, allow_unresolved: bool = False) -> str:
+
+        return swell_jinja2.template_string_jinja2(self.logger, templated_string,
+                                                   {'cycle_dir': '/run', 'members': [1, 2]},
+                                                   allow_unresolved)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_compiled_templates(self) -> None:
+
+        with mock.patch.dict(os.environ, {swell_jinja2.bytecode_cache_variable: ''}):
+
+            self.assertEqual(self.render(template), 'cycle_dir: /run\nmembers:\n  - mem001\n' +
+                             '  - mem002\n')
+
+            # The same text is compiled once per undefined policy
+            strict = swell_jinja2.cached_template_jinja2(template)
+            self.assertIs(swell_jinja2.cached_template_jinja2(template), strict)
+            self.assertIsNot(swell_jinja2.cached_template_jinja2(template, True), strict)
+            self.assertEqual(swell_jinja2.shared_environment_jinja2().loader.sources, {})
+
+            # Unresolved templates are only allowed when asked for
+            self.assertEqual(self.render('{{cycle_dir}} {{missing}}', True),
+                             '/run {{ missing }}')
+            with suppress_stdout(), self.assertRaises(SystemExit):
+                self.render('{{cycle_dir}} {% raw %}{{missing}}{% endraw %}')
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_bytecode_cache(self) -> None:
+
+        with mock.patch.dict(os.environ, {swell_jinja2.bytecode_cache_variable: self.cache_dir}):
+
+            expected = self.render(template)
+            self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+            # Another process, with new environments, loads the template from the bytecode cache
+            swell_jinja2.jinja2_environment.cache_clear()
+            with mock.patch.object(j2.Environment, 'compile') as compile:
+                self.assertEqual(self.render(template), expected)
+            compile.assert_not_called()
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,119 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from swell.deployment.create_experiment import configuration_snapshot, list_configuration_files, \
+    materialize_files, referenced_configuration_files
+from swell.swell_path import get_swell_path
+from swell.utilities.logger import Logger
+from swell.test.code_tests.testing_utilities import suppress_stdout
+
+# --------------------------------------------------------------------------------------------------
+
+
+class MaterializeConfigurationTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.experiment_root = tempfile.mkdtemp()
+        self.configuration_path = os.path.join(get_swell_path(), 'configuration')
+        self.logger = Logger('MaterializeConfigurationTest')
+
+    def tearDown(self) -> None:
+
+        # The snapshot files are read-only
+        for directory, _, files in os.walk(self.experiment_root):
+            os.chmod(directory, 0o755)
+        shutil.rmtree(self.experiment_root)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_referenced_configuration_files(self) -> None:
+
+        relative_paths = list_configuration_files(self.configuration_path)
+        self.assertFalse(any(['__' in path or '.py' in path for path in relative_paths]))
+
+        experiment_dict = {'model_components': ['geos_atmosphere'],
+                           'models': {'geos_atmosphere': {'observations': ['aircraft', 'gps']}}}
+        referenced_paths = referenced_configuration_files(relative_paths, experiment_dict,
+                                                          self.configuration_path)
+
+        # Files of observations that are not used are left out
+        observations_path = os.path.join('jedi', 'interfaces', 'geos_atmosphere', 'observations')
+        observation_paths = [path for path in referenced_paths
+                             if path.startswith(observations_path)]
+        for name in ['aircraft.yaml', 'gps.yaml', 'ufo_tests.yaml',
+                     os.path.join('localization', 'aircraft.yaml'),
+                     os.path.join('localization', 'gps.yaml')]:
+            self.assertIn(os.path.join(observations_path, name), observation_paths)
+        self.assertNotIn(os.path.join(observations_path, 'sondes.yaml'), observation_paths)
+        self.assertNotIn(os.path.join(observations_path, 'localization', 'sondes.yaml'),
+                         observation_paths)
+        self.assertFalse(any(['geos_ocean' in path for path in referenced_paths]))
+
+        # Everything that is not specific to other models or observations is kept
+        for relative_path in [os.path.join('jedi', 'oops', 'hofx3D.yaml'),
+                              os.path.join('jedi', 'interfaces', 'geos_atmosphere',
+                                           'geos_atmosphere.yaml'),
+                              os.path.join('jedi', 'interfaces', 'geos_atmosphere', 'model',
+                                           'geometry.yaml')]:
+            self.assertIn(relative_path, referenced_paths)
+
+        # So are the files referenced by the kept files, e.g. the alias file of the observations
+        for model, observation in [('geos_atmosphere', 'aircraft'), ('geos_marine', 'adt'),
+                                   ('geos_marine', 'sst_ostia'), ('geos_marine', 'insitut')]:
+            experiment_dict = {'model_components': [model],
+                               'models': {model: {'observations': [observation]}}}
+            referenced_paths = referenced_configuration_files(relative_paths, experiment_dict,
+                                                              self.configuration_path)
+            self.assertIn(os.path.join('jedi', 'interfaces', model, 'observations',
+                                       'obsop_name_map.yaml'), referenced_paths)
+
+            # Every file of the experiment configuration referenced by a kept file is kept
+            for relative_path in referenced_paths:
+                with open(os.path.join(self.configuration_path, relative_path), 'r') as f:
+                    contents = f.read().replace('{{model_component}}', model)
+                for reference in re.findall(r'{{experiment_id}}/configuration/([^\'"\s]+)',
+                                            contents):
+                    self.assertIn(reference, referenced_paths)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_materialize_files(self) -> None:
+
+        with suppress_stdout():
+            snapshot_path = configuration_snapshot(self.logger, self.experiment_root)
+        self.assertEqual(configuration_snapshot(self.logger, self.experiment_root), snapshot_path)
+
+        src = os.path.join(snapshot_path, 'configuration')
+        relative_paths = [os.path.join('jedi', 'oops', 'hofx3D.yaml'),
+                          os.path.join('jedi', 'observation_ioda_names.yaml')]
+        for materialize in ['copy', 'hardlink', 'symlink']:
+            dst = os.path.join(self.experiment_root, materialize, 'configuration')
+            materialize_files(src, dst, relative_paths, materialize)
+            self.assertEqual(list_configuration_files(dst), sorted(relative_paths))
+
+            dst_file = os.path.join(dst, relative_paths[0])
+            with open(dst_file, 'r') as f, \
+                 open(os.path.join(self.configuration_path, relative_paths[0]), 'r') as g:
+                self.assertEqual(f.read(), g.read())
+            self.assertEqual(os.path.islink(dst_file), materialize == 'symlink')
+            self.assertEqual(os.lstat(dst_file).st_nlink > 1, materialize == 'hardlink')
+
+        # A second materialization replaces the first one
+        materialize_files(src, dst, relative_paths[1:], 'copy')
+        self.assertEqual(list_configuration_files(dst), relative_paths[1:])
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,240 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import netCDF4 as nc
+import numpy as np
+
+from swell.utilities.logger import Logger
+from swell.utilities.netcdf_files import combine_files_without_groups, concatenate_files
+from swell.utilities.netcdf_files import subset_locations
+from swell.utilities.netcdf_files import subset_locations_in_files
+from swell.test.code_tests.testing_utilities import suppress_stdout
+
+# --------------------------------------------------------------------------------------------------
+
+
+def create_ioda_file(path: str, nlocs: int, nchans: int = 3, offset: int = 0,
+                     extra_variable: bool = False) -> None:
+
+    # Small IODA v3 like file with groups, a Channel dimension and string variables
+    with nc.Dataset(path, 'w') as ds:
+        ds.createDimension('Location', nlocs)
+        ds.createDimension('Channel', nchans)
+        ds.setncattr('platformCommonName', 'test')
+        ds.createVariable('Location', 'i4', ('Location',))[:] = np.arange(nlocs)
+        ds.createVariable('Channel', 'i4', ('Channel',))[:] = np.arange(nchans) + 1
+
+        meta = ds.createGroup('MetaData')
+        lat = meta.createVariable('latitude', 'f4', ('Location',), fill_value=-3.3687953e+38)
+        lat[:] = np.arange(nlocs) + offset
+        lat.setncattr('units', 'degrees_north')
+        sid = meta.createVariable('stationIdentification', str, ('Location',))
+        sid[:] = np.array([f'st{i + offset}' for i in range(nlocs)], dtype=object)
+
+        obs = ds.createGroup('ObsValue')
+        bt = obs.createVariable('brightnessTemperature', 'f4', ('Location', 'Channel'),
+                                fill_value=-3.3687953e+38, zlib=True)
+        bt[:] = np.arange(nlocs*nchans).reshape(nlocs, nchans) + offset*nchans
+
+        if extra_variable:
+            ps = obs.createVariable('stationPressure', 'f4', ('Location',), fill_value=-999.0)
+            ps[:] = 1000.0 + np.arange(nlocs)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def create_geovals_file(path: str, nlocs: int, nlevs: int = 4, offset: int = 0,
+                        extra_variable: bool = False) -> None:
+
+    # Small GeoVaLs like file without groups using the nlocs dimension
+    with nc.Dataset(path, 'w') as ds:
+        ds.createDimension('nlocs', nlocs)
+        ds.createDimension('air_temperature_nval', nlevs)
+        ds.setncattr('date_time', 2021121200 + offset)
+        t = ds.createVariable('air_temperature', 'f4', ('nlocs', 'air_temperature_nval'))
+        t[:] = np.arange(nlocs*nlevs).reshape(nlocs, nlevs)
+        t.setncattr('units', 'K')
+
+        if extra_variable:
+            # Without nlocs, and only in some of the files
+            levels = ds.createVariable('air_pressure_levels', 'f4', ('air_temperature_nval',))
+            levels[:] = np.arange(nlevs)*100.0 + offset
+            ps = ds.createVariable('surface_pressure', 'f4', ('nlocs',), fill_value=-999.0)
+            ps[:] = 1000.0 + np.arange(nlocs)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class NetcdfFilesTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.tempdir = tempfile.mkdtemp()
+        self.logger = Logger('NetcdfFilesTest')
+
+    def tearDown(self) -> None:
+
+        shutil.rmtree(self.tempdir)
+
+    def test_subset_locations(self) -> None:
+
+        ioda_file = os.path.join(self.tempdir, 'amsua_n19.nc4')
+        subset_file = os.path.join(self.tempdir, 'amsua_n19_subset.nc4')
+        create_ioda_file(ioda_file, 10)
+
+        with suppress_stdout():
+            subset_locations(self.logger, ioda_file, 2, 5, output_file=subset_file)
+
+        with nc.Dataset(subset_file) as ds:
+            self.assertEqual(ds.dimensions['Location'].size, 3)
+            self.assertEqual(ds.dimensions['Channel'].size, 3)
+            self.assertEqual(ds.getncattr('platformCommonName'), 'test')
+            np.testing.assert_array_equal(ds['Location'][:], [2, 3, 4])
+            np.testing.assert_array_equal(ds['Channel'][:], [1, 2, 3])
+            np.testing.assert_array_equal(ds['MetaData/latitude'][:], [2, 3, 4])
+            self.assertEqual(ds['MetaData/latitude'].getncattr('units'), 'degrees_north')
+            self.assertEqual(list(ds['MetaData/stationIdentification'][:]), ['st2', 'st3', 'st4'])
+            np.testing.assert_array_equal(ds['ObsValue/brightnessTemperature'][:],
+                                          np.arange(6, 15).reshape(3, 3))
+            self.assertTrue(ds['ObsValue/brightnessTemperature'].filters()['zlib'])
+
+    def test_single_observation_files_in_place(self) -> None:
+
+        ioda_file = os.path.join(self.tempdir, 'sondes_obs_2021121200.nc4')
+        geovals_file = os.path.join(self.tempdir, 'sondes_geoval_2021121200.nc4')
+        create_ioda_file(ioda_file, 10)
+        create_geovals_file(geovals_file, 10)
+
+        with suppress_stdout():
+            subset_locations_in_files(self.logger, [ioda_file, geovals_file], 0, 1)
+
+        with nc.Dataset(ioda_file) as ds:
+            self.assertEqual(ds.dimensions['Location'].size, 1)
+            np.testing.assert_array_equal(ds['ObsValue/brightnessTemperature'][:], [[0, 1, 2]])
+        with nc.Dataset(geovals_file) as ds:
+            self.assertEqual(ds.dimensions['nlocs'].size, 1)
+            np.testing.assert_array_equal(ds['air_temperature'][:], [[0, 1, 2, 3]])
+        self.assertEqual(sorted(os.listdir(self.tempdir)),
+                         ['sondes_geoval_2021121200.nc4', 'sondes_obs_2021121200.nc4'])
+
+    def test_concatenate_groups(self) -> None:
+
+        # Three sub-window files, the second one is empty and only the last one has the
+        # ObsValue/stationPressure variable
+        input_files = [os.path.join(self.tempdir, f'sfc.{i}.nc4') for i in range(3)]
+        create_ioda_file(input_files[0], 4)
+        create_ioda_file(input_files[1], 0, offset=4)
+        create_ioda_file(input_files[2], 3, offset=4, extra_variable=True)
+
+        # A tiny chunk size forces several slabs per input
+        output_file = os.path.join(self.tempdir, 'sfc.nc4')
+        with suppress_stdout():
+            concatenate_files(self.logger, input_files, output_file, 'Location',
+                              max_chunk_bytes=8)
+
+        with nc.Dataset(output_file) as ds:
+            self.assertEqual(ds.dimensions['Location'].size, 7)
+            self.assertEqual(ds.dimensions['Channel'].size, 3)
+            np.testing.assert_array_equal(ds['Channel'][:], [1, 2, 3])
+            np.testing.assert_array_equal(ds['MetaData/latitude'][:], np.arange(7))
+            self.assertEqual(list(ds['MetaData/stationIdentification'][:]),
+                             [f'st{i}' for i in range(7)])
+            np.testing.assert_array_equal(ds['ObsValue/brightnessTemperature'][:],
+                                          np.arange(21).reshape(7, 3))
+            pressure = ds['ObsValue/stationPressure'][:]
+            self.assertTrue(pressure.mask[:4].all())
+            np.testing.assert_array_equal(pressure[4:], [1000.0, 1001.0, 1002.0])
+
+    def test_concatenate_without_groups(self) -> None:
+
+        # GeoVaLs along nlocs give the same result as the xarray based combine it replaces
+        import xarray as xr
+
+        input_files = [os.path.join(self.tempdir, f'amsua_geovals_{i:04}.nc4') for i in range(3)]
+        for i, input_file in enumerate(input_files):
+            create_geovals_file(input_file, 5 + i)
+
+        output_file = os.path.join(self.tempdir, 'amsua_geovals.nc4')
+        with suppress_stdout():
+            concatenate_files(self.logger, input_files, output_file, 'nlocs', zlib=True,
+                              complevel=1, chunk_sizes={'nlocs': 4})
+
+        expected = xr.concat([xr.open_dataset(f) for f in input_files], dim='nlocs')
+        with nc.Dataset(output_file) as ds:
+            np.testing.assert_array_equal(ds['air_temperature'][:],
+                                          expected['air_temperature'].values)
+            self.assertTrue(ds['air_temperature'].filters()['zlib'])
+            self.assertEqual(ds['air_temperature'].chunking(), [4, 4])
+
+    def test_concatenate_groups_matches_in_memory_combine(self) -> None:
+
+        # The streaming combine gives the same file as reading every variable of every input and
+        # concatenating in memory, as GetObservations used to do
+        input_files = [os.path.join(self.tempdir, f'amsua.{i}.nc4') for i in range(3)]
+        for i, input_file in enumerate(input_files):
+            create_ioda_file(input_file, 2 + i, offset=10*i)
+
+        output_file = os.path.join(self.tempdir, 'amsua.nc4')
+        with suppress_stdout():
+            concatenate_files(self.logger, input_files, output_file, 'Location',
+                              max_chunk_bytes=16)
+
+        with nc.Dataset(output_file) as ds:
+            self.assertEqual(ds.ncattrs(), ['platformCommonName'])
+            for group_name in ['MetaData', 'ObsValue']:
+                for var_name, out_var in ds[group_name].variables.items():
+                    expected = []
+                    for input_file in input_files:
+                        with nc.Dataset(input_file) as in_ds:
+                            in_var = in_ds[group_name][var_name]
+                            expected.append(in_var[:])
+                            attributes = {n: in_var.getncattr(n) for n in in_var.ncattrs()}
+                            dimensions = in_var.dimensions
+                    self.assertEqual({n: out_var.getncattr(n) for n in out_var.ncattrs()},
+                                     attributes)
+                    self.assertEqual(out_var.dimensions, dimensions)
+                    np.testing.assert_array_equal(out_var[:], np.ma.concatenate(expected))
+
+    def test_combine_without_groups_matches_xarray(self) -> None:
+
+        # Same variables, dimensions, values and attributes as the xarray based combine it
+        # replaces, including variables without nlocs and variables missing from an input
+        import xarray as xr
+
+        input_files = [os.path.join(self.tempdir, f'amsua_geovals_{i:04}.nc4') for i in range(3)]
+        for i, input_file in enumerate(input_files):
+            create_geovals_file(input_file, 3 + i, offset=i, extra_variable=i != 1)
+
+        output_file = os.path.join(self.tempdir, 'amsua_geovals.nc4')
+        with suppress_stdout():
+            combine_files_without_groups(self.logger, input_files, output_file, 'nlocs')
+
+        inputs = [xr.open_dataset(f) for f in input_files]
+        expected = xr.concat(inputs, dim='nlocs', data_vars='all', coords='different',
+                             compat='equals', join='outer', combine_attrs='override')
+        with xr.open_dataset(output_file) as combined:
+            self.assertEqual(sorted(combined.data_vars), sorted(expected.data_vars))
+            self.assertEqual(combined.attrs, expected.attrs)
+            for var_name in expected.data_vars:
+                self.assertEqual(combined[var_name].dims, expected[var_name].dims)
+                self.assertEqual(combined[var_name].attrs, expected[var_name].attrs)
+                np.testing.assert_array_equal(combined[var_name].values,
+                                              expected[var_name].values)
+        for dataset in inputs:
+            dataset.close()
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,187 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from swell.utilities.logger import Logger
+from swell.utilities.file_signature import file_checksum
+from swell.utilities.observation_cache import ObservationCache
+from swell.test.code_tests.testing_utilities import suppress_stdout
+
+# --------------------------------------------------------------------------------------------------
+
+
+class LocalR2D2:
+
+    """ Local directory stand-in for R2D2 fetch that counts the fetches """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.fetches = 0
+
+    def fetch(self, target_file: str, obs_type: str, date: str, ignore_missing: bool = False,
+              **kwargs) -> None:
+        self.fetches += 1
+        source = os.path.join(self.path, f'{obs_type}.{date}.nc4')
+        if os.path.exists(source):
+            shutil.copy(source, target_file)
+        elif not ignore_missing:
+            raise FileNotFoundError(source)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class ObservationCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.tempdir = tempfile.mkdtemp()
+        self.r2d2 = LocalR2D2(os.path.join(self.tempdir, 'r2d2'))
+        os.makedirs(self.r2d2.path)
+        for obs_type, size in [('amsua_n19', 1000), ('iasi_metop-b', 3000)]:
+            with open(os.path.join(self.r2d2.path, f'{obs_type}.20211212T000000Z.nc4'), 'wb') as f:
+                f.write(os.urandom(size))
+
+        self.cache = ObservationCache(Logger('ObservationCacheTest'),
+                                      os.path.join(self.tempdir, 'cache'), 5000, self.r2d2.fetch)
+
+    def tearDown(self) -> None:
+
+        shutil.rmtree(self.tempdir)
+
+    def fetch(self, obs_type: str, experiment: str, **kwargs) -> str:
+
+        target_dir = os.path.join(self.tempdir, experiment)
+        os.makedirs(target_dir, exist_ok=True)
+        target_file = os.path.join(target_dir, f'{obs_type}.nc4')
+        with suppress_stdout():
+            self.cache.fetch(date='20211212T000000Z', target_file=target_file,
+                             provider='odas', obs_type=obs_type, time_window='PT6H',
+                             type='ob', experiment='x0048', **kwargs)
+        return target_file
+
+    def read(self, path: str) -> bytes:
+
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_hit_after_miss(self) -> None:
+
+        # Two experiments request the same file, only the first one goes to R2D2
+        first = self.fetch('amsua_n19', 'exp1')
+        second = self.fetch('amsua_n19', 'exp2')
+        self.assertEqual(self.r2d2.fetches, 1)
+
+        source = os.path.join(self.r2d2.path, 'amsua_n19.20211212T000000Z.nc4')
+        self.assertEqual(self.read(first), self.read(source))
+        self.assertEqual(self.read(second), self.read(source))
+        self.assertEqual(os.stat(first).st_ino, os.stat(second).st_ino)
+
+    def test_cached_files_are_read_only(self) -> None:
+
+        first = self.fetch('amsua_n19', 'exp1')
+        self.assertEqual(os.stat(first).st_mode & 0o777, 0o444)
+
+        # Hits trust the size and modification time recorded when the file was cached
+        with mock.patch('swell.utilities.observation_cache.file_checksum',
+                        side_effect=AssertionError('File hashed')):
+            second = self.fetch('amsua_n19', 'exp2')
+        self.assertEqual(os.stat(first).st_ino, os.stat(second).st_ino)
+
+        # Unless every hit is verified
+        self.cache.verify_checksums = True
+        with mock.patch('swell.utilities.observation_cache.file_checksum',
+                        wraps=file_checksum) as checksum:
+            self.fetch('amsua_n19', 'exp3')
+        self.assertEqual(checksum.call_count, 1)
+
+    def test_corrupted_entry_is_fetched_again(self) -> None:
+
+        # A cached file modified in place despite being read-only is detected by its new
+        # modification time and checksum
+        first = self.fetch('amsua_n19', 'exp1')
+        os.chmod(first, 0o644)
+        with open(first, 'r+b') as f:
+            f.write(b'corrupted')
+        os.utime(first, ns=(0, 0))
+
+        second = self.fetch('amsua_n19', 'exp2')
+        self.assertEqual(self.r2d2.fetches, 2)
+        source = os.path.join(self.r2d2.path, 'amsua_n19.20211212T000000Z.nc4')
+        self.assertEqual(self.read(second), self.read(source))
+
+    def test_missing_files_are_not_cached(self) -> None:
+
+        target_file = self.fetch('atms_n20', 'exp1', ignore_missing=True)
+        self.assertFalse(os.path.exists(target_file))
+        self.fetch('atms_n20', 'exp1', ignore_missing=True)
+        self.assertEqual(self.r2d2.fetches, 2)
+
+    def test_combined_product(self) -> None:
+
+        inputs = [self.fetch('amsua_n19', 'exp1'), self.fetch('iasi_metop-b', 'exp1')]
+        product = os.path.join(self.tempdir, 'exp1', 'combined.nc4')
+        with open(product, 'wb') as f:
+            f.write(b'combined')
+
+        # Inputs linked from the cache are not hashed again to make the key
+        with mock.patch('swell.utilities.observation_cache.file_checksum',
+                        side_effect=AssertionError('File hashed')):
+            key = self.cache.product_key('combine', inputs, window_begin='20211211T210000Z')
+        self.assertFalse(self.cache.lookup(key, product))
+        self.cache.store_product(key, product)
+
+        # Same inputs and window in another experiment reuse the product
+        rerun_inputs = [self.fetch('amsua_n19', 'exp2'), self.fetch('iasi_metop-b', 'exp2')]
+        rerun_key = self.cache.product_key('combine', rerun_inputs,
+                                           window_begin='20211211T210000Z')
+        rerun_product = os.path.join(self.tempdir, 'exp2', 'combined.nc4')
+        self.assertTrue(self.cache.lookup(rerun_key, rerun_product))
+        self.assertEqual(self.read(rerun_product), b'combined')
+
+        # A copy of the inputs, e.g. on another file system, gives the same key
+        copied_inputs = [os.path.join(self.tempdir, f'copy_{i}.nc4') for i in range(2)]
+        for rerun_input, copied_input in zip(rerun_inputs, copied_inputs):
+            shutil.copy(rerun_input, copied_input)
+        self.assertEqual(self.cache.product_key('combine', copied_inputs,
+                                                window_begin='20211211T210000Z'), rerun_key)
+
+        # Order of the inputs and window bounds are part of the key
+        for other_key in [self.cache.product_key('combine', rerun_inputs[::-1],
+                                                 window_begin='20211211T210000Z'),
+                          self.cache.product_key('combine', rerun_inputs,
+                                                 window_begin='20211212T030000Z')]:
+            self.assertFalse(self.cache.lookup(other_key, rerun_product))
+
+    def test_least_recently_used_eviction(self) -> None:
+
+        # 1000 + 3000 bytes fit in the cache, the third file evicts the least recently used one
+        self.fetch('amsua_n19', 'exp1')
+        self.fetch('iasi_metop-b', 'exp1')
+        self.fetch('amsua_n19', 'exp2')
+        self.fetch('iasi_metop-b', 'exp2', provider_version='v2')
+        self.assertEqual(self.r2d2.fetches, 3)
+
+        # Identical contents are stored once so nothing had to be evicted
+        self.fetch('iasi_metop-b', 'exp3')
+        self.assertEqual(self.r2d2.fetches, 3)
+
+        # Shrink the cache, the next insertion evicts the least recently used amsua_n19
+        self.cache.max_size_bytes = 3500
+        self.fetch('iasi_metop-b', 'exp4', provider_version='v3')
+        self.fetch('amsua_n19', 'exp4')
+        self.assertEqual(self.r2d2.fetches, 5)
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,160 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import netCDF4 as nc
+
+from swell.utilities import observation_inventory as oi
+
+# --------------------------------------------------------------------------------------------------
+
+
+def obs_dict(path: str) -> dict:
+
+    return {'obs space': {'obsdatain': {'engine': {'obsfile': path}}}}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class ObservationInventoryTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.cycle_dir = tempfile.mkdtemp()
+        oi.inventories.clear()
+
+        self.paths = {}
+        for name, locations in [('aircraft', 12), ('gps', 0), ('sondes', None)]:
+            self.paths[name] = os.path.join(self.cycle_dir, f'{name}.nc4')
+            self.write(name, locations)
+
+    def tearDown(self) -> None:
+
+        oi.inventories.clear()
+        shutil.rmtree(self.cycle_dir)
+
+    def write(self, name: str, locations: int) -> None:
+
+        with nc.Dataset(self.paths[name], 'w') as ds:
+            if locations is not None:
+                ds.createDimension('Location', locations)
+            ds.createDimension('Channel', 3)
+            ds.createVariable('Channel', 'i4', ('Channel',))[:] = [4, 5, 7]
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_observations_in_use(self) -> None:
+
+        missing = os.path.join(self.cycle_dir, 'amsua_n19.nc4')
+        paths = [self.paths['aircraft'], self.paths['gps'], self.paths['sondes'], missing]
+
+        self.assertEqual(oi.location_counts(paths), [12, 0, 0, None])
+        self.assertEqual(oi.observations_in_use([obs_dict(path) for path in paths]),
+                         [True, False, False, False])
+
+        # The manifest records the files that exist
+        with open(os.path.join(self.cycle_dir, oi.inventory_file), 'r') as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest['version'], oi.inventory_version)
+        self.assertEqual(sorted(manifest['files']), ['aircraft.nc4', 'gps.nc4', 'sondes.nc4'])
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_manifest_reused(self) -> None:
+
+        paths = list(self.paths.values())
+        counts = oi.location_counts(paths)
+
+        # A new process answers from the manifest without opening the files
+        oi.inventories.clear()
+        with mock.patch.object(oi, 'read_header') as read_header:
+            self.assertEqual(oi.location_counts(paths), counts)
+        read_header.assert_not_called()
+
+        # A rewritten file is read again
+        oi.inventories.clear()
+        self.write('gps', 40)
+        stat = os.stat(self.paths['gps'])
+        os.utime(self.paths['gps'], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        with mock.patch.object(oi, 'read_header', wraps=oi.read_header) as read_header:
+            self.assertEqual(oi.location_counts(paths), [12, 40, 0])
+        read_header.assert_called_once_with(self.paths['gps'])
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_concurrent_saves(self) -> None:
+
+        # Tasks of the same cycle saving at the same time keep the entries of each other
+        names = [f'sondes_{i}' for i in range(8)]
+        for name in names:
+            self.paths[name] = os.path.join(self.cycle_dir, f'{name}.nc4')
+            self.write(name, 5)
+
+        def save(name: str) -> None:
+            inventory = oi.ObservationInventory(self.cycle_dir)
+            for _ in range(5):
+                inventory.record(self.paths[name])
+                inventory.save()
+
+        threads = [threading.Thread(target=save, args=(name,)) for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(os.path.join(self.cycle_dir, oi.inventory_file), 'r') as f:
+            manifest = json.load(f)
+        self.assertEqual(sorted(manifest['files']), sorted(f'{name}.nc4' for name in names))
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_record(self) -> None:
+
+        sources = [{'date': '2021-12-11T21:00:00Z', 'provider': 'odas', 'obs_type': 'aircraft',
+                    'time_window': 'PT6H', 'experiment': 'oper'}]
+        oi.record_files([(self.paths['aircraft'], sources), (self.paths['gps'], [])])
+
+        # A later task queries the manifest, trusting it does not access the files
+        oi.inventories.clear()
+        inventory = oi.observation_inventory(self.cycle_dir)
+        self.assertEqual(inventory.observation_files(), [self.paths['aircraft'],
+                                                         self.paths['gps']])
+        with mock.patch.object(oi.os, 'stat') as stat:
+            self.assertEqual(inventory.locations(self.paths['aircraft'], validate=False), 12)
+            self.assertEqual(inventory.channels(self.paths['aircraft'], validate=False),
+                             [4, 5, 7])
+            self.assertEqual(inventory.sources(self.paths['aircraft'], validate=False), sources)
+        stat.assert_not_called()
+
+        # Only the recorded files are trusted, a file found by an earlier query is checked again
+        paths = [self.paths['aircraft'], self.paths['gps'], self.paths['sondes']]
+        with mock.patch.object(oi.os, 'stat', wraps=os.stat) as stat:
+            self.assertEqual(oi.observations_in_use([obs_dict(path) for path in paths],
+                                                    validate=False), [True, False, False])
+        stat.assert_called_once_with(self.paths['sondes'])
+        self.assertEqual(inventory.checksum(self.paths['gps']),
+                         oi.file_checksum(self.paths['gps']))
+
+        # Sources of a file that was rewritten after it was recorded are dropped
+        self.write('aircraft', 5)
+        stat = os.stat(self.paths['aircraft'])
+        os.utime(self.paths['aircraft'], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertEqual(inventory.locations(self.paths['aircraft']), 5)
+        self.assertIsNone(inventory.sources(self.paths['aircraft']))
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,151 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import filecmp
+import os
+import shutil
+import tempfile
+import unittest
+
+import yaml
+
+from swell.utilities.observing_system_records import ObservingSystemRecords, read_sat_db
+
+# --------------------------------------------------------------------------------------------------
+
+
+active_channels = """# sat      start           end           instr  nch  channels
+ n19  20090414 000000 20091215 060000 amsua 3 4 5 6 # M2: redundant entry intentional
+ n19  20091215 120000 29991231 240000 amsua 2 4 5
+ n19  20091215 120000 29991231 240000 amsua 2 9 10 #
+ n18  20050101 000000 20100101 000000 mhs   3 1 2 3
+ n18  20050101 000000 20070101 000000 mhs   2 4 5
+ n18  20070101 060000 20100101 000000 mhs   1 4 # channel 5 off
+ n18  20050101 000000 20100101 000000 atms  2 1 2
+ n18  20050101 000000 20070101 000000 atms  1 3
+ n18  20070101 060000 20100101 000000 atms  2 3 4
+"""
+
+available_channels = """# sat      start           end           instr  nch  channels
+ n19  20090414 000000 29991231 180000 amsua 10 1 2 3 4 5 6 7 8 9 10
+ n18  20050101 000000 29991231 180000 mhs   5 1 2 3 4 5
+ n18  20050101 000000 29991231 180000 atms  4 1 2 3 4
+"""
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def record(begin: str, end: str, channels: list, comments: str = None) -> dict:
+
+    record_dict = {'begin date': begin, 'end date': end, 'channels': [str(x) for x in channels]}
+    if comments is not None:
+        record_dict['comments'] = comments
+    return record_dict
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class ObservingSystemRecordsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.tempdir = tempfile.mkdtemp()
+        self.sidb = os.path.join(self.tempdir, 'sidb')
+        os.makedirs(self.sidb)
+        for channel_type, table in [('active', active_channels),
+                                    ('available', available_channels)]:
+            with open(os.path.join(self.sidb, f'{channel_type}_channels.tbl'), 'w') as f:
+                f.write(table)
+
+    def tearDown(self) -> None:
+
+        shutil.rmtree(self.tempdir)
+
+    def read_records(self, observation: str) -> dict:
+
+        with open(os.path.join(self.tempdir, 'output', f'{observation}_channel_info.yaml')) as f:
+            return yaml.safe_load(f)
+
+    def test_read_sat_db(self) -> None:
+
+        columns = ['sat', 'start', 'end', 'instr', 'channel_num', 'channels', 'comments']
+        df = read_sat_db(os.path.join(self.sidb, 'active_channels.tbl'), columns)
+
+        self.assertEqual(list(df.columns), columns)
+        self.assertEqual(len(df), 9)
+        self.assertEqual(df.iloc[0]['start'], '20090414000000')
+        self.assertEqual(df.iloc[0]['channels'], ['4', '5', '6'])
+        self.assertEqual(df.iloc[0]['comments'], '# M2: redundant entry intentional')
+        self.assertEqual(df.iloc[2]['comments'], '')
+
+    def test_channel_records(self) -> None:
+
+        sat_records = ObservingSystemRecords('channel')
+        sat_records.parse_records(self.sidb)
+        sat_records.save_yamls(os.path.join(self.tempdir, 'output'))
+
+        self.assertEqual(sat_records.obs_registry, ['atms_n18', 'mhs_n18', 'amsua_n19'])
+
+        # Rows sharing start and end are combined, end times at 24 hours are moved to 18 hours
+        self.assertEqual(self.read_records('amsua_n19')['active'], [
+            record('2009-04-14T00:00:00', '2009-12-15T06:00:00', [4, 5, 6],
+                   '# M2: redundant entry intentional'),
+            record('2009-12-15T12:00:00', '2999-12-31T18:00:00', [4, 5, 9, 10], 'no comment'),
+        ])
+        self.assertEqual(self.read_records('amsua_n19')['available'], [
+            record('2009-04-14T00:00:00', '2999-12-31T18:00:00', range(1, 11)),
+        ])
+
+        # Rows sharing a start time but not the end time turn channels off
+        self.assertEqual(self.read_records('mhs_n18')['active'], [
+            record('2005-01-01T00:00:00', '2007-01-01T06:00:00', [1, 2, 3, 4, 5], 'no comment'),
+            record('2007-01-01T06:00:00', '2010-01-01T00:00:00', [1, 2, 3, 4],
+                   '# channel 5 off'),
+        ])
+
+        # Or on, without changing the channels of the earlier time range. Records generated by
+        # the previous parser had ['1', '2', '3', ',', ' ', '4'] style lists in this case.
+        self.assertEqual(self.read_records('atms_n18')['active'], [
+            record('2005-01-01T00:00:00', '2007-01-01T06:00:00', [1, 2, 3], 'no comment'),
+            record('2007-01-01T06:00:00', '2010-01-01T00:00:00', [1, 2, 3, 4], 'no comment'),
+        ])
+
+    def test_update_yamls(self) -> None:
+
+        output_dir = os.path.join(self.tempdir, 'output')
+        observations = ['amsua_n19', 'mhs_n18']
+
+        def update_yamls() -> list:
+            return ObservingSystemRecords('channel').update_yamls(self.sidb, output_dir,
+                                                                  observations)
+
+        self.assertEqual(update_yamls(), ['amsua_n19', 'mhs_n18'])
+        self.assertEqual(update_yamls(), [])
+
+        # Only the records whose lines changed are written again
+        with open(os.path.join(self.sidb, 'active_channels.tbl'), 'w') as f:
+            f.write(active_channels.replace('mhs   1 4 # channel 5 off', 'mhs   1 4 # off'))
+        self.assertEqual(update_yamls(), ['mhs_n18'])
+
+        # And those changed or removed since they were written
+        os.remove(os.path.join(output_dir, 'amsua_n19_channel_info.yaml'))
+        self.assertEqual(update_yamls(), ['amsua_n19'])
+
+        # The files match those written from scratch
+        sat_records = ObservingSystemRecords('channel')
+        sat_records.parse_records(self.sidb)
+        sat_records.save_yamls(os.path.join(self.tempdir, 'reference'), observations)
+        files = [f'{observation}_channel_info.yaml' for observation in observations]
+        self.assertEqual(filecmp.cmpfiles(output_dir, os.path.join(self.tempdir, 'reference'),
+                                          files, shallow=False), (files, [], []))
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,82 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+
+from swell.utilities import plot_scheduler as ps
+
+# --------------------------------------------------------------------------------------------------
+
+
+started = []
+
+
+def plot(name: str) -> None:
+
+    # Jobs run in the calling process with a single worker so the order can be observed
+    started.append(name)
+    if name == 'broken':
+        raise ValueError('no data')
+    print(f'plotted {name}')
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class PlotSchedulerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        started.clear()
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_plot_workers(self) -> None:
+
+        gib = 1024**3
+        with mock.patch.object(ps, 'available_cores', return_value=8), \
+             mock.patch.object(ps, 'available_memory', return_value=None):
+            self.assertEqual(ps.plot_workers([1] * 20), 8)
+            self.assertEqual(ps.plot_workers([1] * 20, max_workers=6), 6)
+            self.assertEqual(ps.plot_workers([1] * 3), 3)
+
+        # Memory for the base of each job and four times the files of the two largest jobs
+        with mock.patch.object(ps, 'available_cores', return_value=8), \
+             mock.patch.object(ps, 'available_memory', return_value=20 * gib):
+            self.assertEqual(ps.plot_workers([gib, gib, 3 * gib, 3 * gib / 8]), 2)
+
+        # There is always at least one worker
+        with mock.patch.object(ps, 'available_memory', return_value=0):
+            self.assertEqual(ps.plot_workers([gib]), 1)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_run_plots(self) -> None:
+
+        jobs = [(10, ('amsua_n19',)), (300, ('broken',)), (20, ('aircraft',)),
+                (5000, ('iasi_metop-b',))]
+        with mock.patch.object(ps, 'available_cores', return_value=1):
+            workers, results = ps.run_plots(plot, jobs)
+
+        self.assertEqual(workers, 1)
+        self.assertEqual(started, ['iasi_metop-b', 'broken', 'aircraft', 'amsua_n19'])
+
+        # Results are in the order of the jobs
+        self.assertEqual([output for _, output, _ in results],
+                         ['plotted amsua_n19\n', '', 'plotted aircraft\n',
+                          'plotted iasi_metop-b\n'])
+        self.assertIsNone(results[1][0])
+        self.assertIn('no data', results[1][2])
+        for index in [0, 2, 3]:
+            self.assertGreaterEqual(results[index][0], 0.0)
+            self.assertIsNone(results[index][2])
+
+
+# --------------------------------------------------------------------------------------------------
@@ -8,9 +8,14 @@
 # --------------------------------------------------------------------------------------------------
 
 import logging
+import os
+import shutil
+import tempfile
 import unittest
+import yaml
 
-from swell.utilities.slurm import prepare_scheduling_dict
+from swell.utilities.slurm import experiment_scheduling_dict, prepare_scheduling_dict, \
+    scheduling_file, valid_directives
 from unittest.mock import patch, Mock
 
 # --------------------------------------------------------------------------------------------------
@@ -87,4 +92,53 @@ class SLURMConfigTest(unittest.TestCase):
             self.assertEqual(sd["EvaObservations"]["directives"]["geos_ocean"]["nodes"], 2)
             self.assertEqual(sd["EvaObservations"]["directives"]["geos_atmosphere"]["nodes"], 4)
 
+    # ----------------------------------------------------------------------------------------------
+
+    @patch("swell.utilities.slurm.slurm_global_defaults")
+    @patch("platform.platform")
+    def test_experiment_scheduling_dict(self, platform_mocked: Mock,
+                                        mock_global_defaults: Mock) -> None:
+
+        logger = logging.getLogger()
+        mock_global_defaults.return_value = {"qos": "dastest"}
+        platform_mocked.return_value = "Linux-5.14.21"
+
+        # The directives of sbatch are parsed once
+        self.assertIn("ntasks-per-node", valid_directives())
+        self.assertIs(valid_directives(), valid_directives())
+
+        experiment_dict = {
+            "model_components": ["geos_atmosphere"],
+            "slurm_directives_global": {"nodes": 8},
+            "slurm_directives_tasks": {"RunJediHofxExecutable": {"geos_atmosphere":
+                                                                 {"nodes": 2}}}
+        }
+
+        exp_suite_path = tempfile.mkdtemp()
+        try:
+            sd = experiment_scheduling_dict(logger, experiment_dict, "nccs_discover_sles15",
+                                            exp_suite_path)
+
+            # The scheduling dictionary is written next to experiment.yaml
+            with open(os.path.join(exp_suite_path, scheduling_file), 'r') as f:
+                self.assertEqual(yaml.safe_load(f), sd)
+            self.assertEqual(os.listdir(exp_suite_path), [scheduling_file])
+        finally:
+            shutil.rmtree(exp_suite_path)
+
+        # Hard-coded task defaults override the experiment globals for the model-generic
+        # directives only, task directives of the experiment override both
+        self.assertEqual(sd["RunJediVariationalExecutable"]["directives"]["all"]["nodes"], 3)
+        self.assertEqual(sd["RunJediVariationalExecutable"]["directives"]["geos_atmosphere"]
+                         ["nodes"], 8)
+        self.assertEqual(sd["RunJediHofxExecutable"]["directives"]["all"]["nodes"], 8)
+        self.assertEqual(sd["RunJediHofxExecutable"]["directives"]["geos_atmosphere"]["nodes"], 2)
+        self.assertEqual(sd["RunJediHofxExecutable"]["directives"]["geos_atmosphere"]
+                         ["job-name"], "RunJediHofxExecutable-geos_atmosphere")
+
+        # Invalid directives are still rejected
+        experiment_dict["slurm_directives_global"] = {"not-a-directive": 1}
+        with self.assertRaises(AssertionError):
+            prepare_scheduling_dict(logger, experiment_dict, "nccs_discover_sles15")
+
 # --------------------------------------------------------------------------------------------------
@@ -0,0 +1,40 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import unittest
+
+from swell.utilities.startup_profile import measure_import_times
+
+# --------------------------------------------------------------------------------------------------
+
+
+# Tasks that only move or remove files and must start without the heavy packages
+light_tasks = ['clean_cycle', 'get_geos_restart', 'move_da_restart', 'move_forecast_restart',
+               'remove_forecast_dir', 'run_geos_executable', 'save_restart']
+
+heavy_packages = ['jinja2', 'netCDF4', 'numpy', 'pandas', 'questionary', 'r2d2', 'xarray']
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class StartupTest(unittest.TestCase):
+
+    def test_light_tasks_do_not_import_heavy_packages(self) -> None:
+
+        for task in light_tasks:
+            import_times = measure_import_times(['swell.swell', 'swell.tasks.' + task])
+            imported = [module for _, _, module in import_times]
+
+            self.assertIn('swell.tasks.' + task, imported)
+            for package in heavy_packages:
+                self.assertNotIn(package, imported, f'{task} imports {package} at startup')
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,100 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from swell.utilities.store_ledger import StoreLedger, store_files
+
+# --------------------------------------------------------------------------------------------------
+
+
+class LocalStore():
+
+    # Stand-in for r2d2.store that copies the files to a local directory
+    def __init__(self, database: str) -> None:
+
+        self.database = database
+        self.stored = []
+        self.failing = set()
+
+    def __call__(self, source_file: str, obs_type: str, date: str, **kwargs) -> None:
+
+        if obs_type in self.failing:
+            raise OSError(f'Database unavailable for {obs_type}')
+        shutil.copy(source_file, os.path.join(self.database, f'{obs_type}.{date}.nc4'))
+        self.stored.append(obs_type)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class StoreLedgerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.cycle_dir = tempfile.mkdtemp()
+        self.database = tempfile.mkdtemp()
+
+        self.store_arg_list = []
+        for name in ['aircraft', 'amsua_n19', 'gps', 'sondes']:
+            source_file = os.path.join(self.cycle_dir, f'{name}.20211211T210000Z.nc4')
+            with open(source_file, 'w') as f:
+                f.write(name)
+            self.store_arg_list.append({'date': '20211211T210000Z', 'provider': 'ncdiag',
+                                        'source_file': source_file, 'obs_type': name,
+                                        'type': 'ob', 'experiment': 'swell-hofx'})
+
+    def tearDown(self) -> None:
+
+        shutil.rmtree(self.cycle_dir)
+        shutil.rmtree(self.database)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def test_resume(self) -> None:
+
+        storer = LocalStore(self.database)
+        storer.failing = {'gps'}
+
+        skipped, results = store_files(storer, StoreLedger(self.cycle_dir), self.store_arg_list, 3)
+        self.assertEqual(skipped, [])
+        self.assertEqual([store_args['obs_type'] for store_args, _ in results],
+                         ['aircraft', 'amsua_n19', 'gps', 'sondes'])
+        self.assertEqual([error is None for _, (_, _, error) in results],
+                         [True, True, False, True])
+        self.assertIn('Database unavailable for gps', results[2][1][2])
+        self.assertEqual(sorted(os.listdir(self.database)),
+                         ['aircraft.20211211T210000Z.nc4', 'amsua_n19.20211211T210000Z.nc4',
+                          'sondes.20211211T210000Z.nc4'])
+
+        # A rerun of the task only stores the file that failed and the file that changed
+        storer = LocalStore(self.database)
+        with open(self.store_arg_list[3]['source_file'], 'w') as f:
+            f.write('sondes, second attempt')
+
+        skipped, results = store_files(storer, StoreLedger(self.cycle_dir), self.store_arg_list, 3)
+        self.assertEqual([store_args['obs_type'] for store_args in skipped],
+                         ['aircraft', 'amsua_n19'])
+        self.assertEqual(sorted(storer.stored), ['gps', 'sondes'])
+        self.assertTrue(all([error is None for _, (_, _, error) in results]))
+
+        # Nothing is left to store
+        skipped, results = store_files(storer, StoreLedger(self.cycle_dir), self.store_arg_list, 3)
+        self.assertEqual(len(skipped), 4)
+        self.assertEqual(results, [])
+
+        # The same file stored under another experiment is a different store
+        store_args = dict(self.store_arg_list[0], experiment='swell-3dvar')
+        self.assertFalse(StoreLedger(self.cycle_dir).stored(store_args))
+
+
+# --------------------------------------------------------------------------------------------------
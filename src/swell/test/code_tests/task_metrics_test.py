@@ -0,0 +1,124 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from swell.utilities.task_metrics import TaskMetrics, metrics_span, set_active_metrics
+
+# --------------------------------------------------------------------------------------------------
+
+
+class TaskMetricsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+
+        self.tempdir = tempfile.mkdtemp()
+        self.metrics = TaskMetrics('GetObservations', 'geos_atmosphere', '20211212T000000Z')
+
+    def tearDown(self) -> None:
+
+        set_active_metrics(None)
+        shutil.rmtree(self.tempdir)
+
+    def test_nested_spans(self) -> None:
+
+        set_active_metrics(self.metrics)
+        data = os.urandom(100000)
+
+        with self.metrics.span('execute'):
+            with self.metrics.span('fetch'):
+                with open(os.path.join(self.tempdir, 'amsua_n19.nc4'), 'wb') as f:
+                    f.write(data)
+            with self.metrics.span('combine'):
+                self.metrics.add_bytes(read=100000, written=50000)
+            with metrics_span('subprocess'):
+                pass
+
+        spans = {span['name']: span for span in self.metrics.record('succeeded')['spans']}
+        self.assertEqual(list(spans.keys()), ['execute', 'execute/fetch', 'execute/combine',
+                                              'execute/subprocess'])
+
+        # Bytes added explicitly count for the span and its parents
+        self.assertGreaterEqual(spans['execute/combine']['bytes_read'], 100000)
+        self.assertGreaterEqual(spans['execute']['bytes_written'],
+                                spans['execute/fetch']['bytes_written'] + 50000)
+        self.assertGreaterEqual(spans['execute']['seconds'], spans['execute/fetch']['seconds'])
+
+        # Process counters are only available where the kernel provides them
+        if os.path.exists('/proc/self/io'):
+            self.assertGreaterEqual(spans['execute/fetch']['bytes_written'], len(data))
+
+    def test_thread_spans(self) -> None:
+
+        # Spans of worker threads do not count the input/output of the whole process
+        data = os.urandom(100000)
+
+        def work(index: int) -> None:
+            with self.metrics.span('fetch'):
+                with open(os.path.join(self.tempdir, f'amsua_n19.{index}.nc4'), 'wb') as f:
+                    f.write(data)
+                self.metrics.add_bytes(read=10)
+
+        with self.metrics.span('execute'):
+            threads = [threading.Thread(target=work, args=(index,)) for index in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        spans = self.metrics.record('succeeded')['spans']
+        self.assertEqual(sorted(span['name'] for span in spans), ['execute', 'fetch', 'fetch'])
+        for span in spans:
+            if span['name'] == 'fetch':
+                self.assertEqual((span['bytes_read'], span['bytes_written']), (10, 0))
+            elif os.path.exists('/proc/self/io'):
+                self.assertGreaterEqual(span['bytes_written'], 2*len(data))
+
+    def test_try_number(self) -> None:
+
+        with mock.patch.dict(os.environ, {'CYLC_TASK_TRY_NUMBER': '2'}):
+            metrics = TaskMetrics('GetObservations', 'geos_atmosphere', '20211212T000000Z')
+        self.assertEqual(metrics.record('failed')['try_number'], 2)
+        self.assertEqual(self.metrics.record('failed')['try_number'], 1)
+
+    def test_write_record(self) -> None:
+
+        self.metrics.add_span('construct', self.metrics.start_perf - 0.25,
+                              self.metrics.start_perf)
+        with self.metrics.span('execute'):
+            pass
+        self.metrics.add_counters('jedi_rendering_cache', {'render_hits': 3, 'render_misses': 1})
+
+        metrics_file = os.path.join(self.tempdir, 'metrics', '20211212T000000Z',
+                                    'GetObservations-geos_atmosphere.json')
+        self.metrics.write(metrics_file, 'failed')
+
+        with open(metrics_file, 'r') as f:
+            record = json.load(f)
+
+        self.assertEqual(record['task'], 'GetObservations')
+        self.assertEqual(record['model'], 'geos_atmosphere')
+        self.assertEqual(record['cycle'], '20211212T000000Z')
+        self.assertEqual(record['status'], 'failed')
+        self.assertGreater(record['peak_rss_bytes'], 0)
+        self.assertEqual([span['name'] for span in record['spans']], ['construct', 'execute'])
+        self.assertGreaterEqual(record['seconds'], 0.25)
+        self.assertEqual(record['counters'],
+                         {'jedi_rendering_cache': {'render_hits': 3, 'render_misses': 1}})
+        self.assertEqual(os.listdir(os.path.dirname(metrics_file)),
+                         ['GetObservations-geos_atmosphere.json'])
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,63 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+import io
+import sys
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from swell.utilities.worker_pool import run_in_pool
+
+# --------------------------------------------------------------------------------------------------
+
+
+def log_lines(name: str, lines: int) -> str:
+
+    # Interleave the output of the workers as much as possible, printing directly since the code
+    # tests silence the logger
+    for line in range(lines):
+        print(f' {name}: line {line}')
+        time.sleep(0.001)
+    if name == 'failing':
+        sys.exit(f' {name}: failed')
+    return name
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class WorkerPoolTest(unittest.TestCase):
+
+    def test_thread_output_is_captured_per_job(self) -> None:
+
+        names = [f'fetch_{index}' for index in range(8)] + ['failing']
+        stdout = sys.stdout
+        printed = io.StringIO()
+        with redirect_stdout(printed):
+            results = run_in_pool(log_lines, [(name, 20) for name in names], 4,
+                                  use_processes=False)
+
+        # Nothing reaches stdout while the threads run and stdout is restored afterwards
+        self.assertEqual(printed.getvalue(), '')
+        self.assertIs(sys.stdout, stdout)
+
+        # Each job gets its own output, in order, and failures keep theirs too
+        for name, (result, output, error) in zip(names, results):
+            lines = output.splitlines()
+            self.assertEqual([line for line in lines if 'line ' in line],
+                             [f' {name}: line {line}' for line in range(20)])
+            if name == 'failing':
+                self.assertIsNone(result)
+                self.assertIn('SystemExit', error)
+            else:
+                self.assertEqual((result, error), (name, None))
+
+
+# --------------------------------------------------------------------------------------------------
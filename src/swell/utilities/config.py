@@ -7,13 +7,20 @@
 # --------------------------------------------------------------------------------------------------
 
 
+import copy
 import os
-import yaml
-from typing import Callable
+import pickle
+import tempfile
+from typing import Callable, Optional
 
 from swell.swell_path import get_swell_path
+from swell.utilities.file_signature import file_signature, file_unchanged
+from swell.utilities.lazy_import import lazy_import
 from swell.utilities.logger import Logger
 
+# Only needed when the configuration snapshot is missing or out of date
+yaml = lazy_import('yaml')
+
 
 # --------------------------------------------------------------------------------------------------
 #  @package configuration
@@ -51,75 +58,50 @@ class Config():
         # Keep copy of owner's logger
         self.__logger__ = logger
 
-        # Read the configuration yaml file
-        with open(input_file, 'r') as ymlfile:
-            experiment_dict = yaml.safe_load(ymlfile)
+        # Use the precompiled snapshot of the configuration when it is up to date. Otherwise read
+        # the YAML files, which also checks the model part of the config, and refresh the snapshot
+        # so that the tasks that follow can use it.
+        snapshot = load_config_snapshot(logger, input_file)
 
-        # Save some things that all tasks can use (suite level questions)
-        self.__experiment_root__ = experiment_dict.get('experiment_root')
-        self.__experiment_id__ = experiment_dict.get('experiment_id')
-        self.__platform__ = experiment_dict.get('platform')
-        self.__start_cycle_point__ = experiment_dict.get('start_cycle_point')
-        self.__suite_to_run__ = experiment_dict.get('suite_to_run')
-
-        # If experiment_dict contains models key add the model components to the object
-        if 'models' in experiment_dict.keys():
-            self.__model_components__ = list(experiment_dict['models'].keys())
-        else:
-            self.__model_components__ = None
+        if snapshot is None or model not in snapshot['configs']:
 
-        # Step1: flatten the dictionary based on the model
-        # ------------------------------------------------
+            # Read the configuration yaml file
+            with open(input_file, 'r') as ymlfile:
+                experiment_dict = yaml.safe_load(ymlfile)
 
-        # Extract the model config
-        if model is not None:
-            # Assert the model name is found in the config
-            if model not in experiment_dict['models'].keys():
+            # Abort if the model config cannot be merged with the top level config
+            if model is not None and model not in experiment_dict.get('models', {}).keys():
                 self.__logger__.abort(f'Did not find the model \'{model}\' in the ' +
                                       f'experiment configuration')
-            # Extract the model specific part of the config
-            model_config = experiment_dict['models'][model]
-            # Add model component to config
-            experiment_dict['model_component'] = model
-        else:
-            model_config = {}
-
-        # Remove the model specific part from the full config
-        if 'models' in experiment_dict.keys():
-            del experiment_dict['models']
-
-        # Assert that the full and model level configs have only unique keys
-        for key in experiment_dict.keys():
-            if key in model_config.keys():
+            for key in model_config_clashes(experiment_dict, model):
                 self.__logger__.abort(f'Model config contains the key \'{key}\'. Which is ' +
                                       f'also contained in the top level config.')
 
-        # Now merge the top level config and the model specific parts of the config. This prevents
-        # tasks from accessing the config associated with any model other than the one they are
-        # supposed to act upon.
-        experiment_dict.update(model_config)
+            suite_config = suite_level_config(experiment_dict)
+            task_config = task_level_config(merge_model_config(experiment_dict, model),
+                                            read_question_tasks(), task_name)
 
-        # Step 2: create variables in the object with the keys/values in the config
-        # -------------------------------------------------------------------------
+            if snapshot is None:
+                write_config_snapshot(logger, input_file)
 
-        # Open the question dictionary
-        with open(os.path.join(get_swell_path(), 'tasks', 'task_questions.yaml'), 'r') as ymlfile:
-            question_dict = yaml.safe_load(ymlfile)
-
-        # Loop through the dictionary
-        for experiment_key, experiment_value in experiment_dict.items():
+        else:
 
-            key_question_dict = question_dict.get(experiment_key)
+            # Copies, a snapshot can be shared with the other tasks of the process
+            suite_config = copy.deepcopy(snapshot['suite'])
+            task_config = copy.deepcopy(snapshot['configs'][model].get(task_name, {}))
 
-            if key_question_dict is not None:
+        # Save some things that all tasks can use (suite level questions)
+        for key, value in suite_config.items():
+            setattr(self, f'__{key}__', value)
 
-                if task_name in key_question_dict['tasks']:
+        # Create variables in the object with the keys/values in the config
+        for experiment_key, experiment_value in task_config.items():
 
-                    # Add this variable to the object
-                    setattr(self, f'__{experiment_key}__', experiment_value)
+            # Add this variable to the object
+            setattr(self, f'__{experiment_key}__', experiment_value)
 
-                    # Add a method to get the variable
-                    setattr(self, f'{experiment_key}', self.get(experiment_key))
+            # Add a method to get the variable
+            setattr(self, f'{experiment_key}', self.get(experiment_key))
 
     # ----------------------------------------------------------------------------------------------
 
@@ -144,4 +126,195 @@ class Config():
                 return default
         return variable_not_found
 
-# ----------------------------------------------------------------------------------------------
+
+# --------------------------------------------------------------------------------------------------
+#  Precompiled configuration
+#
+#  Every task used to read the experiment YAML and the task questions YAML before doing any work.
+#  The flattened configuration of every task and model is compiled once into a pickle next to the
+#  experiment YAML. The snapshot records the modification time, size and hash of both YAML files
+#  and is only used when they are unchanged.
+# --------------------------------------------------------------------------------------------------
+
+
+config_snapshot_version = 1
+
+# Snapshots loaded by this process, by path, with the modification time and size of the file. The
+# tasks that swell task-batch runs one after the other share them.
+loaded_config_snapshots = {}
+
+suite_level_keys = ['experiment_root', 'experiment_id', 'platform', 'start_cycle_point',
+                    'suite_to_run']
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def task_questions_path() -> str:
+
+    return os.path.join(get_swell_path(), 'tasks', 'task_questions.yaml')
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def config_snapshot_path(input_file: str) -> str:
+
+    return input_file + '.pickle'
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def read_question_tasks() -> dict:
+
+    # Dictionary of question name to the tasks that can access it
+    with open(task_questions_path(), 'r') as ymlfile:
+        question_dict = yaml.safe_load(ymlfile)
+
+    return {key: question['tasks'] for key, question in question_dict.items()}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def suite_level_config(experiment_dict: dict) -> dict:
+
+    suite_config = {key: experiment_dict.get(key) for key in suite_level_keys}
+
+    # If experiment_dict contains models key add the model components
+    if 'models' in experiment_dict.keys():
+        suite_config['model_components'] = list(experiment_dict['models'].keys())
+    else:
+        suite_config['model_components'] = None
+
+    return suite_config
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def model_config_clashes(experiment_dict: dict, model: Optional[str]) -> list:
+
+    # Keys of the model config that are also in the top level config
+    if model is None:
+        return []
+
+    model_config = experiment_dict['models'][model]
+    return [key for key in experiment_dict.keys() if key in model_config.keys()]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def merge_model_config(experiment_dict: dict, model: Optional[str]) -> dict:
+
+    # Merge the top level config and the model specific parts of the config. This prevents tasks
+    # from accessing the config associated with any model other than the one they are supposed
+    # to act upon.
+    merged_dict = {key: value for key, value in experiment_dict.items() if key != 'models'}
+
+    if model is not None:
+        merged_dict['model_component'] = model
+        merged_dict.update(experiment_dict['models'][model])
+
+    return merged_dict
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def task_level_config(merged_dict: dict, question_tasks: dict, task_name: str) -> dict:
+
+    # Only the keys that the task can access based on the rules in tasks/task_questions.yaml
+    return {key: value for key, value in merged_dict.items()
+            if task_name in question_tasks.get(key, [])}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def compile_config(input_file: str) -> dict:
+
+    with open(input_file, 'r') as ymlfile:
+        experiment_dict = yaml.safe_load(ymlfile)
+    question_tasks = read_question_tasks()
+
+    # Invert the questions to get the keys available to each task
+    task_keys = {}
+    for key, tasks in question_tasks.items():
+        for task in tasks:
+            task_keys.setdefault(task, []).append(key)
+
+    # Flattened config for every task of every model. Models whose config clashes with the top
+    # level config are left out so that Config reads the YAML and aborts with the reason.
+    models = [None] + list(experiment_dict.get('models', {}).keys())
+    configs = {}
+    for model in models:
+        if model_config_clashes(experiment_dict, model):
+            continue
+        merged_dict = merge_model_config(experiment_dict, model)
+        configs[model] = {task: {key: merged_dict[key] for key in merged_dict if key in keys}
+                          for task, keys in task_keys.items()}
+
+    return {'suite': suite_level_config(experiment_dict), 'configs': configs}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def write_config_snapshot(logger: Logger, input_file: str) -> None:
+
+    # Signatures are taken before compiling so a file edited in the meantime invalidates it
+    sources = {'experiment': file_signature(input_file),
+               'questions': file_signature(task_questions_path())}
+
+    snapshot = compile_config(input_file)
+    snapshot['version'] = config_snapshot_version
+    snapshot['sources'] = sources
+
+    # Write to a temporary file and rename so concurrent tasks never read a partial snapshot
+    snapshot_path = config_snapshot_path(input_file)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(snapshot_path)),
+                                        suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    except OSError as e:
+        logger.info(f'Unable to write the configuration snapshot {snapshot_path}: {e}')
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def load_config_snapshot(logger: Logger, input_file: str) -> Optional[dict]:
+
+    # Return the snapshot when it exists and matches the YAML files, otherwise None
+    snapshot_path = config_snapshot_path(input_file)
+    try:
+        stat = os.stat(snapshot_path)
+        loaded = loaded_config_snapshots.get(snapshot_path)
+        if loaded is not None and loaded[0] == (stat.st_mtime_ns, stat.st_size):
+            snapshot = loaded[1]
+        else:
+            with open(snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+            loaded_config_snapshots[snapshot_path] = ((stat.st_mtime_ns, stat.st_size), snapshot)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.info(f'Ignoring unreadable configuration snapshot {snapshot_path}: {e}')
+        return None
+
+    if snapshot.get('version') != config_snapshot_version or \
+            not file_unchanged(input_file, snapshot['sources']['experiment']) or \
+            not file_unchanged(task_questions_path(), snapshot['sources']['questions']):
+        logger.info(f'Configuration snapshot {snapshot_path} is out of date and will be ' +
+                    f'regenerated.')
+        return None
+
+    return snapshot
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,201 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import os
+import shutil
+from fnmatch import fnmatchcase
+from typing import Optional
+
+from swell.utilities.worker_pool import run_in_pool
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package cycle_cleanup
+#
+#  Removal of the files of a cycle directory that match a list of glob patterns. The patterns are
+#  resolved together in a single walk of the directory, with the matching rules of glob, and the
+#  items are removed by a pool of threads. The bytes reclaimed are accounted per pattern.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+def check_pattern(pattern: str) -> Optional[str]:
+
+    """
+    Safety checks of a clean pattern, returns why the pattern is forbidden or None.
+    """
+
+    # 1. Check that path is not absolute. Things can only be deleted relative to the cycle
+    #    directory.
+    if os.path.isabs(pattern):
+        return f'Absolute paths are forbidden. Offending entry: {pattern}'
+
+    # 2. Check that the pattern does not begin with a / or ./
+    if pattern[0] == '/' or pattern[0] == '.':
+        return f'Patterns beginning with \'/\' or \'.\' are forbidden. Offending entry: {pattern}'
+
+    # 3. Check that the pattern is not a blanket removal of all files
+    if any(ele == '*' for ele in os.path.split(pattern)):
+        return f'Deleting all files from any directory is forbidden. Offending entry: {pattern}'
+
+    return None
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def match_components(components: list, pattern_components: list) -> bool:
+
+    # As glob, wildcards do not match path separators nor names beginning with a dot
+    if len(components) != len(pattern_components):
+        return False
+
+    for component, pattern_component in zip(components, pattern_components):
+        if component.startswith('.') and not pattern_component.startswith('.'):
+            return False
+        if not fnmatchcase(component, pattern_component):
+            return False
+
+    return True
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def item_size(path: str, is_dir: bool) -> int:
+
+    # Bytes of a file, or of all the files below a directory, symbolic links are not followed
+    if not is_dir:
+        return os.lstat(path).st_size
+
+    size = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                size += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:
+                pass
+
+    return size
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def resolve_patterns(root: str, patterns: list) -> dict:
+
+    """
+    Items below root matching each pattern, as (relative path, is directory) tuples. An item
+    matching several patterns is only listed for the first of them. The directory is walked once
+    and no deeper than the deepest pattern.
+    """
+
+    pattern_components = [[component for component in pattern.split('/') if component]
+                          for pattern in patterns]
+    max_depth = max([len(components) for components in pattern_components], default=0)
+
+    matches = {pattern: [] for pattern in patterns}
+    pending = [('', 1)]
+    while pending:
+        directory, depth = pending.pop()
+        try:
+            entries = sorted(os.scandir(os.path.join(root, directory)), key=lambda e: e.name)
+        except OSError:
+            continue
+
+        for entry in entries:
+            relative_path = os.path.join(directory, entry.name)
+            components = relative_path.split(os.sep)
+
+            # Symbolic links to directories are removed as links, never walked into
+            is_dir = entry.is_dir(follow_symlinks=False)
+            for pattern, pattern_component in zip(patterns, pattern_components):
+                if match_components(components, pattern_component):
+                    matches[pattern].append((relative_path, is_dir))
+                    break
+
+            if is_dir and depth < max_depth:
+                pending.append((relative_path, depth + 1))
+
+    return matches
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def remove_item(path: str, is_dir: bool, recursive: bool) -> tuple:
+
+    """
+    Remove a file or a directory, non-empty directories only when recursive. Returns the bytes
+    reclaimed and whether the item was removed.
+    """
+
+    if not os.path.lexists(path):
+        return 0, True
+
+    size = item_size(path, is_dir)
+    if not is_dir:
+        os.remove(path)
+    elif recursive:
+        shutil.rmtree(path)
+    elif not os.listdir(path):
+        os.rmdir(path)
+    else:
+        return 0, False
+
+    return size, True
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def clean_directory(root: str, patterns: list, recursive: bool = False,
+                    max_workers: int = 1) -> dict:
+
+    """
+    Remove the items of root matching the patterns using up to max_workers threads. Files are
+    removed first, then directories from the deepest up so that a directory emptied by the
+    removal of its files is removed as well.
+
+    Returns, for each pattern, the number of items removed, the bytes reclaimed, the directories
+    that were not removed because they are not empty and the failures.
+    """
+
+    matches = resolve_patterns(root, patterns)
+    report = {pattern: {'removed': 0, 'bytes': 0, 'not_empty': [], 'errors': []}
+              for pattern in patterns}
+
+    items = [(pattern, relative_path, is_dir) for pattern, pattern_matches in matches.items()
+             for relative_path, is_dir in pattern_matches]
+
+    # Files in one batch, then directories one depth at a time from the deepest
+    batches = [[item for item in items if not item[2]]]
+    directories = [item for item in items if item[2]]
+    for depth in sorted(set([item[1].count(os.sep) for item in directories]), reverse=True):
+        batches.append([item for item in directories if item[1].count(os.sep) == depth])
+
+    for batch in batches:
+        results = run_in_pool(remove_item, [(os.path.join(root, relative_path), is_dir, recursive)
+                                            for _, relative_path, is_dir in batch],
+                              max_workers, use_processes=False)
+
+        for (pattern, relative_path, _), (result, _, error) in zip(batch, results):
+            if error is not None:
+                report[pattern]['errors'].append(f'{relative_path}:\n{error}')
+            elif result[1]:
+                report[pattern]['removed'] += 1
+                report[pattern]['bytes'] += result[0]
+            else:
+                report[pattern]['not_empty'].append(relative_path)
+
+    return report
+
+
+# --------------------------------------------------------------------------------------------------
@@ -7,15 +7,47 @@
 # --------------------------------------------------------------------------------------------------
 
 
+import copy
+import os
 import yaml
 from collections.abc import Hashable
-from typing import Union
+from typing import Any, Union
 
 from swell.utilities.logger import Logger
 
 # --------------------------------------------------------------------------------------------------
 
 
+# C implementations of the YAML loader and dumper, when PyYAML was built with libyaml
+YamlSafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CDumper', yaml.Dumper)
+
+# Parsed YAML files of this process, by path, with the modification time and size they were read at
+yaml_file_cache = {}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def load_yaml_file(path: str) -> Any:
+
+    # A file is only parsed again when it changes. Callers modify what they are given so each gets
+    # its own copy of the parsed contents.
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = yaml_file_cache.get(path)
+    if cached is None or cached[0] != signature:
+        with open(path, 'r') as ymlfile:
+            cached = (signature, yaml.load(ymlfile, Loader=YamlSafeLoader))
+        yaml_file_cache[path] = cached
+
+    return copy.deepcopy(cached[1])
+
+
+# --------------------------------------------------------------------------------------------------
+
+
 def dict_get(
     logger: Logger,
     dictionary: dict,
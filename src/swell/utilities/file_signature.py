@@ -0,0 +1,63 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import hashlib
+import os
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package file_signature
+#
+#  Checksums and signatures (modification time, size and checksum) of files, used to tell whether
+#  a file changed since something was derived from it.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+def file_checksum(path: str, block_size: int = 8*1024*1024) -> str:
+
+    # Return the sha256 checksum of a file
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def file_signature(path: str) -> dict:
+
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_checksum(path)}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def file_unchanged(path: str, signature: dict) -> bool:
+
+    # Matching modification time and size is enough. A file that was only touched, or copied
+    # somewhere else, is still accepted when the contents hash the same.
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+
+    if stat.st_mtime_ns == signature['mtime_ns'] and stat.st_size == signature['size']:
+        return True
+    if stat.st_size != signature['size']:
+        return False
+
+    return file_checksum(path) == signature['sha256']
+
+
+# --------------------------------------------------------------------------------------------------
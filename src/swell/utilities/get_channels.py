@@ -8,13 +8,36 @@
 # --------------------------------------------------------------------------------------------------
 
 import yaml
+import glob
 import os
+import pickle
+import tempfile
+from bisect import bisect_left
 from datetime import datetime as dt
 from itertools import groupby
 from typing import Tuple, Optional
 
+from swell.utilities.dictionary import YamlSafeLoader
+from swell.utilities.file_signature import file_signature, file_unchanged
 from swell.utilities.logger import Logger
 
+# --------------------------------------------------------------------------------------------------
+#  The channel records of each observation (<observation>_channel_info.yaml) are compiled into an
+#  index, written next to the records as channel_info_index.pickle and loaded once per process.
+#  For each record type (available and active) the begin and end dates of all the elements are
+#  sorted into a list of boundaries. The element that applies to each boundary and to each
+#  interval between two boundaries is found when compiling, so finding the channels of a cycle is
+#  a bisection of the boundaries. The channel lists are expanded to integers when compiling too.
+#  An observation whose records file changed since it was compiled is compiled again.
+# --------------------------------------------------------------------------------------------------
+
+
+channel_index_file = 'channel_info_index.pickle'
+channel_index_version = 1
+
+# Indexes loaded by this process, by observing system records directory
+channel_indexes = {}
+
 # --------------------------------------------------------------------------------------------------
 
 
@@ -71,6 +94,166 @@ def get_channel_list(input_dict: dict, dt_cycle_time: dt) -> list:
 # --------------------------------------------------------------------------------------------------
 
 
+def compile_channel_list(input_dict: list) -> dict:
+
+    '''
+        Function compiles a channel list from the records into sorted date boundaries and the
+        index of the element that get_channel_list returns at and between each boundary
+    '''
+
+    dates = [(dt.strptime(element['begin date'], "%Y-%m-%dT%H:%M:%S"),
+              dt.strptime(element['end date'], "%Y-%m-%dT%H:%M:%S")) for element in input_dict]
+    boundaries = sorted(set([date for begin_end in dates for date in begin_end]))
+
+    def first_element(covers) -> Optional[int]:
+        return next((index for index, (begin, end) in enumerate(dates) if covers(begin, end)),
+                    None)
+
+    # Interval i lies between boundaries i-1 and i, the first and last intervals are unbounded
+    at_boundary = [first_element(lambda begin, end: begin < date < end) for date in boundaries]
+    between = [None] + [first_element(lambda begin, end: begin <= left and end >= right)
+                        for left, right in zip(boundaries[:-1], boundaries[1:])] + [None]
+
+    return {
+        'boundaries': boundaries,
+        'at_boundary': at_boundary,
+        'between': between,
+        'channels': [tuple(process_channel_lists(element['channels'])) for element in input_dict],
+    }
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def find_channel_list(compiled_list: dict, dt_cycle_time: dt) -> Optional[int]:
+
+    '''
+        Function returns the index of the element of a compiled channel list that applies at the
+        cycle time, as get_channel_list does for the records
+    '''
+
+    boundaries = compiled_list['boundaries']
+    index = bisect_left(boundaries, dt_cycle_time)
+    if index < len(boundaries) and boundaries[index] == dt_cycle_time:
+        return compiled_list['at_boundary'][index]
+
+    return compiled_list['between'][index]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def compile_observation_records(path_to_observing_sys_config: str) -> dict:
+
+    # The signature is taken before reading so a file changed in the meantime is compiled again
+    signature = file_signature(path_to_observing_sys_config)
+    with open(path_to_observing_sys_config, 'r') as file:
+        data = yaml.load(file, Loader=YamlSafeLoader)
+
+    return {
+        'signature': signature,
+        'available': compile_channel_list(data['available']),
+        'active': compile_channel_list(data['active']),
+    }
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def write_channel_index(path_to_observing_sys_yamls: str, index: dict) -> None:
+
+    # Write to a temporary file and rename so concurrent tasks never read a partial index. The
+    # records directory may not be writable, the index is then only kept by this process.
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=path_to_observing_sys_yamls, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'version': channel_index_version, 'observations': index}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, os.path.join(path_to_observing_sys_yamls, channel_index_file))
+    except OSError:
+        pass
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def compile_channel_index(path_to_observing_sys_yamls: str) -> dict:
+
+    '''
+        Compile the channel records of all the observations in the observing system records
+        directory and write the index. Records unchanged since they were last compiled are kept.
+    '''
+
+    previous_index = load_channel_index(path_to_observing_sys_yamls)
+
+    index = {}
+    for path in sorted(glob.glob(os.path.join(path_to_observing_sys_yamls,
+                                              '*_channel_info.yaml'))):
+        observation = os.path.basename(path)[:-len('_channel_info.yaml')]
+        records = previous_index.get(observation)
+        if records is None or not file_unchanged(path, records['signature']):
+            records = compile_observation_records(path)
+        index[observation] = records
+
+    write_channel_index(path_to_observing_sys_yamls, index)
+    channel_indexes[os.path.abspath(path_to_observing_sys_yamls)] = index
+
+    return index
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def load_channel_index(path_to_observing_sys_yamls: str) -> dict:
+
+    # Index already loaded by this process, or written with the records, or empty
+    key = os.path.abspath(path_to_observing_sys_yamls)
+    if key not in channel_indexes:
+        index = {}
+        try:
+            with open(os.path.join(path_to_observing_sys_yamls, channel_index_file), 'rb') as f:
+                saved_index = pickle.load(f)
+            if saved_index.get('version') == channel_index_version:
+                index = saved_index['observations']
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+        channel_indexes[key] = index
+
+    return channel_indexes[key]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def observation_channel_records(
+    path_to_observing_sys_yamls: str,
+    observation: str
+) -> Optional[dict]:
+
+    '''
+        Compiled channel records of the observation, None if the observation has no records
+    '''
+
+    path_to_observing_sys_config = path_to_observing_sys_yamls + '/' + \
+        observation + '_channel_info.yaml'
+
+    if not os.path.isfile(path_to_observing_sys_config):
+        return None
+
+    index = load_channel_index(path_to_observing_sys_yamls)
+    records = index.get(observation)
+    if records is None or not file_unchanged(path_to_observing_sys_config,
+                                             records['signature']):
+        records = compile_observation_records(path_to_observing_sys_config)
+        index[observation] = records
+        write_channel_index(path_to_observing_sys_yamls, index)
+
+    return records
+
+
+# --------------------------------------------------------------------------------------------------
+
+
 def get_channels(
     path_to_observing_sys_yamls: str,
     observation: str,
@@ -84,28 +267,25 @@ def get_channels(
         qc filter yaml files.
     '''
 
-    # Retrieve available and active channels from records yaml
-    path_to_observing_sys_config = path_to_observing_sys_yamls + '/' + \
-        observation + '_channel_info.yaml'
+    # Retrieve available and active channels from the compiled records
+    records = observation_channel_records(path_to_observing_sys_yamls, observation)
 
-    if os.path.isfile(path_to_observing_sys_config):
-        with open(path_to_observing_sys_config, 'r') as file:
-            data = yaml.safe_load(file)
-            available_channels = get_channel_list(data['available'], dt_cycle_time)
-            active_channels = get_channel_list(data['active'], dt_cycle_time)
+    if records is not None:
+        available_index = find_channel_list(records['available'], dt_cycle_time)
+        active_index = find_channel_list(records['active'], dt_cycle_time)
 
-        if available_channels is None:
+        if available_index is None:
             logger.abort(f'Missing available channels for {observation}, '
                          'Confirm that you are using the right version of GEOSmksi')
 
-        if active_channels is None:
+        if active_index is None:
             logger.abort(f'Missing active channels for {observation}, '
                          'Confirm that you are using the right version of GEOSmksi')
 
-        available_channels_list = process_channel_lists(available_channels)
+        available_channels_list = records['available']['channels'][available_index]
         available_range_string = create_range_string(available_channels_list)
-        active_channels_list = process_channel_lists(active_channels)
-        use_flags = [1 if x in active_channels_list else -1 for x in available_channels_list]
+        active_channels_set = set(records['active']['channels'][active_index])
+        use_flags = [1 if x in active_channels_set else -1 for x in available_channels_list]
 
         return available_range_string, use_flags
 
@@ -121,17 +301,15 @@ def num_active_channels(
     dt_cycle_time: dt
 ) -> Optional[int]:
 
-    # Retrieve available and active channels from records yaml
-    path_to_observing_sys_config = path_to_observing_sys_yamls + '/' + \
-        observation + '_channel_info.yaml'
+    # Retrieve active channels from the compiled records
+    records = observation_channel_records(path_to_observing_sys_yamls, observation)
 
-    if os.path.isfile(path_to_observing_sys_config):
-        with open(path_to_observing_sys_config, 'r') as file:
-            data = yaml.safe_load(file)
-            active_channels = get_channel_list(data['active'], dt_cycle_time)
+    if records is not None:
+        active_index = find_channel_list(records['active'], dt_cycle_time)
+        if active_index is None:
+            return None
 
-        active_channels_list = process_channel_lists(active_channels)
-        return len(active_channels_list)
+        return len(records['active']['channels'][active_index])
 
     else:
         print('path_to_observing_sys_config undefined')
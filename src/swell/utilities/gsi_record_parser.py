@@ -1,5 +1,4 @@
 import pandas as pd
-import numpy as np
 
 
 def check_end_time(end_time: str) -> str:
@@ -19,20 +18,17 @@ class GSIRecordParser:
 
     def __init__(self) -> None:
         self.instr_df = None
-        self.return_df = None
+        self.return_rows = []
+        self.rows_by_start = {}
         self.sat = None
         self.instr = None
 
-    def get_channel_list(self, start: int) -> list:
-        channel_list = []
-        rows = self.instr_df.loc[self.instr_df["start"] == start]
-        for row_ch_list in rows["channels"].values:
-            ch_list = eval(row_ch_list)
-            channel_list.extend(ch_list)
+    def get_channel_list(self, start: str) -> list:
+        channel_list = set()
+        for _, row_ch_list, _ in self.rows_by_start[start]:
+            channel_list.update(row_ch_list)
 
-        channel_list = list(set(channel_list))
-        channel_list.sort(key=int)
-        return channel_list
+        return sorted(channel_list, key=int)
 
     def run(self, instr_df: pd.DataFrame) -> None:
 
@@ -43,17 +39,22 @@ class GSIRecordParser:
         self.sat = self.instr_df.iloc[0]['sat']
         self.instr = self.instr_df.iloc[0]['instr']
 
-        # Initialize return dataframe
-        self.return_df = pd.DataFrame(columns=list(instr_df.columns.values))
+        # Initialize returned rows
+        self.return_rows = []
+
+        # Rows (end, channels, comment) of each start time, in the order of the records
+        self.rows_by_start = {}
+        for start, end, channels, comment in zip(instr_df['start'].tolist(),
+                                                 instr_df['end'].tolist(),
+                                                 instr_df['channels'].tolist(),
+                                                 instr_df['comments'].tolist()):
+            self.rows_by_start.setdefault(start, []).append((end, channels, comment))
 
         # Create lists for start and end times
-        end_times = []
-        start_times = list(np.unique(self.instr_df['start'].values))
-        start_times.sort(key=int)
-        for start in start_times:
-            end_times.append(self.instr_df.loc[self.instr_df['start'] == start]['end'].values[0])
+        start_times = sorted(self.rows_by_start, key=int)
+        end_times = [self.rows_by_start[start][0][0] for start in start_times]
 
-        done = []
+        done = set()
         for idx in range(len(start_times)):
             main_start = start_times[idx]
             main_end = end_times[idx]
@@ -62,80 +63,74 @@ class GSIRecordParser:
             if main_start in done:
                 continue
 
-            start_df = self.instr_df.loc[self.instr_df['start'] == main_start]
-            if (len(start_df) == 1):
+            start_rows = self.rows_by_start[main_start]
+            if (len(start_rows) == 1):
                 # Only one row to process
-                channel_list = eval(start_df['channels'].values[0])
-                comment = start_df['comments'].values[0]
-                self.update_return_df(main_start, main_end, channel_list, comment)
-                done.append(main_start)
+                _, channel_list, comment = start_rows[0]
+                self.update_return_df(main_start, main_end, list(channel_list), comment)
+                done.add(main_start)
 
-            elif len(np.unique(start_df['end'].values)) == 1:
+            elif len(set([end for end, _, _ in start_rows])) == 1:
                 # Collect channels and update dataframe with row
                 channel_list = self.get_channel_list(main_start)
                 self.update_return_df(main_start, main_end, channel_list, '')
-                done.append(main_start)
+                done.add(main_start)
 
             else:
                 # Collect all channels for main start time
                 channel_list = self.get_channel_list(main_start)
 
-                inner_start = []
-                inner_end = []
                 # Get list of remaining start times that fall in range of start and end
-                for inner_idx in range(idx+1, len(start_times)):
-                    if (int(start_times[inner_idx]) >= int(main_start)) and \
-                       (int(start_times[inner_idx]) <= int(main_end)):
-                        inner_start.append(start_times[inner_idx])
-                        inner_end.append(end_times[inner_idx])
+                inner_times = [(start, end) for start, end in zip(start_times[idx+1:],
+                                                                  end_times[idx+1:])
+                               if int(main_start) <= int(start) <= int(main_end)]
 
                 # Update df for start to first start with all channels
-                new_end = str(int(inner_start[0]))
+                new_end = str(int(inner_times[0][0]))
                 self.update_return_df(main_start, new_end, channel_list, '')
 
                 # Get channel list for main start/ main end time
-                row_channel_list = start_df.loc[start_df["end"] != main_end]["channels"].values[0]
+                row_channel_list = [channels for end, channels, _ in start_rows
+                                    if end != main_end][0]
 
-                for inner_idx in range(len(inner_start)):
+                for inner_start, inner_end in inner_times:
                     # Compare channels from next time range
-                    row = self.instr_df.loc[self.instr_df["start"] == inner_start[inner_idx]]
-                    compare_channels = row["channels"].values[0]
+                    _, compare_channels, comment = self.rows_by_start[inner_start][0]
 
-                    # Turn channels on or off
+                    # Turn channels on or off, comparing channel numbers. Records generated
+                    # when the characters of the channel lists were compared instead, and
+                    # appended in place, differ here: they could drop multi-digit channels,
+                    # gain entries such as ',' and ' ', and change the earlier time range.
                     if (len(row_channel_list) > len(compare_channels)):
                         # Turn off
-                        turn_off = list(set(row_channel_list) - set(compare_channels))
+                        turn_off = set(row_channel_list) - set(compare_channels)
                         channel_list = [x for x in channel_list if x not in turn_off]
                     else:
                         # Turn on
-                        turn_on = list(set(compare_channels) - set(row_channel_list))
-                        channel_list += turn_on
+                        turn_on = set(compare_channels) - set(row_channel_list)
+                        channel_list = channel_list + sorted(turn_on - set(channel_list),
+                                                             key=int)
 
                     # Update row
-                    comment = row['comments'].values[0]
-                    # pass dictionary to update return df
-                    self.update_return_df(inner_start[inner_idx], inner_end[inner_idx],
-                                          channel_list, comment)
-                    done.append(inner_start[inner_idx])
+                    self.update_return_df(inner_start, inner_end, channel_list, comment)
+                    done.add(inner_start)
 
     def update_return_df(self, start: str, end: str, channel_list: list, comment: str) -> None:
 
         # Fix end time if on the 24 hour mark
         end = check_end_time(end)
 
-        new_row = pd.DataFrame.from_dict({
-                  'sat': [self.sat],
-                  'start': [start],
-                  'end': [end],
-                  'instr': [self.instr],
-                  'channel_num': [len(channel_list)],
-                  'channels': [channel_list],
-                  'comments': [comment]})
-
-        self.return_df = pd.concat([self.return_df, new_row], ignore_index=True)
+        self.return_rows.append({
+                  'sat': self.sat,
+                  'start': start,
+                  'end': end,
+                  'instr': self.instr,
+                  'channel_num': len(channel_list),
+                  'channels': channel_list,
+                  'comments': comment})
 
     def get_instr_df(self) -> pd.DataFrame:
 
         ''' Returns the dataframe that the state machine generated! '''
 
-        return self.return_df
+        return pd.DataFrame(self.return_rows, columns=list(self.instr_df.columns.values))
@@ -7,9 +7,14 @@
 # --------------------------------------------------------------------------------------------------
 
 from __future__ import annotations
-from typing import Union
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from typing import Optional, Union
 
 import jinja2 as j2
+from jinja2 import meta
 
 from swell.utilities.logger import Logger
 
@@ -55,24 +60,122 @@ class SilentUndefined(j2.Undefined):
 # --------------------------------------------------------------------------------------------------
 
 
-def template_string_jinja2(
-    logger: Logger,
-    templated_string: str,
-    dictionary_of_templates: dict,
-    allow_unresolved: bool = False
-) -> str:
+# Compiled templates kept by each environment, keyed by the hash of the template text
+template_cache_size = 128
+
+# Directory of the on-disk bytecode cache shared by the processes of an experiment, not used when
+# the variable is unset or empty
+bytecode_cache_variable = 'SWELL_JINJA2_CACHE_DIR'
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class StringLoader(j2.BaseLoader):
+
+    """
+    Loader of templates given as strings and named by the hash of their text. Loading templates
+    through a loader, rather than with from_string, lets the environment keep the compiled
+    templates and use the bytecode cache.
+    """
+
+    def __init__(self) -> None:
+        self.sources = {}
+        self.lock = threading.Lock()
+
+    def get_source(self, environment: j2.Environment, template: str) -> tuple:
+        if template not in self.sources:
+            raise j2.TemplateNotFound(template)
+
+        # The name is the hash of the text so a loaded template is always up to date
+        return self.sources[template], None, lambda: True
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=None)
+def jinja2_environment(
+    allow_unresolved: bool = False,
+    bytecode_cache_dir: Optional[str] = None
+) -> j2.Environment:
 
     # Handling of templates that cannot be resolved
     # ---------------------------------------------
     undefined = SilentUndefined if allow_unresolved else j2.StrictUndefined
 
-    # Create the Jinja2 environment
-    # -----------------------------
-    env = j2.Environment(undefined=undefined)
+    # Optional bytecode cache on disk, Jinja2 checks the entries against the template source
+    # --------------------------------------------------------------------------------------
+    bytecode_cache = None
+    if bytecode_cache_dir:
+        try:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = j2.FileSystemBytecodeCache(bytecode_cache_dir)
+        except OSError:
+            pass
 
-    # Load the algorithm template
-    # ---------------------------
-    template = env.from_string(templated_string)
+    # One Jinja2 environment per process, handling of undefined templates and bytecode cache
+    # --------------------------------------------------------------------------------------
+    return j2.Environment(undefined=undefined, loader=StringLoader(),
+                          cache_size=template_cache_size, bytecode_cache=bytecode_cache,
+                          auto_reload=False)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def shared_environment_jinja2(allow_unresolved: bool = False) -> j2.Environment:
+
+    # Environment of the process for the policy, with the bytecode cache of the experiment if set
+    # -------------------------------------------------------------------------------------------
+    return jinja2_environment(allow_unresolved, os.environ.get(bytecode_cache_variable) or None)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def cached_template_jinja2(templated_string: str, allow_unresolved: bool = False) -> j2.Template:
+
+    # Compiled template for the text, from the environment, from the bytecode cache or compiled
+    # -----------------------------------------------------------------------------------------
+    env = shared_environment_jinja2(allow_unresolved)
+    name = hashlib.sha256(templated_string.encode()).hexdigest()
+
+    # The source is only kept while the template is loaded
+    with env.loader.lock:
+        env.loader.sources[name] = templated_string
+        try:
+            return env.get_template(name)
+        finally:
+            del env.loader.sources[name]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def compile_template_jinja2(
+    templated_string: str,
+    allow_unresolved: bool = False
+) -> tuple[j2.Template, frozenset]:
+
+    # Parse the template once, it is compiled from the syntax tree that also provides the names
+    # of the variables the template uses
+    # ------------------------------------------------------------------------------------------
+    env = shared_environment_jinja2(allow_unresolved)
+    syntax_tree = env.parse(templated_string)
+
+    return env.from_string(syntax_tree), frozenset(meta.find_undeclared_variables(syntax_tree))
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def render_template_jinja2(
+    logger: Logger,
+    template: j2.Template,
+    dictionary_of_templates: dict,
+    allow_unresolved: bool = False
+) -> str:
 
     # Render the template hierarchy
     # -----------------------------
@@ -82,11 +185,10 @@ def template_string_jinja2(
         logger.abort('Resolving templates for templated_string failed with the following ' +
                      f'exception: {e}')
 
-    # Extra safety checks
-    # -------------------
-    if not allow_unresolved:
-        logger.assert_abort(
-            not (('{{' in string_rendered) or ('}}' in string_rendered)),
+    # Extra safety checks, the message with the rendered string is only built on failure
+    # ---------------------------------------------------------------------------------
+    if not allow_unresolved and ('{{' in string_rendered or '}}' in string_rendered):
+        logger.abort(
             f"""
             In template_string_jinja2, the output string still contains template directives:
             '''
@@ -99,3 +201,22 @@ def template_string_jinja2(
 
 
 # --------------------------------------------------------------------------------------------------
+
+
+def template_string_jinja2(
+    logger: Logger,
+    templated_string: str,
+    dictionary_of_templates: dict,
+    allow_unresolved: bool = False
+) -> str:
+
+    # Load the algorithm template
+    # ---------------------------
+    template = cached_template_jinja2(templated_string, allow_unresolved)
+
+    # Render the template hierarchy
+    # -----------------------------
+    return render_template_jinja2(logger, template, dictionary_of_templates, allow_unresolved)
+
+
+# --------------------------------------------------------------------------------------------------
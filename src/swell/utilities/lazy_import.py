@@ -0,0 +1,47 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package lazy_import
+#
+#  Every task is a separate process started by cylc so anything imported at startup is paid for
+#  thousands of times per experiment. Modules returned by lazy_import are only executed when one
+#  of their attributes is first used, which keeps expensive packages (netCDF4, jinja2, ...) off
+#  the startup path of the tasks that never need them.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+def lazy_import(name: str) -> ModuleType:
+
+    # Modules that are already imported are returned as they are
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'No module named \'{name}\'', name=name)
+
+    # Register a module that executes itself on first attribute access
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    return module
+
+
+# --------------------------------------------------------------------------------------------------
@@ -8,12 +8,283 @@
 # --------------------------------------------------------------------------------------------------
 
 
+import numpy as np
 import os
-import xarray as xr
-from typing import Hashable, Union
+import netCDF4 as nc
+from contextlib import ExitStack
+from typing import Optional
 
 from swell.utilities.logger import Logger
 
+
+# --------------------------------------------------------------------------------------------------
+
+# Dimensions used for the observation locations in IODA (v3 and older) and GeoVaLs files
+location_dimensions = ['Location', 'nlocs']
+
+# Size assumed for the elements of variable length (string) variables when bounding memory
+vlen_element_bytes = 64
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def create_variable_like(
+    out_group: nc.Dataset,
+    in_var: nc.Variable,
+    zlib: Optional[bool] = None,
+    complevel: Optional[int] = None,
+    chunksizes: Optional[list] = None,
+    dimensions: Optional[tuple] = None,
+    fill_missing: bool = False
+) -> nc.Variable:
+
+    # Create a variable with the type, dimensions, fill value and attributes of in_var. The
+    # compression of in_var is kept unless zlib/complevel are given. Data are handled raw.
+    # With fill_missing, numeric variables without a fill value get the default one of netCDF
+    # as attribute, so the parts of the variable that are never written read as missing.
+    # -----------------------------------------------------------------------------------
+
+    # Fill value needs to be assigned while creating variables
+    fill_value = None
+    if '_FillValue' in in_var.ncattrs():
+        fill_value = in_var.getncattr('_FillValue')
+    elif fill_missing and isinstance(in_var.dtype, np.dtype):
+        fill_value = nc.default_fillvals.get(in_var.dtype.str[1:])
+
+    filters = in_var.filters() or {}
+    if zlib is None:
+        zlib = filters.get('zlib', False)
+    if complevel is None:
+        complevel = filters.get('complevel', 4)
+
+    if dimensions is None:
+        dimensions = in_var.dimensions
+
+    out_var = out_group.createVariable(in_var.name, in_var.datatype, dimensions,
+                                       zlib=zlib, complevel=complevel,
+                                       shuffle=filters.get('shuffle', True),
+                                       chunksizes=chunksizes, fill_value=fill_value)
+    out_var.set_auto_maskandscale(False)
+    out_var.setncatts({name: in_var.getncattr(name) for name in in_var.ncattrs()
+                       if name != '_FillValue'})
+
+    return out_var
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def find_dimension_size(group: nc.Dataset, dim_name: str) -> int:
+
+    # Size of a dimension defined in the group or any of its sub groups (0 if not found)
+    if dim_name in group.dimensions:
+        return group.dimensions[dim_name].size
+    for sub_group in group.groups.values():
+        size = find_dimension_size(sub_group, dim_name)
+        if size:
+            return size
+    return 0
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def visible_dimension(group: nc.Dataset, dim_name: str) -> nc.Dimension:
+
+    # Dimension seen by the variables of a group, i.e. defined in the group or in a parent group
+    while dim_name not in group.dimensions:
+        group = group.parent
+    return group.dimensions[dim_name]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def concatenate_groups(
+    logger: Logger,
+    in_groups: list,
+    out_group: nc.Dataset,
+    concat_dim: str,
+    offsets: list,
+    sizes: list,
+    max_chunk_bytes: int,
+    zlib: Optional[bool],
+    complevel: Optional[int],
+    chunk_sizes: Optional[dict],
+    broadcast: bool
+) -> None:
+
+    # The same group in every input, None for the inputs that do not have it
+    present_groups = [group for group in in_groups if group is not None]
+
+    # Attributes from the first input with the group
+    first_group = present_groups[0]
+    out_group.setncatts({name: first_group.getncattr(name) for name in first_group.ncattrs()})
+
+    # Dimensions, the concatenation dimension is the sum of the inputs, the others must agree
+    # ---------------------------------------------------------------------------------------
+    for group in present_groups:
+        for dim_name, dim in group.dimensions.items():
+            if dim_name == concat_dim:
+                size = sum(sizes)
+            else:
+                size = dim.size
+            if dim_name in out_group.dimensions:
+                if dim_name != concat_dim and not dim.isunlimited():
+                    logger.assert_abort(out_group.dimensions[dim_name].size == size,
+                                        f'Dimension {dim_name} of group {out_group.path} ' +
+                                        'differs between the files being concatenated.')
+                continue
+            out_group.createDimension(dim_name, None if dim.isunlimited() else size)
+
+    # Variables, the union of the variables of all the inputs. Parts of the concatenation
+    # dimension coming from an input without the variable keep the fill value.
+    # -----------------------------------------------------------------------------------
+    var_names = []
+    for group in present_groups:
+        var_names += [name for name in group.variables if name not in var_names]
+
+    for var_name in var_names:
+
+        in_vars = [None if group is None or var_name not in group.variables else
+                   group.variables[var_name] for group in in_groups]
+        template_var = next(var for var in in_vars if var is not None)
+
+        # Variables without the concatenation dimension come from the first input, or are
+        # repeated along the concatenation dimension for every input when broadcasting
+        dimensions = template_var.dimensions
+        broadcast_var = concat_dim not in dimensions and broadcast
+        if broadcast_var:
+            dimensions = (concat_dim,) + dimensions
+
+        # Chunking of the output when requested
+        chunksizes = None
+        if chunk_sizes is not None and dimensions:
+            dim_sizes = [len(visible_dimension(out_group, d)) for d in dimensions]
+            if all(dim_sizes):
+                chunksizes = [min(chunk_sizes.get(d, size), size)
+                              for d, size in zip(dimensions, dim_sizes)]
+
+        out_var = create_variable_like(out_group, template_var, zlib, complevel, chunksizes,
+                                       dimensions, fill_missing=None in in_vars)
+
+        if concat_dim not in dimensions:
+            out_var[...] = template_var[...]
+            continue
+
+        # Number of elements along the concatenation dimension copied at once
+        axis = dimensions.index(concat_dim)
+        row_size = int(np.prod([size for i, size in enumerate(out_var.shape) if i != axis]))
+        if isinstance(template_var.dtype, np.dtype):
+            row_bytes = max(1, row_size*template_var.dtype.itemsize)
+        else:
+            row_bytes = max(1, row_size*vlen_element_bytes)
+        chunk_rows = max(1, max_chunk_bytes // row_bytes)
+
+        # Stream the slab of each input into its offset of the output
+        for in_var, offset, size in zip(in_vars, offsets, sizes):
+            if in_var is None:
+                continue
+            value = in_var[...] if broadcast_var else None
+            for start in range(0, size, chunk_rows):
+                stop = min(start + chunk_rows, size)
+                out_index = [slice(None)]*len(dimensions)
+                out_index[axis] = slice(offset + start, offset + stop)
+                if broadcast_var:
+                    out_var[tuple(out_index)] = np.broadcast_to(value, (stop - start,) +
+                                                                np.shape(value))
+                    continue
+                in_index = [slice(None)]*len(dimensions)
+                in_index[axis] = slice(start, stop)
+                out_var[tuple(out_index)] = in_var[tuple(in_index)]
+
+    # Recurse into the union of the sub groups
+    # ----------------------------------------
+    sub_group_names = []
+    for group in present_groups:
+        sub_group_names += [name for name in group.groups if name not in sub_group_names]
+
+    for sub_group_name in sub_group_names:
+        in_sub_groups = [None if group is None else group.groups.get(sub_group_name)
+                         for group in in_groups]
+        concatenate_groups(logger, in_sub_groups, out_group.createGroup(sub_group_name),
+                           concat_dim, offsets, sizes, max_chunk_bytes, zlib, complevel,
+                           chunk_sizes, broadcast)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def concatenate_files(
+    logger: Logger,
+    input_files: list,
+    output_file: str,
+    concat_dim: str = 'Location',
+    max_chunk_bytes: int = 64*1024*1024,
+    zlib: Optional[bool] = None,
+    complevel: Optional[int] = None,
+    chunk_sizes: Optional[dict] = None,
+    delete_input: bool = False,
+    broadcast: bool = False
+) -> None:
+
+    """
+    Concatenate netCDF files along concat_dim, e.g. IODA observation files along Location or
+    GeoVaLs files along nlocs, into output_file.
+
+    Groups are handled at any depth. The output contains the union of the groups and variables
+    of the inputs: variables with concat_dim are concatenated (in the order of input_files),
+    other variables and all attributes come from the first input that has them, and parts of a
+    variable coming from an input without that variable are left to the fill value. The other
+    dimensions must be the same in every input. With broadcast, variables without concat_dim
+    are instead given concat_dim as first dimension and repeated for every input, as
+    xarray.concat does.
+
+    Each input is opened once and data are streamed in slabs of at most max_chunk_bytes, so
+    memory does not grow with the size of the files. Compression of the inputs is kept unless
+    zlib (and complevel) are given, chunk_sizes optionally maps dimension names to the chunk
+    size used for the output variables.
+    """
+
+    logger.info(f'Concatenating {len(input_files)} file(s) along {concat_dim} into ' +
+                f'{output_file}')
+    for input_file in input_files:
+        logger.info(f' - {input_file}', False)
+
+    logger.assert_abort(len(input_files) > 0, f'No input files to concatenate into {output_file}')
+
+    # Write to a temporary file so an output that is also an input is handled
+    tmp_file = f'{output_file}.concatenate.{os.getpid()}'
+
+    try:
+        with ExitStack() as stack:
+
+            in_datasets = [stack.enter_context(nc.Dataset(f, 'r')) for f in input_files]
+            for in_dataset in in_datasets:
+                in_dataset.set_auto_maskandscale(False)
+
+            # Size and offset of each input along the concatenation dimension
+            sizes = [find_dimension_size(ds, concat_dim) for ds in in_datasets]
+            offsets = [int(offset) for offset in np.cumsum([0] + sizes[:-1])]
+
+            out_dataset = stack.enter_context(nc.Dataset(tmp_file, 'w'))
+            concatenate_groups(logger, in_datasets, out_dataset, concat_dim, offsets, sizes,
+                               max_chunk_bytes, zlib, complevel, chunk_sizes, broadcast)
+
+        os.replace(tmp_file, output_file)
+
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+    # Delete the input files if requested
+    if delete_input:
+        for input_file in input_files:
+            if os.path.exists(input_file) and input_file != output_file:
+                os.remove(input_file)
+
+
 # --------------------------------------------------------------------------------------------------
 
 
@@ -21,29 +292,107 @@ def combine_files_without_groups(
     logger: Logger,
     list_of_input_files: list,
     output_file: str,
-    concat_dim: Union[Hashable, xr.Variable, xr.DataArray],
+    concat_dim: str,
     delete_input: bool = False
 ) -> None:
 
-    # Write some information
-    logger.info('Combining the following netCDF files (using no-group combine): ')
-    for f in list_of_input_files:
-        logger.info(f' - {f}', False)
-    logger.info(f'Writing to file {output_file}')
+    # Kept for existing callers, files without groups are a special case of concatenate_files.
+    # Variables without concat_dim are broadcast like the xarray.concat this used to call.
+    concatenate_files(logger, list_of_input_files, output_file, concat_dim,
+                      delete_input=delete_input, broadcast=True)
 
-    # Load the files as Xarray datasets
-    datasets = [xr.open_dataset(f) for f in list_of_input_files]
 
-    # Concatenate the datasets along the 'nlocs' dimension
-    concatenated_ds = xr.concat(datasets, dim=concat_dim)
+# --------------------------------------------------------------------------------------------------
 
-    # Write the concatenated dataset to a new file
-    concatenated_ds.to_netcdf(output_file)
 
-    # Delete the input files if requested
-    if delete_input:
-        for f in list_of_input_files:
-            os.remove(f)
+def copy_group_subset(
+    in_group: nc.Dataset,
+    out_group: nc.Dataset,
+    location_slice: slice,
+    location_dims: list
+) -> None:
+
+    # Attributes of the group
+    out_group.setncatts({name: in_group.getncattr(name) for name in in_group.ncattrs()})
+
+    # Dimensions, the location dimensions are reduced to the size of the slice
+    for dim_name, dim in in_group.dimensions.items():
+        if dim_name in location_dims:
+            size = len(range(dim.size)[location_slice])
+        else:
+            size = None if dim.isunlimited() else dim.size
+        out_group.createDimension(dim_name, size)
+
+    # Variables, only the slab of the requested locations is read from the input
+    for in_var in in_group.variables.values():
+
+        in_var.set_auto_maskandscale(False)
+        out_var = create_variable_like(out_group, in_var)
+
+        if len(in_var.dimensions) == 0:
+            out_var[...] = in_var[...]
+            continue
+
+        index = tuple(location_slice if dim_name in location_dims else slice(None)
+                      for dim_name in in_var.dimensions)
+        out_var[...] = in_var[index]
+
+    # Recurse into the sub groups
+    for group_name, in_sub_group in in_group.groups.items():
+        copy_group_subset(in_sub_group, out_group.createGroup(group_name), location_slice,
+                          location_dims)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def subset_locations(
+    logger: Logger,
+    input_file: str,
+    start: int,
+    stop: int,
+    output_file: Optional[str] = None,
+    location_dims: list = location_dimensions
+) -> None:
+
+    """
+    Write the locations start to stop (exclusive) of a netCDF file, e.g. an IODA observation or a
+    GeoVaLs file, to output_file. The file is rewritten in place when output_file is not given.
+
+    All the groups, dimensions, attributes and variables of the input are kept. Every dimension
+    named in location_dims (Location and nlocs by default) is reduced to the requested range in
+    all the groups and only that slab of the variables is read from the input file.
+    """
+
+    logger.info(f'Subsetting locations {start} to {stop} of {input_file}')
+
+    # Write to a temporary file next to the final one so it can replace the input
+    final_file = output_file if output_file is not None else input_file
+    tmp_file = f'{final_file}.subset.{os.getpid()}'
+
+    try:
+        with nc.Dataset(input_file, 'r') as in_ds, nc.Dataset(tmp_file, 'w') as out_ds:
+            copy_group_subset(in_ds, out_ds, slice(start, stop), location_dims)
+        os.replace(tmp_file, final_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def subset_locations_in_files(
+    logger: Logger,
+    input_files: list,
+    start: int,
+    stop: int,
+    location_dims: list = location_dimensions
+) -> None:
+
+    # Subset many files in place in a single pass, e.g. to make single observation files
+    for input_file in input_files:
+        subset_locations(logger, input_file, start, stop, location_dims=location_dims)
 
 
 # --------------------------------------------------------------------------------------------------
@@ -0,0 +1,317 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Generator, Optional
+
+from swell.utilities.file_signature import file_checksum
+from swell.utilities.logger import Logger
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package observation_cache
+#
+#  Local content-addressed cache of files fetched from R2D2 that can be shared by all the
+#  experiments running on a platform.
+#
+#  Layout of the cache directory:
+#
+#    objects/<sha[:2]>/<sha>  Unique file contents, named by their sha256 checksum
+#    index.json               Fetch key -> object checksum, size and last use time
+#    index.lock               Lock file serializing updates of the index
+#    tmp/                     Fetches in progress
+#
+# --------------------------------------------------------------------------------------------------
+
+
+def materialize_file(src: str, dst: str) -> None:
+
+    # Hard link the cached file into place, copy it when linking is not possible (e.g. the
+    # destination is on a different file system)
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class ObservationCache:
+
+    """
+    Cache in front of an R2D2-like fetch function.
+
+    Fetches are identified by their keyword arguments (obs_type, provider, experiment, date,
+    time_window, ...) without the target file. The first time a key is requested the file is
+    fetched into the cache, then it is linked into the target location. Later requests of the
+    same key, from any experiment using the same cache path, only link the cached file. Identical
+    contents fetched under different keys are stored once. Files derived from cached files can be
+    stored too, keyed by the checksums of their inputs.
+
+    Cached files are read-only and shared, through the links, by every experiment using them so
+    they must never be modified in place; copy a file that needs to be written to. The checksum
+    of a file is computed when it enters the cache. A hit only checks the size and modification
+    time recorded then, the checksum is verified again when they differ, or on every hit with
+    verify_checksums.
+
+    The cache is bounded by max_size_bytes, least recently used entries are evicted first.
+    Missing files (fetches with ignore_missing that produce nothing) are never cached.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        cache_path: str,
+        max_size_bytes: int,
+        fetcher: Callable,
+        verify_checksums: bool = False
+    ) -> None:
+
+        self.logger = logger
+        self.cache_path = cache_path
+        self.max_size_bytes = max_size_bytes
+        self.fetcher = fetcher
+        self.verify_checksums = verify_checksums
+
+        self.objects_path = os.path.join(cache_path, 'objects')
+        self.tmp_path = os.path.join(cache_path, 'tmp')
+        self.index_file = os.path.join(cache_path, 'index.json')
+        self.lock_file = os.path.join(cache_path, 'index.lock')
+
+        os.makedirs(self.objects_path, exist_ok=True)
+        os.makedirs(self.tmp_path, exist_ok=True)
+
+    # ----------------------------------------------------------------------------------------------
+
+    @staticmethod
+    def key(fetch_args: dict) -> str:
+
+        # The key is independent of where the file is written and of how missing files are handled
+        key_args = {k: v for k, v in fetch_args.items()
+                    if k not in ['target_file', 'ignore_missing']}
+        return json.dumps(key_args, sort_keys=True, default=str)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def object_path(self, checksum: str) -> str:
+
+        return os.path.join(self.objects_path, checksum[:2], checksum)
+
+    # ----------------------------------------------------------------------------------------------
+
+    @contextmanager
+    def locked_index(self) -> Generator[dict, None, None]:
+
+        # Hold an exclusive lock while the index is read, modified and written back. The lock is
+        # taken on a new open file so that it also serializes threads of the same process.
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = {}
+                if os.path.exists(self.index_file):
+                    with open(self.index_file, 'r') as fh:
+                        index = json.load(fh)
+                yield index
+                tmp_index_file = self.index_file + f'.{os.getpid()}'
+                with open(tmp_index_file, 'w') as fh:
+                    json.dump(index, fh, indent=1, sort_keys=True)
+                os.replace(tmp_index_file, self.index_file)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def lookup(self, key: str, target_file: str) -> bool:
+
+        # Materialize the cached object for key at target_file and return True when it exists,
+        # entries whose object is missing or no longer matches its checksum are dropped
+        with self.locked_index() as index:
+            entry = index.get(key)
+        if entry is None:
+            return False
+
+        # An object with the size and modification time it was stored with is trusted, otherwise
+        # it is verified without holding the lock, hashing large files takes a while
+        cached_file = self.object_path(entry['checksum'])
+        try:
+            stat = os.stat(cached_file)
+            valid = not self.verify_checksums and stat.st_size == entry['size'] and \
+                stat.st_mtime_ns == entry.get('mtime_ns')
+            if not valid:
+                valid = file_checksum(cached_file) == entry['checksum']
+        except FileNotFoundError:
+            valid = False
+
+        with self.locked_index() as index:
+            entry = index.get(key)
+            if entry is None or self.object_path(entry['checksum']) != cached_file:
+                return False
+
+            if not valid or not os.path.exists(cached_file):
+                self.logger.info(f'Cached file {cached_file} is missing or corrupted, fetching ' +
+                                 'it again')
+                del index[key]
+                if os.path.exists(cached_file):
+                    os.remove(cached_file)
+                return False
+
+            materialize_file(cached_file, target_file)
+            entry['last_used'] = time.time()
+            entry['mtime_ns'] = os.stat(cached_file).st_mtime_ns
+            return True
+
+    # ----------------------------------------------------------------------------------------------
+
+    def cached_checksum(self, stat: os.stat_result, checksums: set) -> Optional[str]:
+
+        # Checksum of a file materialized from the cache, i.e. a link to one of the objects with
+        # the same size that was not modified since it was stored, None for any other file
+        for checksum in checksums:
+            try:
+                object_stat = os.stat(self.object_path(checksum))
+            except FileNotFoundError:
+                continue
+            if (object_stat.st_dev, object_stat.st_ino, object_stat.st_mtime_ns) == \
+               (stat.st_dev, stat.st_ino, stat.st_mtime_ns):
+                return checksum
+        return None
+
+    # ----------------------------------------------------------------------------------------------
+
+    def product_key(self, operation: str, input_files: list, **parameters) -> str:
+
+        # Files derived from other files are keyed by the operation, the checksums of the inputs
+        # (in order, missing inputs are skipped) and any parameter of the operation. Inputs
+        # linked from the cache take the checksum recorded in the index, only the others are
+        # hashed.
+        with self.locked_index() as index:
+            checksums_by_size = {}
+            for entry in index.values():
+                checksums_by_size.setdefault(entry['size'], set()).add(entry['checksum'])
+
+        input_checksums = []
+        for input_file in input_files:
+            try:
+                stat = os.stat(input_file)
+            except FileNotFoundError:
+                continue
+            checksum = self.cached_checksum(stat, checksums_by_size.get(stat.st_size, set()))
+            input_checksums.append(checksum or file_checksum(input_file))
+
+        return json.dumps({'operation': operation, 'inputs': input_checksums, **parameters},
+                          sort_keys=True, default=str)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def insert(self, key: str, new_file: str, target_file: str) -> None:
+
+        # Move a new file (located in the cache) into the object store, read-only, record it in
+        # the index and materialize it at target_file. The checksum is only computed here.
+        checksum = file_checksum(new_file)
+        cached_file = self.object_path(checksum)
+        os.makedirs(os.path.dirname(cached_file), exist_ok=True)
+
+        with self.locked_index() as index:
+            if os.path.exists(cached_file):
+                os.remove(new_file)
+            else:
+                os.chmod(new_file, 0o444)
+                os.replace(new_file, cached_file)
+            stat = os.stat(cached_file)
+            index[key] = {'checksum': checksum,
+                          'size': stat.st_size,
+                          'mtime_ns': stat.st_mtime_ns,
+                          'last_used': time.time()}
+            self.evict(index, keep=key)
+            materialize_file(cached_file, target_file)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def evict(self, index: dict, keep: str) -> None:
+
+        # Size of the cache counting every object once
+        object_sizes = {entry['checksum']: entry['size'] for entry in index.values()}
+        cache_size = sum(object_sizes.values())
+
+        # Drop least recently used entries, and their object once no entry refers to it
+        for key in sorted(index, key=lambda k: index[k]['last_used']):
+            if cache_size <= self.max_size_bytes:
+                break
+            if key == keep:
+                continue
+            checksum = index.pop(key)['checksum']
+            if not any(entry['checksum'] == checksum for entry in index.values()):
+                cache_size -= object_sizes[checksum]
+                cached_file = self.object_path(checksum)
+                if os.path.exists(cached_file):
+                    os.remove(cached_file)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def fetch(self, **fetch_args) -> None:
+
+        """
+        Drop-in replacement for the fetch function: same keyword arguments, the file ends up at
+        fetch_args['target_file'] (unless it is missing and ignore_missing is set).
+        """
+
+        target_file = fetch_args['target_file']
+        key = self.key(fetch_args)
+
+        # Cache hit
+        # ---------
+        if self.lookup(key, target_file):
+            self.logger.info(f'Using cached copy of {os.path.basename(target_file)}')
+            return
+
+        # Cache miss, fetch into the cache outside of the lock so fetches can run concurrently
+        # ----------------------------------------------------------------------------------
+        fd, fetched_file = tempfile.mkstemp(dir=self.tmp_path)
+        os.close(fd)
+        os.remove(fetched_file)
+        try:
+            self.fetcher(**{**fetch_args, 'target_file': fetched_file})
+            if not os.path.exists(fetched_file):
+                return
+            self.insert(key, fetched_file, target_file)
+        finally:
+            if os.path.exists(fetched_file):
+                os.remove(fetched_file)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def store_product(self, key: str, product_file: str) -> None:
+
+        """
+        Add a file produced from other files (e.g. observations combined over the DA window) to
+        the cache under a key from product_key. The product is then shared with the cache and
+        becomes read-only.
+        """
+
+        fd, new_file = tempfile.mkstemp(dir=self.tmp_path)
+        os.close(fd)
+        try:
+            materialize_file(product_file, new_file)
+            self.insert(key, new_file, product_file)
+        finally:
+            if os.path.exists(new_file):
+                os.remove(new_file)
+
+
+# --------------------------------------------------------------------------------------------------
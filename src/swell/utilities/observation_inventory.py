@@ -0,0 +1,289 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import fcntl
+import json
+import os
+import tempfile
+from typing import Optional
+
+import netCDF4 as nc
+
+from swell.utilities.file_signature import file_checksum
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package observation_inventory
+#
+#  Inventory of the observation files of a cycle. The number of locations and the channels of a
+#  file are read from its header once and kept, with the size and modification time of the file,
+#  in a manifest in the directory of the file (observation_inventory.json in the cycle directory).
+#  The tasks that create the observation files (GetObservations, GsiNcdiagToIoda) record them with
+#  their checksum and the R2D2 keys they were fetched with. Every later task of the cycle then
+#  answers from the manifest, a file is only opened again when it changed.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+inventory_file = 'observation_inventory.json'
+inventory_lock_file = 'observation_inventory.lock'
+inventory_version = 2
+
+# Inventories loaded by this process, by directory
+inventories = {}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def read_header(path: str) -> dict:
+
+    # Only the metadata and the channel coordinate are read, the handle is closed before returning
+    with nc.Dataset(path, 'r') as dataset:
+        dimension = dataset.dimensions.get('Location')
+        locations = 0 if dimension is None else dimension.size
+        channels = None
+        if 'Channel' in dataset.variables:
+            channels = [int(channel) for channel in dataset.variables['Channel'][:]]
+
+    return {'locations': locations, 'channels': channels}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def read_inventory(inventory_path: str) -> dict:
+
+    try:
+        with open(inventory_path, 'r') as f:
+            inventory = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if inventory.get('version') != inventory_version:
+        return {}
+
+    return inventory['files']
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class ObservationInventory():
+
+    def __init__(self, directory: str) -> None:
+
+        self.directory = directory
+        self.inventory_path = os.path.join(directory, inventory_file)
+        self.lock_path = os.path.join(directory, inventory_lock_file)
+
+        # File name -> size, modification time, number of locations and channels. Files recorded
+        # by the task that created them also have their checksum and sources.
+        self.files = read_inventory(self.inventory_path)
+        self.updated = {}
+
+    # ----------------------------------------------------------------------------------------------
+
+    def entry(self, path: str, validate: bool = True) -> Optional[dict]:
+
+        """
+        Entry of a file of the directory, None when the file does not exist. Without validate the
+        entries recorded by the task that created the file are trusted and the file system is not
+        accessed, other files are still checked.
+        """
+
+        name = os.path.basename(path)
+        entry = self.files.get(name)
+        if entry is not None and not validate and 'sources' in entry:
+            return entry
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        # The checksum and sources of a file that changed since it was recorded no longer apply
+        if entry is None or entry['size'] != stat.st_size or \
+           entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, **read_header(path)}
+            self.files[name] = entry
+            self.updated[name] = entry
+
+        return entry
+
+    # ----------------------------------------------------------------------------------------------
+
+    def record(self, path: str, sources: Optional[list] = None) -> dict:
+
+        """
+        Record a file created by the calling task, with its checksum and the keys of the sources
+        it was created from.
+        """
+
+        stat = os.stat(path)
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, **read_header(path),
+                 'sha256': file_checksum(path), 'sources': sources or []}
+
+        name = os.path.basename(path)
+        self.files[name] = entry
+        self.updated[name] = entry
+
+        return entry
+
+    # ----------------------------------------------------------------------------------------------
+
+    def observation_files(self) -> list:
+
+        # Paths of the files recorded in the manifest
+        return [os.path.join(self.directory, name) for name in sorted(self.files)]
+
+    # ----------------------------------------------------------------------------------------------
+
+    def locations(self, path: str, validate: bool = True) -> Optional[int]:
+
+        entry = self.entry(path, validate)
+        return None if entry is None else entry['locations']
+
+    # ----------------------------------------------------------------------------------------------
+
+    def channels(self, path: str, validate: bool = True) -> Optional[list]:
+
+        entry = self.entry(path, validate)
+        return None if entry is None else entry['channels']
+
+    # ----------------------------------------------------------------------------------------------
+
+    def checksum(self, path: str) -> Optional[str]:
+
+        # Checksums of files that were not recorded are computed once when first asked for
+        entry = self.entry(path)
+        if entry is None:
+            return None
+        if 'sha256' not in entry:
+            entry['sha256'] = file_checksum(path)
+            self.updated[os.path.basename(path)] = entry
+
+        return entry['sha256']
+
+    # ----------------------------------------------------------------------------------------------
+
+    def sources(self, path: str, validate: bool = True) -> Optional[list]:
+
+        entry = self.entry(path, validate)
+        return None if entry is None else entry.get('sources')
+
+    # ----------------------------------------------------------------------------------------------
+
+    def save(self) -> None:
+
+        if not self.updated:
+            return
+
+        # The directory may not be writable, the inventory is then only kept by this process
+        try:
+            lock = open(self.lock_path, 'a')
+        except OSError:
+            return
+
+        # Hold an exclusive lock while the manifest is read, merged and replaced so the entries
+        # written by other tasks of the cycle in the meantime are kept. The lock is taken on a
+        # new open file so that it also serializes threads of the same process.
+        with lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                files = {**read_inventory(self.inventory_path), **self.updated}
+
+                # Write to a temporary file and rename so readers never see a partial manifest
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'version': inventory_version, 'files': files}, f, indent=2,
+                              sort_keys=True)
+                os.replace(tmp_path, self.inventory_path)
+            except OSError:
+                return
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+        self.files = files
+        self.updated = {}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def observation_inventory(directory: str) -> ObservationInventory:
+
+    key = os.path.abspath(directory)
+    if key not in inventories:
+        inventories[key] = ObservationInventory(directory)
+
+    return inventories[key]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def location_counts(paths: list, validate: bool = True) -> list:
+
+    """
+    Number of locations of each file, None for the files that do not exist. The inventories of
+    the directories of the files are saved once for the whole list.
+    """
+
+    used_inventories = {}
+    counts = []
+    for path in paths:
+        inventory = observation_inventory(os.path.dirname(path) or '.')
+        used_inventories[inventory.inventory_path] = inventory
+        counts.append(inventory.locations(path, validate))
+
+    for inventory in used_inventories.values():
+        inventory.save()
+
+    return counts
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def record_files(files: list) -> list:
+
+    """
+    Record the (path, sources) files created by a task. The inventories of the directories of the
+    files are saved once for the whole list.
+    """
+
+    used_inventories = {}
+    entries = []
+    for path, sources in files:
+        inventory = observation_inventory(os.path.dirname(path) or '.')
+        used_inventories[inventory.inventory_path] = inventory
+        entries.append(inventory.record(path, sources))
+
+    for inventory in used_inventories.values():
+        inventory.save()
+
+    return entries
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def observations_in_use(obs_dicts: list, validate: bool = True) -> list:
+
+    """
+    Whether each observation is used, i.e. its input file exists and has locations.
+    """
+
+    paths = [obs_dict['obs space']['obsdatain']['engine']['obsfile'] for obs_dict in obs_dicts]
+    return [count is not None and count > 0 for count in location_counts(paths, validate)]
+
+
+# --------------------------------------------------------------------------------------------------
@@ -1,16 +1,28 @@
+import hashlib
+import json
 import os
+import tempfile
 import yaml
 import pandas as pd
-import numpy as np
 import datetime as dt
 from typing import Optional
 
+from swell.utilities.dictionary import YamlDumper
+from swell.utilities.file_signature import file_signature, file_unchanged
 from swell.utilities.logger import Logger
 from swell.utilities.gsi_record_parser import GSIRecordParser
 
 # --------------------------------------------------------------------------------------------------
 
 
+# Manifest of the yaml files written by ObservingSystemRecords.update_yamls. Changing how the
+# records are parsed or written must change the version so that all the files are written again.
+records_manifest_file = 'records_manifest.json'
+records_manifest_version = 1
+
+# --------------------------------------------------------------------------------------------------
+
+
 def format_date(old_date: str) -> str:
 
     ''' Formatting date into expected template '''
@@ -23,56 +35,48 @@ def format_date(old_date: str) -> str:
 def read_sat_db(path_to_sat_db: str, column_names: list[str]) -> pd.DataFrame:
 
     '''
-        Reading GSI observing system records row by row into
+        Reading GSI observing system records in one pass into columns of
         a pandas dataframe to be used by the gsi_record_parser
     '''
 
     filename = path_to_sat_db
-    df = pd.DataFrame(columns=column_names)
+
+    # The records always provide channel_num and channels, the level records name them
+    # differently and leave their own columns empty
+    columns = {column: [] for column in column_names + ['channel_num', 'channels']}
 
     with open(filename, "r") as file:
-        lines = file.readlines()
-
-    # Read blindly into an array, throw line away if it starts with # or newline
-    idx = 0
-    for line in lines:
-        line_parts = line.split()
-        if (line_parts):
-
-            if (line_parts[0][0] != '#' and line_parts[0][0] != '\n'):
-                new_row = pd.DataFrame.from_dict({
-                    'sat': [''],
-                    'start': [''],
-                    'end': [''],
-                    'instr': [''],
-                    'channel_num': [0],
-                    'channels': [''],
-                    'comments': ['']})
-
-                df = pd.concat([df, new_row], ignore_index=True)
-                df.loc[idx, 'sat'] = line_parts[0]
-                df.loc[idx, 'start'] = line_parts[1]+line_parts[2]
-                df.loc[idx, 'end'] = line_parts[3]+line_parts[4]
-                df.loc[idx, 'instr'] = line_parts[5]
-                df.loc[idx, 'channel_num'] = line_parts[6]
+
+        # Read blindly into columns, throw line away if it starts with # or is empty
+        for line in file:
+            line_parts = line.split()
+            if (line_parts and line_parts[0][0] != '#'):
 
                 comment_present = next((i for i, x in enumerate(line_parts) if x == '#'), None)
 
+                comment_str = ''
                 if (comment_present):
                     channel_list = line_parts[7:comment_present]
-                    comment = line_parts[comment_present:]
-                    comment_str = ' '.join(comment)
                     # Accounting for no comment
-                    if (len(comment_str) != 1):
-                        df.loc[idx, 'comments'] = comment_str
+                    if (len(line_parts) - comment_present > 1):
+                        comment_str = ' '.join(line_parts[comment_present:])
                 else:
                     channel_list = line_parts[7:]
 
-                # convert channel list to string
-                df.loc[idx, 'channels'] = str(channel_list)
-                idx += 1
+                columns['sat'].append(line_parts[0])
+                columns['start'].append(line_parts[1]+line_parts[2])
+                columns['end'].append(line_parts[3]+line_parts[4])
+                columns['instr'].append(line_parts[5])
+                columns['channel_num'].append(line_parts[6])
+                columns['channels'].append(channel_list)
+                columns['comments'].append(comment_str)
+
+    number_of_rows = len(columns['sat'])
+    for column in columns:
+        if len(columns[column]) != number_of_rows:
+            columns[column] = [None] * number_of_rows
 
-    return df
+    return pd.DataFrame(columns)
 
 # --------------------------------------------------------------------------------------------------
 
@@ -98,12 +102,11 @@ class ObservingSystemRecords:
         self.record_type = record_type
         self.logger = Logger('ObservingSystemRecords')
 
-    def parse_records(self, path_to_sat_db: str) -> None:
+    def table_extension(self) -> str:
 
         '''
-            This method reads in the active.tbl and available.tbl files
-            from GEOS_mksi and loads them into dataframes. These dataframes
-            are parsed using GSIRecordParser to get the final dataframes.
+            Sets the column names of the record type and returns the extension
+            of its tables
         '''
 
         # Make a couple modifications based on what record is parsed
@@ -121,25 +124,47 @@ class ObservingSystemRecords:
             self.logger.abort(f'Record type {self.record_type} not supported. \
                            Use channel or level')
 
-        parser = GSIRecordParser()
-        channel_types = ['active', 'available']
-        for channel_type in channel_types:
-            df = pd.DataFrame(columns=self.column_names)
+        return file_ext_name
+
+    def read_tables(self, path_to_sat_db: str) -> dict:
+
+        '''
+            Reads the active and available tables from GEOS_mksi into dataframes
+        '''
+
+        file_ext_name = self.table_extension()
+
+        tables = {}
+        for channel_type in ['active', 'available']:
             path_to_records = os.path.join(path_to_sat_db, channel_type + file_ext_name)
+            tables[channel_type] = read_sat_db(path_to_records, self.column_names)
 
-            org_df = read_sat_db(path_to_records, self.column_names)
-            sat_list = np.unique(org_df['sat'].values)
-            for sat in sat_list:
-                sat_df = org_df.loc[org_df['sat'] == sat]
-                instr_list = np.unique(sat_df['instr'].values)
+        return tables
 
-                for instr in instr_list:
-                    instr_df = sat_df.loc[sat_df['instr'] == instr]
+    def parse_tables(self, tables: dict, groups: Optional[set] = None) -> None:
+
+        '''
+            Parses the tables using GSIRecordParser to get the final dataframes,
+            optionally only for the (sat, instr) groups given.
+        '''
+
+        parser = GSIRecordParser()
+        for channel_type, org_df in tables.items():
+
+            # Satellites and instruments are processed in sorted order, the rows of each in the
+            # order of the records
+            instr_dfs = []
+            for (sat, instr), instr_df in org_df.groupby(['sat', 'instr'], sort=True):
+                if instr+'_'+sat not in self.obs_registry:
+                    self.obs_registry.append(instr+'_'+sat)
+                if groups is None or (sat, instr) in groups:
                     parser.run(instr_df)
-                    new_instr_df = parser.get_instr_df()
-                    df = pd.concat([df, new_instr_df], ignore_index=True)
-                    if instr+'_'+sat not in self.obs_registry:
-                        self.obs_registry.append(instr+'_'+sat)
+                    instr_dfs.append(parser.get_instr_df())
+
+            if instr_dfs:
+                df = pd.concat(instr_dfs, ignore_index=True)
+            else:
+                df = pd.DataFrame(columns=org_df.columns)
 
             if channel_type == 'active':
                 self.active_df = df
@@ -148,6 +173,28 @@ class ObservingSystemRecords:
             else:
                 self.logger.abort(f'record parsing unavailable for {channel_type}')
 
+    def parse_records(self, path_to_sat_db: str) -> None:
+
+        '''
+            This method reads in the active.tbl and available.tbl files
+            from GEOS_mksi and loads them into dataframes. These dataframes
+            are parsed using GSIRecordParser to get the final dataframes.
+        '''
+
+        self.parse_tables(self.read_tables(path_to_sat_db))
+
+    def output_extension(self) -> str:
+
+        if self.record_type == 'channel':
+            output_ext_name = '_channel_info.yaml'
+        elif self.record_type == 'level':
+            output_ext_name = '_level_info.yaml'
+        else:
+            self.logger.abort(f'Record type {self.record_type} not supported. \
+                         Use channel or level')
+
+        return output_ext_name
+
     def save_yamls(
         self,
         output_dir: str,
@@ -162,54 +209,147 @@ class ObservingSystemRecords:
         if not observation_list:
             observation_list = self.obs_registry
 
-        if not os.path.exists(output_dir):
-            os.mkdir(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
+
+        output_ext_name = self.output_extension()
+
+        # Rows of each satellite and instrument
+        active_rows = {}
+        for row in self.active_df.to_dict('records'):
+            active_rows.setdefault((row['sat'], row['instr']), []).append(row)
+        available_rows = {}
+        for row in self.available_df.to_dict('records'):
+            available_rows.setdefault((row['sat'], row['instr']), []).append(row)
 
         # Assume that active and available channels have corresponding sat/instr fields
-        sat_list = np.unique(self.active_df['sat'].values)
-        for sat in sat_list:
-            active_df = self.active_df.loc[self.active_df['sat'] == sat]
-            available_df = self.available_df.loc[self.available_df['sat'] == sat]
-            instr_list = np.unique(active_df['instr'].values)
+        for (sat, instr), instr_active_rows in active_rows.items():
+
+            compare_name = instr+'_'+sat
+            if compare_name in observation_list:
+
+                active_field_list = []
+                for row in instr_active_rows:
+                    row_dict = {}
+                    row_dict['begin date'] = format_date(row['start'])
+                    row_dict['end date'] = format_date(row['end'])
+                    row_dict['channels'] = row['channels']
+                    if (row['comments']):
+                        row_dict['comments'] = row['comments']
+                    else:
+                        row_dict['comments'] = 'no comment'
+                    active_field_list.append(row_dict)
+
+                available_field_list = []
+                for row in available_rows.get((sat, instr), []):
+                    row_dict = {}
+                    row_dict['begin date'] = format_date(row['start'])
+                    row_dict['end date'] = format_date(row['end'])
+                    row_dict['channels'] = row['channels']
+                    available_field_list.append(row_dict)
 
-            for instr in instr_list:
                 sat_dict = {}
-                instr_active_df = active_df.loc[active_df['instr'] == instr]
-                instr_available_df = available_df.loc[available_df['instr'] == instr]
-
-                compare_name = instr+'_'+sat
-                if compare_name in observation_list:
-
-                    active_field_list = []
-                    for idx, row in instr_active_df.iterrows():
-                        row_dict = {}
-                        row_dict['begin date'] = format_date(row['start'])
-                        row_dict['end date'] = format_date(row['end'])
-                        row_dict['channels'] = row['channels']
-                        if (row['comments']):
-                            row_dict['comments'] = row['comments']
-                        else:
-                            row_dict['comments'] = 'no comment'
-                        active_field_list.append(row_dict)
-
-                    available_field_list = []
-                    for idx, row in instr_available_df.iterrows():
-                        row_dict = {}
-                        row_dict['begin date'] = format_date(row['start'])
-                        row_dict['end date'] = format_date(row['end'])
-                        row_dict['channels'] = row['channels']
-                        available_field_list.append(row_dict)
-
-                    sat_dict['available'] = available_field_list
-                    sat_dict['active'] = active_field_list
-
-                    if self.record_type == 'channel':
-                        output_ext_name = '_channel_info.yaml'
-                    elif self.record_type == 'level':
-                        output_ext_name = '_level_info.yaml'
-                    else:
-                        self.logger.abort(f'Record type {self.record_type} not supported. \
-                                     Use channel or level')
+                sat_dict['available'] = available_field_list
+                sat_dict['active'] = active_field_list
+
+                # Write to a temporary file and rename so readers never see a partial file
+                fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+                with os.fdopen(fd, 'w') as file:
+                    yaml.dump(sat_dict, file, Dumper=YamlDumper)
+                os.replace(tmp_path, output_dir + '/' + instr + '_' + sat + output_ext_name)
+
+    def update_yamls(
+        self,
+        path_to_sat_db: str,
+        output_dir: str,
+        observation_list: Optional[list] = None
+    ) -> list:
+
+        '''
+            Incremental parse_records and save_yamls. The lines of the tables
+            of each satellite and instrument are fingerprinted and only the
+            yaml files whose lines changed, or that were changed or removed
+            since they were written, are parsed and written again. The
+            fingerprints are kept in a manifest in output_dir, removing it
+            writes all the files again. Returns the observations written.
+        '''
 
-                    with open(output_dir + '/' + instr + '_' + sat + output_ext_name, 'w') as file:
-                        yaml.dump(sat_dict, file)
+        tables = self.read_tables(path_to_sat_db)
+        output_ext_name = self.output_extension()
+
+        # Fingerprint of the lines of each satellite and instrument in both tables
+        fingerprints = {}
+        for channel_type, org_df in tables.items():
+            for (sat, instr), instr_df in org_df.groupby(['sat', 'instr'], sort=True):
+                rows = list(zip(instr_df['start'], instr_df['end'], instr_df['channel_num'],
+                                instr_df['channels'], instr_df['comments']))
+                fingerprint = fingerprints.setdefault((sat, instr), hashlib.sha256(
+                    repr((self.record_type, records_manifest_version)).encode()))
+                fingerprint.update(repr((channel_type, rows)).encode())
+
+        manifest = read_records_manifest(output_dir)
+
+        # Groups with active records are written, when requested and out of date
+        changed = set()
+        for sat, instr in tables['active'].groupby(['sat', 'instr']).groups:
+            if observation_list and instr+'_'+sat not in observation_list:
+                continue
+            output_file = instr + '_' + sat + output_ext_name
+            entry = manifest.get(output_file)
+            if entry is None or \
+               entry['fingerprint'] != fingerprints[(sat, instr)].hexdigest() or \
+               not file_unchanged(os.path.join(output_dir, output_file), entry['signature']):
+                changed.add((sat, instr))
+
+        self.parse_tables(tables, changed)
+        updated = sorted([instr+'_'+sat for sat, instr in changed])
+        if not updated:
+            return updated
+
+        self.save_yamls(output_dir, updated)
+
+        for sat, instr in changed:
+            output_file = instr + '_' + sat + output_ext_name
+            manifest[output_file] = {
+                'fingerprint': fingerprints[(sat, instr)].hexdigest(),
+                'signature': file_signature(os.path.join(output_dir, output_file)),
+            }
+        write_records_manifest(output_dir, manifest)
+
+        return updated
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def read_records_manifest(output_dir: str) -> dict:
+
+    # Yaml files written by update_yamls and the fingerprints of the records they were written from
+    try:
+        with open(os.path.join(output_dir, records_manifest_file), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if manifest.get('version') != records_manifest_version:
+        return {}
+
+    return manifest['files']
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def write_records_manifest(output_dir: str, manifest: dict) -> None:
+
+    # Entries written concurrently by another process are kept, the entries of this process win
+    manifest = {**read_records_manifest(output_dir), **manifest}
+
+    # Write to a temporary file and rename so concurrent writers never read a partial manifest
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'version': records_manifest_version, 'files': manifest}, f, indent=2,
+                  sort_keys=True)
+    os.replace(tmp_path, os.path.join(output_dir, records_manifest_file))
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,135 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import os
+import time
+from typing import Callable, Optional
+
+from swell.utilities.worker_pool import run_in_pool
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package plot_scheduler
+#
+#  Scheduling of independent plotting jobs, e.g. one eva run per observation type. The pool is
+#  sized from the cores and the memory available to the task and the jobs are started largest
+#  first so that the longest job does not start last and hold up the whole task.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+# Memory used by a plotting job, a base for the plotting libraries plus a multiple of the size of
+# the input file for the data loaded from it and the fields derived from the data
+job_base_memory = 1024**3
+job_memory_per_input_byte = 4
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def available_cores() -> int:
+
+    # Cores the task is allowed to run on, which can be fewer than the cores of the node
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def available_memory() -> Optional[int]:
+
+    # Memory available for new work without swapping, None when it cannot be determined
+    try:
+        with open('/proc/meminfo', 'r') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def plot_workers(job_sizes: list, max_workers: Optional[int] = None) -> int:
+
+    """
+    Number of workers to run plotting jobs reading inputs of job_sizes bytes. Bounded by the
+    cores, by the memory for the largest jobs to run at the same time, by the number of jobs and
+    by max_workers when given.
+    """
+
+    workers = available_cores()
+    if max_workers is not None:
+        workers = min(workers, max_workers)
+    workers = min(workers, len(job_sizes))
+
+    memory = available_memory()
+    if memory is not None:
+
+        # The largest jobs may all run at the same time
+        largest_jobs = sorted(job_sizes, reverse=True)
+        job_memory = 0
+        memory_workers = 0
+        for size in largest_jobs[:workers]:
+            job_memory += job_base_memory + job_memory_per_input_byte * size
+            if job_memory > memory:
+                break
+            memory_workers += 1
+        workers = min(workers, memory_workers)
+
+    return max(1, workers)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def run_timed(function: Callable, *arguments) -> float:
+
+    # Run a job and return the seconds it took
+    start = time.perf_counter()
+    function(*arguments)
+    return time.perf_counter() - start
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def run_plots(function: Callable, jobs: list, max_workers: Optional[int] = None) -> tuple:
+
+    """
+    Run function(*arguments) for the (size, arguments) jobs, largest size first.
+
+    Returns the number of workers used and one (seconds, output, error) tuple per job, in the
+    order of jobs. Seconds is None for a job that failed, output and error are as returned by
+    run_in_pool.
+    """
+
+    order = sorted(range(len(jobs)), key=lambda index: jobs[index][0], reverse=True)
+    workers = plot_workers([size for size, _ in jobs], max_workers)
+
+    results = run_in_pool(run_timed, [(function, *jobs[index][1]) for index in order], workers)
+
+    ordered_results = [None] * len(jobs)
+    for index, result in zip(order, results):
+        ordered_results[index] = result
+
+    return workers, ordered_results
+
+
+# --------------------------------------------------------------------------------------------------
@@ -7,11 +7,16 @@
 # --------------------------------------------------------------------------------------------------
 
 
+import copy
+import datetime
+import hashlib
 import os
 import yaml
+from collections import OrderedDict
 from typing import Union, Optional, Any
 
-from swell.utilities.jinja2 import template_string_jinja2
+from swell.utilities.dictionary import YamlSafeLoader
+from swell.utilities.jinja2 import compile_template_jinja2, render_template_jinja2
 from swell.utilities.get_channels import get_channels
 from swell.utilities.logger import Logger
 from swell.utilities.datetime_util import Datetime
@@ -19,6 +24,64 @@ from swell.utilities.datetime_util import Datetime
 # --------------------------------------------------------------------------------------------------
 
 
+# Per process caches of the compiled templates, keyed by file, and of the rendered configurations,
+# keyed by file and the values of the templates used by the file. The counters report how often
+# the caches are used.
+template_cache = {}
+render_cache = OrderedDict()
+render_cache_size = 256
+cache_counters = {'template_hits': 0, 'template_misses': 0, 'render_hits': 0, 'render_misses': 0,
+                  'render_uncacheable': 0}
+
+# Template values that can be part of the render cache key, their representation is their value
+cacheable_types = (str, int, float, bool, type(None), datetime.datetime, datetime.timedelta)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def rendering_cache_counters() -> dict:
+
+    return dict(cache_counters)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def cacheable(value: Any) -> bool:
+
+    if isinstance(value, (list, tuple)):
+        return all(cacheable(element) for element in value)
+    if isinstance(value, dict):
+        return all(cacheable(key) and cacheable(element) for key, element in value.items())
+    return isinstance(value, cacheable_types)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def compiled_template(config_file: str) -> tuple:
+
+    # Compiled template and the variables it uses, compiled again when the file changes
+    stat = os.stat(config_file)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    cached = template_cache.get(config_file)
+    if cached is not None and cached[0] == signature:
+        cache_counters['template_hits'] += 1
+        return cached
+
+    cache_counters['template_misses'] += 1
+    with open(config_file, 'r') as config_file_open:
+        template, variables = compile_template_jinja2(config_file_open.read())
+
+    template_cache[config_file] = (signature, template, sorted(variables))
+    return template_cache[config_file]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
 class JediConfigRendering():
 
     def __init__(
@@ -161,16 +224,39 @@ class JediConfigRendering():
         self.logger.assert_abort(os.path.exists(config_file), f'In open_file_and_render failed ' +
                                  f'to find file \'{config_file}\'')
 
-        # Open file as a string
-        with open(config_file, 'r') as config_file_open:
-            config_file_str_templated = config_file_open.read()
+        signature, template, variables = compiled_template(config_file)
+
+        # The rendered configuration only depends on the values of the templates it uses
+        template_values = [(key, key in self.__template_dict__, self.__template_dict__.get(key))
+                           for key in variables]
+        render_key = None
+        if cacheable(template_values):
+            render_key = hashlib.sha256(repr((config_file, signature, template_values)).encode())
+            render_key = render_key.hexdigest()
+        else:
+            cache_counters['render_uncacheable'] += 1
+
+        if render_key in render_cache:
+            cache_counters['render_hits'] += 1
+            render_cache.move_to_end(render_key)
+        else:
+
+            # Fill templates in the configuration file using the config
+            config_file_str = render_template_jinja2(self.logger, template,
+                                                     self.__template_dict__)
+
+            # Convert string to dictionary
+            config_dict = yaml.load(config_file_str, Loader=YamlSafeLoader)
+            if render_key is None:
+                return config_dict
 
-        # Fill templates in the configuration file using the config
-        config_file_str = template_string_jinja2(self.logger, config_file_str_templated,
-                                                 self.__template_dict__)
+            cache_counters['render_misses'] += 1
+            render_cache[render_key] = config_dict
+            if len(render_cache) > render_cache_size:
+                render_cache.popitem(last=False)
 
-        # Convert string to dictionary
-        return yaml.safe_load(config_file_str)
+        # Callers modify the dictionary they are given, the cached dictionary is never returned
+        return copy.deepcopy(render_cache[render_key])
 
     # ----------------------------------------------------------------------------------------------
 
@@ -8,14 +8,13 @@
 # --------------------------------------------------------------------------------------------------
 
 
-import os
-import netCDF4 as nc
 from typing import Optional
 import datetime
 
 from swell.utilities.shell_commands import run_track_log_subprocess
 from swell.utilities.logger import Logger
-from swell.tasks.base.task_base import JediConfigRendering
+from swell.utilities.observation_inventory import observations_in_use
+from swell.utilities.render_jedi_interface_files import JediConfigRendering
 
 # --------------------------------------------------------------------------------------------------
 
@@ -27,22 +26,9 @@ def check_obs(
     cycle_time: Optional[str]
 ) -> bool:
 
-    use_observation = False
-
-    # Check if file exists
-    # --------------------
-    filename = obs_dict['obs space']['obsdatain']['engine']['obsfile']
-    if os.path.exists(filename):
-
-        # Open file and check if number of location dimension is nonzero
-        # --------------------------------------------------------------
-        dataset = nc.Dataset(filename, 'r')
-
-        for dim_name, dim in dataset.dimensions.items():
-            if dim_name == 'Location' and dim.size > 0:
-                use_observation = True
-
-    return use_observation
+    # The input file exists and has locations, from the observation inventory of the cycle
+    # -------------------------------------------------------------------------------------
+    return observations_in_use([obs_dict])[0]
 
 
 # --------------------------------------------------------------------------------------------------
@@ -54,7 +40,8 @@ def jedi_dictionary_iterator(
     window_type: Optional[str] = None,
     obs: Optional[list[str]] = None,
     cycle_time: Optional[datetime.datetime] = None,
-    jedi_forecast_model: Optional[str] = None
+    jedi_forecast_model: Optional[str] = None,
+    validate_observations: bool = True
 ) -> None:
 
     # Assemble configuration YAML file
@@ -62,7 +49,8 @@ def jedi_dictionary_iterator(
     for key, value in jedi_config_dict.items():
         if isinstance(value, dict):
             jedi_dictionary_iterator(value, jedi_rendering, window_type, obs,
-                                     jedi_forecast_model)
+                                     jedi_forecast_model,
+                                     validate_observations=validate_observations)
 
         elif isinstance(value, bool):
             continue
@@ -72,7 +60,7 @@ def jedi_dictionary_iterator(
                 if isinstance(item, dict):
                     jedi_dictionary_iterator(
                         item, jedi_rendering, window_type, obs,
-                        jedi_forecast_model
+                        jedi_forecast_model, validate_observations=validate_observations
                     )
 
         else:
@@ -87,10 +75,11 @@ def jedi_dictionary_iterator(
                 if value_special == 'observations':
                     observations = []
                     obs_list = obs.copy()
-                    for ob in obs_list:
-                        obs_dict = jedi_rendering.render_interface_observations(ob)
-                        use_observation = check_obs(jedi_rendering.observing_system_records_path,
-                                                    ob, obs_dict, cycle_time)
+                    obs_dicts = [jedi_rendering.render_interface_observations(ob)
+                                 for ob in obs_list]
+                    use_observations = observations_in_use(obs_dicts, validate_observations)
+                    for ob, obs_dict, use_observation in zip(obs_list, obs_dicts,
+                                                             use_observations):
                         if use_observation:
                             observations.append(obs_dict)
                         else:
@@ -0,0 +1,162 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+# --------------------------------------------------------------------------------------------------
+
+
+# standard imports
+import filecmp
+import os
+import shutil
+import tempfile
+import time
+
+# external imports
+import netCDF4 as nc
+import yaml
+
+# swell imports
+from swell.swell_path import get_swell_path
+from swell.tasks.run_jedi_hofx_executable import write_member_config
+from swell.utilities.datetime_util import Datetime
+from swell.utilities.logger import Logger
+from swell.utilities.render_jedi_interface_files import JediConfigRendering
+from swell.utilities.run_jedi_executables import jedi_dictionary_iterator
+from swell.utilities.worker_pool import run_in_pool
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+# Conventional observations, their templates do not need observing system records
+observations = ['aircraft', 'gps', 'mls55_aura', 'omi_aura', 'ompsnm_npp', 'pibal', 'satwind',
+                'scatwind', 'sfc', 'sfcship', 'sondes']
+
+ensemble_sizes = [32, 80, 160]
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def create_rendering(logger: Logger, experiment_root: str) -> JediConfigRendering:
+
+    # Experiment with the swell configuration and an observation file for each observation type
+    experiment_id = 'benchmark'
+    shutil.copytree(os.path.join(get_swell_path(), 'configuration'),
+                    os.path.join(experiment_root, experiment_id, 'configuration'),
+                    ignore=shutil.ignore_patterns('*.py*', '*__*'))
+    cycle_dir = os.path.join(experiment_root, experiment_id, 'run', '20211212T000000Z',
+                             'geos_atmosphere')
+    os.makedirs(cycle_dir)
+
+    window_begin = '20211211T210000Z'
+    for observation in observations:
+        obs_file = os.path.join(cycle_dir, f'{observation}.{window_begin}.nc4')
+        with nc.Dataset(obs_file, 'w') as ds:
+            ds.createDimension('Location', 1)
+
+    rendering = JediConfigRendering(logger, experiment_root, experiment_id, cycle_dir,
+                                    Datetime('2021-12-12T00:00:00Z'), 'geos_atmosphere')
+    for key, value in [('window_begin_iso', '2021-12-11T21:00:00Z'),
+                       ('window_end_iso', '2021-12-12T03:00:00Z'),
+                       ('window_begin', window_begin),
+                       ('background_time', '20211211T210000Z'),
+                       ('local_background_time', '20211212T000000Z'),
+                       ('local_background_time_iso', '2021-12-12T00:00:00Z'),
+                       ('horizontal_resolution', 91), ('vertical_resolution', 72),
+                       ('npx_proc', 4), ('npy_proc', 4), ('crtm_coeff_dir', cycle_dir)]:
+        rendering.add_key(key, value)
+
+    return rendering
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def render(rendering: JediConfigRendering) -> dict:
+
+    jedi_config_dict = rendering.render_oops_file('hofx3D')
+    jedi_dictionary_iterator(jedi_config_dict, rendering, '3D', list(observations))
+    return jedi_config_dict
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def render_per_member(rendering: JediConfigRendering, members: list, output_dir: str) -> None:
+
+    # Previous implementation, the full configuration is rendered for every member
+    for mem in members:
+        jedi_config_dict = render(rendering)
+        for observer in jedi_config_dict['observations']['observers']:
+            outfile = observer['obs space']['obsdataout']['engine']['obsfile']
+            observer['obs space']['obsdataout']['engine']['obsfile'] = \
+                outfile.replace('.nc4', f'_{mem:02}.nc4')
+        with open(os.path.join(output_dir, f'mem{mem}.yaml'), 'w') as f:
+            yaml.dump(jedi_config_dict, f, default_flow_style=False)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def render_once(rendering: JediConfigRendering, members: list, output_dir: str,
+                workers: int) -> None:
+
+    jedi_config_dict = render(rendering)
+    run_in_pool(write_member_config,
+                [(jedi_config_dict, mem, None, os.path.join(output_dir, f'mem{mem}.yaml'))
+                 for mem in members], workers)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def main() -> None:
+
+    # Create a logger
+    logger = Logger('BenchmarkEnsembleHofxConfigs')
+
+    work_dir = tempfile.mkdtemp()
+    try:
+
+        rendering = create_rendering(logger, os.path.join(work_dir, 'experiments'))
+        workers = os.cpu_count()
+
+        for ensemble_size in ensemble_sizes:
+
+            members = list(range(1, ensemble_size + 1))
+            implementations = [('per member', render_per_member, ()), ('once', render_once, (1,))]
+            if workers > 1:
+                implementations.append((f'once, {workers} workers', render_once, (workers,)))
+
+            timings = {}
+            for label, function, arguments in implementations:
+                output_dir = os.path.join(work_dir, label.replace(' ', '_').replace(',', ''))
+                os.makedirs(output_dir)
+                start = time.perf_counter()
+                function(rendering, members, output_dir, *arguments)
+                timings[label] = (time.perf_counter() - start, output_dir)
+
+            # All the implementations write the same files
+            reference_dir = timings['per member'][1]
+            for label, (_, output_dir) in timings.items():
+                _, mismatch, errors = filecmp.cmpfiles(reference_dir, output_dir,
+                                                       os.listdir(reference_dir), shallow=False)
+                logger.assert_abort(not mismatch and not errors, f'{label} differs: {mismatch}')
+                if output_dir != reference_dir:
+                    shutil.rmtree(output_dir)
+            shutil.rmtree(reference_dir)
+
+            reference_time = timings['per member'][0]
+            for label, (seconds, _) in timings.items():
+                logger.info(f'{ensemble_size:4} members, render {label:>18}: {seconds:7.3f} s ' +
+                            f'(speedup {reference_time/seconds:5.1f}x)')
+
+    finally:
+        shutil.rmtree(work_dir)
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,115 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+# --------------------------------------------------------------------------------------------------
+
+
+# standard imports
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+# external imports
+import netCDF4 as nc
+import numpy as np
+
+# swell imports
+from swell.utilities.logger import Logger
+from swell.utilities.netcdf_files import concatenate_files
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def create_geovals_files(directory: str, number_of_files: int, nlocs: int,
+                         nlevs: int) -> list:
+
+    # Per processor GeoVaLs like files along nlocs without groups
+    files = []
+    for i in range(number_of_files):
+        path = os.path.join(directory, f'geovals_{i:04}.nc4')
+        with nc.Dataset(path, 'w') as ds:
+            ds.createDimension('nlocs', nlocs)
+            ds.createDimension('nval', nlevs)
+            for name in ['air_temperature', 'specific_humidity', 'eastward_wind']:
+                var = ds.createVariable(name, 'f4', ('nlocs', 'nval'))
+                var[:] = np.random.default_rng(i).random((nlocs, nlevs), dtype=np.float32)
+        files.append(path)
+
+    return files
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def measure(function: Callable) -> Tuple[float, float]:
+
+    # Wall time in seconds and peak traced memory in MiB
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak/1024**2
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def main() -> None:
+
+    # Create a logger
+    logger = Logger('BenchmarkNetcdfConcatenation')
+
+    # xarray is only needed for the comparison with the previous implementation
+    import xarray as xr
+
+    number_of_files = 24
+    nlocs = 20000
+    nlevs = 72
+
+    work_dir = tempfile.mkdtemp()
+    try:
+
+        input_files = create_geovals_files(work_dir, number_of_files, nlocs, nlevs)
+        input_bytes = sum(os.path.getsize(f) for f in input_files)
+        logger.info(f'Concatenating {number_of_files} files of {input_bytes/1024**2:.1f} MiB')
+
+        # Previous implementation: open everything with xarray, concatenate in memory and write
+        def xarray_concatenation() -> None:
+            datasets = [xr.open_dataset(f) for f in input_files]
+            combined = xr.concat(datasets, dim='nlocs')
+            combined.to_netcdf(os.path.join(work_dir, 'xarray.nc4'))
+            for dataset in datasets:
+                dataset.close()
+
+        # Streaming implementation
+        def streaming_concatenation() -> None:
+            concatenate_files(logger, input_files, os.path.join(work_dir, 'streaming.nc4'),
+                              'nlocs')
+
+        for label, function in [('xarray', xarray_concatenation),
+                                ('streaming', streaming_concatenation)]:
+            elapsed, peak = measure(function)
+            logger.info(f'{label:>10}: {elapsed:7.2f} s, peak traced memory {peak:8.1f} MiB')
+
+        # Check that both give the same answer
+        with nc.Dataset(os.path.join(work_dir, 'xarray.nc4')) as ds_x, \
+                nc.Dataset(os.path.join(work_dir, 'streaming.nc4')) as ds_s:
+            for name in ds_x.variables:
+                logger.assert_abort(np.array_equal(ds_x[name][:], ds_s[name][:]),
+                                    f'Variable {name} differs between the implementations')
+
+    finally:
+        shutil.rmtree(work_dir)
+
+
+# --------------------------------------------------------------------------------------------------
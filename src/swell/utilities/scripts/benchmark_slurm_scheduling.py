@@ -0,0 +1,121 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+# --------------------------------------------------------------------------------------------------
+
+
+# standard imports
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable
+from unittest.mock import patch
+
+# external imports
+import yaml
+
+# swell imports
+from swell.utilities import slurm
+from swell.utilities.logger import Logger
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+numbers_of_model_components = [1, 4, 16, 64]
+
+repeats = 5
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def validate_reparsing(directive_dict: dict) -> None:
+
+    # Previous implementation, the sbatch help is parsed for every set of directives
+    invalid_directives = set(directive_dict.keys()).difference(slurm.valid_directives.__wrapped__())
+    assert not invalid_directives, "The following are invalid SLURM directives: " + \
+        f"{invalid_directives}"
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def experiment_dict(number_of_model_components: int) -> dict:
+
+    # Experiment with task directives, generic and specific, for every model component
+    model_components = [f'model_{index:03}' for index in range(number_of_model_components)]
+    task_directives = {'all': {'nodes': 2, 'ntasks-per-node': 24}}
+    for model_component in model_components:
+        task_directives[model_component] = {'nodes': 4, 'time': '01:00:00'}
+
+    return {'model_components': model_components,
+            'slurm_directives_global': {'account': 'x1234', 'qos': 'allnccs'},
+            'slurm_directives_tasks': {'RunJediHofxExecutable': task_directives,
+                                       'EvaObservations': task_directives}}
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def measure(function: Callable, *arguments) -> float:
+
+    # Best of repeats, in seconds
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*arguments)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def main() -> None:
+
+    # Create a logger, the scheduling functions log through a silent one
+    logger = Logger('BenchmarkSlurmScheduling')
+    silent_logger = Logger('BenchmarkSlurmScheduling')
+    silent_logger.info = lambda *args, **kwargs: None
+
+    platform = 'nccs_discover_sles15'
+    exp_suite_path = tempfile.mkdtemp()
+    try:
+
+        with patch('swell.utilities.slurm.slurm_global_defaults', return_value={}), \
+                patch('platform.platform', return_value='Linux-5.14.21'):
+
+            for number_of_model_components in numbers_of_model_components:
+
+                exp_dict = experiment_dict(number_of_model_components)
+                reference = slurm.prepare_scheduling_dict(silent_logger, exp_dict, platform)
+
+                # Resolving with the previous validation and with the cached validation
+                with patch('swell.utilities.slurm.validate_directives', validate_reparsing):
+                    reparsing = measure(slurm.prepare_scheduling_dict, silent_logger, exp_dict,
+                                        platform)
+                cached = measure(slurm.prepare_scheduling_dict, silent_logger, exp_dict, platform)
+
+                # Resolving once for the experiment and writing the scheduling file
+                written = measure(slurm.experiment_scheduling_dict, silent_logger, exp_dict,
+                                  platform, exp_suite_path)
+                with open(os.path.join(exp_suite_path, slurm.scheduling_file), 'r') as f:
+                    logger.assert_abort(yaml.safe_load(f) == reference,
+                                        'The scheduling file differs from the scheduling ' +
+                                        'dictionary')
+
+                logger.info(f'{number_of_model_components:4} model components: ' +
+                            f'reparsing {reparsing*1000:7.2f} ms, cached {cached*1000:7.2f} ms ' +
+                            f'(speedup {reparsing/cached:5.1f}x), written {written*1000:7.2f} ms',
+                            False)
+
+    finally:
+        shutil.rmtree(exp_suite_path)
+
+
+# --------------------------------------------------------------------------------------------------
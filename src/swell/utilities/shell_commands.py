@@ -13,6 +13,7 @@ import subprocess
 from typing import Any, Optional, IO, Union
 
 from swell.utilities.logger import Logger
+from swell.utilities.task_metrics import metrics_span
 
 
 # --------------------------------------------------------------------------------------------------
@@ -35,17 +36,18 @@ def run_track_log_subprocess(
 
     # Run commands and print output to screen
     # ---------------------------------------
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, **kwargs)
-    while True:
-        output = process.stdout.readline().decode()
-        if output == '' and process.poll() is not None:
-            break
-        if output:
-            # Write line of output to screen for tailing
-            print(output.strip())
-            # Write line of output to file
-            if output_log is not None:
-                output_log_h.write(f'{output.strip()}\n')
+    with metrics_span('subprocess'):
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, **kwargs)
+        while True:
+            output = process.stdout.readline().decode()
+            if output == '' and process.poll() is not None:
+                break
+            if output:
+                # Write line of output to screen for tailing
+                print(output.strip())
+                # Write line of output to file
+                if output_log is not None:
+                    output_log_h.write(f'{output.strip()}\n')
 
     # Close the log file
     # ------------------
@@ -86,7 +88,8 @@ def run_subprocess(
 
     # Run subprocess
     try:
-        subprocess.run(command, check=True, stdout=stdout, stderr=stderr, **kwargs)
+        with metrics_span('subprocess'):
+            subprocess.run(command, check=True, stdout=stdout, stderr=stderr, **kwargs)
     except subprocess.CalledProcessError as e:
         print(e)
         logger.abort(f'Subprocess with command {command} failed, throwing error {e}')
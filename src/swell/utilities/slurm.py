@@ -10,22 +10,56 @@ import importlib
 import os
 import platform as pltfrm
 import re
+import tempfile
 import yaml
+from functools import lru_cache
 from typing import Union
 
 from importlib import resources
 from logging import Logger as pyLogger
 
+from swell.utilities.dictionary import YamlDumper
 from swell.utilities.logger import Logger
 
 
-def prepare_scheduling_dict(
-    logger: Union[Logger, pyLogger],
-    experiment_dict: dict,
-    platform: str,
-) -> dict:
+# Scheduling dictionary of an experiment, written next to experiment.yaml
+scheduling_file = 'scheduling.yaml'
+
+# Hard-coded SLURM defaults for certain tasks
+# -------------------------------------------
+task_defaults = {
+    "RunJediVariationalExecutable": {"all": {"nodes": 3}},
+    "RunJediUfoTestsExecutable": {"all": {"ntasks-per-node": 1}},
+    "RunJediConvertStateSoca2ciceExecutable": {"all": {"nodes": 1}}
+}
+
+# List of tasks using slurm
+# -------------------------
+slurm_tasks = {
+    'BuildJedi',
+    'BuildGeos',
+    'EvaObservations',
+    'GenerateBClimatology',
+    'RunJediEnsembleMeanVariance',
+    'RunJediConvertStateSoca2ciceExecutable',
+    'RunJediFgatExecutable',
+    'RunJediHofxEnsembleExecutable',
+    'RunJediHofxExecutable',
+    'RunJediLocalEnsembleDaExecutable',
+    'RunJediObsfiltersExecutable',
+    'RunJediUfoTestsExecutable',
+    'RunJediVariationalExecutable',
+    'RunGeosExecutable'
+    }
+
+
+# --------------------------------------------------------------------------------------------------
+
 
-    # Obtain platform-specific SLURM directives and set them as global defaults
+@lru_cache(maxsize=None)
+def platform_slurm_defaults(platform: str) -> str:
+
+    # Obtain platform-specific SLURM directives, as the text of the file, once per process
     # Start by constructing the full platforms path
     # -------------------------------------------
     platform_path = f"swell.deployment.platforms.{platform}"
@@ -39,17 +73,23 @@ def prepare_scheduling_dict(
     except Exception as err:
         raise err
 
-    logger.info(f'Loading SLURM user configuration for the "{platform}" platform')
     with resources.open_text(path_import, 'slurm.yaml') as yaml_file:
-        global_defaults = yaml.safe_load(yaml_file)
+        return yaml_file.read()
 
-    # Hard-coded SLURM defaults for certain tasks
-    # -------------------------------------------
-    task_defaults = {
-        "RunJediVariationalExecutable": {"all": {"nodes": 3}},
-        "RunJediUfoTestsExecutable": {"all": {"ntasks-per-node": 1}},
-        "RunJediConvertStateSoca2ciceExecutable": {"all": {"nodes": 1}}
-    }
+
+# --------------------------------------------------------------------------------------------------
+
+
+def scheduling_inputs(
+    logger: Union[Logger, pyLogger],
+    experiment_dict: dict,
+    platform: str,
+) -> dict:
+
+    # Gather every source of SLURM directives for the experiment
+    # ----------------------------------------------------------
+    logger.info(f'Loading SLURM user configuration for the "{platform}" platform')
+    global_defaults = yaml.safe_load(platform_slurm_defaults(platform))
 
     # Global SLURM settings stored in $HOME/.swell/swell-slurm.yaml
     # ----------------------------------------------
@@ -78,25 +118,6 @@ def prepare_scheduling_dict(
         logger.info(f"Loading experiment-specific SLURM configs from experiment dict")
         experiment_task_directives = experiment_dict["slurm_directives_tasks"]
 
-    # List of tasks using slurm
-    # -------------------------
-    slurm_tasks = {
-        'BuildJedi',
-        'BuildGeos',
-        'EvaObservations',
-        'GenerateBClimatology',
-        'RunJediEnsembleMeanVariance',
-        'RunJediConvertStateSoca2ciceExecutable',
-        'RunJediFgatExecutable',
-        'RunJediHofxEnsembleExecutable',
-        'RunJediHofxExecutable',
-        'RunJediLocalEnsembleDaExecutable',
-        'RunJediObsfiltersExecutable',
-        'RunJediUfoTestsExecutable',
-        'RunJediVariationalExecutable',
-        'RunGeosExecutable'
-        }
-
     # Throw an error if a user tries to set SLURM directives for a task that
     # doesn't use SLURM.
     experiment_slurm_tasks = set(experiment_task_directives.keys())
@@ -108,113 +129,149 @@ def prepare_scheduling_dict(
         if "model_components" in experiment_dict \
         else []
 
+    return {
+        "global_defaults": global_defaults or {},
+        "user_globals": user_globals or {},
+        "experiment_globals": experiment_globals or {},
+        "experiment_task_directives": experiment_task_directives or {},
+        "model_components": list(model_components)
+    }
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def resolve_directives(layers: list) -> dict:
+
+    # Merge layers of directives, a layer overrides the directives of the layers before it
+    directives = {}
+    for layer in layers:
+        directives.update(layer)
+    validate_directives(directives)
+    return directives
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def resolve_scheduling_dict(inputs: dict) -> dict:
+
+    global_defaults = inputs["global_defaults"]
+    user_globals = inputs["user_globals"]
+    experiment_globals = inputs["experiment_globals"]
+    experiment_task_directives = inputs["experiment_task_directives"]
+
     scheduling_dict = {}
-    for slurm_task in slurm_tasks:
+    for slurm_task in sorted(slurm_tasks):
+        task_default = task_defaults.get(slurm_task, {})
+        experiment_task = experiment_task_directives.get(slurm_task, {})
+
         # Priority order (first = highest priority)
         # 1. Task-specific directives from experiment
         #    (experiment_task_directives[slurm_task]["all"])
-        # 2. Global directives from experiment (experiment_globals)
-        # 3. Directives from user config (user_globals)
-        # 4. Hard-coded task-specific defaults (task_defaults)
+        # 2. Task-specific hard-coded defaults (task_defaults)
+        # 3. Global directives from experiment (experiment_globals)
+        # 4. Directives from user config (user_globals)
         # 5. Hard-coded global defaults (global_defaults)
         # NOTE: Hard-code "job-name" to SWELL task here but it can be
         # overwritten in task-specific directives.
-        directives = {
-            "job-name": slurm_task,
-            **global_defaults,
-            **user_globals,
-            **experiment_globals
-        }
-        if slurm_task in task_defaults:
-            if "all" in task_defaults[slurm_task]:
-                directives = {
-                    **directives,
-                    **task_defaults[slurm_task]["all"]
-                }
-        if slurm_task in experiment_task_directives:
-            if "all" in experiment_task_directives[slurm_task]:
-                directives = {
-                    **directives,
-                    **experiment_task_directives[slurm_task]["all"]
-                }
-        # Set model_agnostic directives
-        validate_directives(directives)
+        directives = resolve_directives([
+            {"job-name": slurm_task},
+            global_defaults,
+            user_globals,
+            experiment_globals,
+            task_default.get("all", {}),
+            experiment_task.get("all", {})
+        ])
         scheduling_dict[slurm_task] = {"directives": {"all": directives}}
 
         # Now, add model component-specific logic. The inheritance here is more
-        # complicated:
-        # - Experiment global defaults (`experiment_globals`)
-        # - User global defaults (`user_globals`)
-        # - Task- and model-specific hard-coded defaults
-        # - Task-specific, model-generic hard-coded defaults
-        # - Global hard-coded defaults
-        # Now, for every model component, set the model-generic directives
-        # (`directives`) but overwrite with model-specific directives if
-        # present.
-        for model_component in model_components:
-            model_directives = {
-                "job-name": f"{slurm_task}-{model_component}",
-                **global_defaults
-            }
-            if slurm_task in task_defaults:
-                model_directives = add_directives(
-                    model_directives,
-                    task_defaults[slurm_task],
-                    "all"
-                )
-                model_directives = add_directives(
-                    model_directives,
-                    task_defaults[slurm_task],
-                    model_component
-                )
-            model_directives = {
-                **model_directives,
-                **user_globals,
-                **experiment_globals
-            }
-            if slurm_task in experiment_task_directives:
-                model_directives = add_directives(
-                    model_directives,
-                    experiment_task_directives[slurm_task],
-                    "all"
-                )
-                model_directives = add_directives(
-                    model_directives,
-                    experiment_task_directives[slurm_task],
-                    model_component
-                )
-            validate_directives(model_directives)
-            scheduling_dict[slurm_task]["directives"][model_component] = model_directives
+        # complicated, the hard-coded task defaults, model-generic then
+        # model-specific, are overridden by the user and experiment globals,
+        # which are overridden by the experiment task directives, model-generic
+        # then model-specific.
+        for model_component in inputs["model_components"]:
+            scheduling_dict[slurm_task]["directives"][model_component] = resolve_directives([
+                {"job-name": f"{slurm_task}-{model_component}"},
+                global_defaults,
+                task_default.get("all", {}),
+                task_default.get(model_component, {}),
+                user_globals,
+                experiment_globals,
+                experiment_task.get("all", {}),
+                experiment_task.get(model_component, {})
+            ])
+
+    return scheduling_dict
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def prepare_scheduling_dict(
+    logger: Union[Logger, pyLogger],
+    experiment_dict: dict,
+    platform: str,
+) -> dict:
+
+    return resolve_scheduling_dict(scheduling_inputs(logger, experiment_dict, platform))
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def experiment_scheduling_dict(
+    logger: Union[Logger, pyLogger],
+    experiment_dict: dict,
+    platform: str,
+    exp_suite_path: str
+) -> dict:
+
+    """
+    Scheduling dictionary of an experiment, resolved once when the experiment is created and
+    written to scheduling.yaml in the suite directory of the experiment, next to experiment.yaml,
+    as the record of the directives of every task and model component.
+    """
+
+    scheduling_dict = prepare_scheduling_dict(logger, experiment_dict, platform)
+
+    # Write to a temporary file and rename so a partial file is never read
+    fd, tmp_path = tempfile.mkstemp(dir=exp_suite_path, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        yaml.dump(scheduling_dict, f, Dumper=YamlDumper, default_flow_style=False,
+                  sort_keys=False)
+    os.replace(tmp_path, os.path.join(exp_suite_path, scheduling_file))
 
     return scheduling_dict
 
 
-def add_directives(target_dict: dict, input_dict: dict, key: str) -> dict:
-    if key in input_dict:
-        return {
-            **target_dict,
-            **input_dict[key]
-        }
-    else:
-        return target_dict
+# --------------------------------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=None)
+def valid_directives() -> frozenset:
+
+    # Parse sbatch docs once and extract all directives (e.g., `--account`)
+    directive_pattern = re.compile(r'(?<=--)[a-zA-Z-]+')
+    return frozenset(match.group(0) for match in map(directive_pattern.search,
+                                                     man_sbatch.split("\n")) if match)
+
+
+# --------------------------------------------------------------------------------------------------
 
 
 def validate_directives(directive_dict: dict) -> None:
-    directive_pattern = r'(?<=--)[a-zA-Z-]+'
-    # Parse sbatch docs and extract all directives (e.g., `--account`)
-    directive_list = {
-        re.search(directive_pattern, s).group(0)
-        for s in man_sbatch.split("\n")
-        if re.search(directive_pattern, s)
-    }
-    # Make sure that everything in `directive_dict` is in `directive_list`;
+    # Make sure that everything in `directive_dict` is in the directives of sbatch;
     # i.e., that all entries are valid slurm directives.
-    invalid_directives = set(directive_dict.keys()).difference(directive_list)
+    invalid_directives = set(directive_dict.keys()).difference(valid_directives())
     assert \
         len(invalid_directives) == 0, \
         f"The following are invalid SLURM directives: {invalid_directives}"
 
 
+# --------------------------------------------------------------------------------------------------
+
+
 def slurm_global_defaults(
     logger: Union[Logger, pyLogger],
     yaml_path: str = "~/.swell/swell-slurm.yaml"
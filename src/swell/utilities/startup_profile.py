@@ -0,0 +1,81 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import subprocess
+import sys
+
+from swell.utilities.logger import Logger
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package startup_profile
+#
+#  Report of the time spent importing modules when a task starts. The imports are measured in a
+#  fresh interpreter with python -X importtime so the report is not affected by what the calling
+#  process has already imported.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+# Import time that a task should stay within before it starts doing any work (seconds)
+task_import_budget = 0.5
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def measure_import_times(modules: list) -> list:
+
+    # Import the modules in a new interpreter and return a list of (self, cumulative, module)
+    # import times in seconds, in the order the imports completed
+    # ------------------------------------------------------------------------------------------
+    command = [sys.executable, '-X', 'importtime', '-c', 'import ' + ', '.join(modules)]
+    process = subprocess.run(command, capture_output=True, text=True)
+
+    import_times = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_time, cumulative_time, module = line[len('import time:'):].split('|')
+        if not self_time.strip().isdigit():
+            continue  # Header line
+        import_times.append((int(self_time)/1.0e6, int(cumulative_time)/1.0e6, module.strip()))
+
+    return import_times
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def report_task_startup(logger: Logger, task_module: str, number_of_packages: int = 10) -> float:
+
+    # Everything a task imports: the command line driver and the task module itself
+    import_times = measure_import_times(['swell.swell', task_module])
+    total_time = sum(self_time for self_time, _, _ in import_times)
+
+    # Top level packages that are not part of swell, by cumulative time
+    packages = sorted([(cumulative_time, module) for _, cumulative_time, module in import_times
+                       if '.' not in module and module != 'swell'], reverse=True)
+
+    logger.info('-----------------------------')
+    logger.info('     Task startup profile    ')
+    logger.info('-----------------------------')
+    logger.info(f'Imported {len(import_times)} modules in {total_time:0.4f} seconds')
+    for cumulative_time, module in packages[:number_of_packages]:
+        logger.info(f'  {cumulative_time:0.4f} seconds  {module}')
+
+    if total_time > task_import_budget:
+        logger.info(f'Startup imports exceed the budget of {task_import_budget} seconds')
+    logger.info('-----------------------------')
+
+    return total_time
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,131 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import json
+import os
+import tempfile
+import threading
+from typing import Callable
+
+from swell.utilities.file_signature import file_signature, file_unchanged
+from swell.utilities.worker_pool import run_in_pool
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package store_ledger
+#
+#  Ledger of the files a task stored to R2D2, kept in the cycle directory (store_ledger.json). A
+#  file is recorded, with its checksum, as soon as its store succeeds so that a rerun of the task
+#  after a failure only stores the files that were not stored yet or that changed since.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+ledger_file = 'store_ledger.json'
+ledger_version = 1
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def store_key(store_args: dict) -> str:
+
+    # Files are identified in the ledger by the arguments they are stored with, except the path
+    return json.dumps({key: value for key, value in store_args.items() if key != 'source_file'},
+                      sort_keys=True, default=str)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class StoreLedger():
+
+    def __init__(self, directory: str) -> None:
+
+        self.ledger_path = os.path.join(directory, ledger_file)
+        self.lock = threading.Lock()
+
+        # Store key -> path, modification time, size and checksum of the file stored
+        self.entries = {}
+        try:
+            with open(self.ledger_path, 'r') as f:
+                ledger = json.load(f)
+            if ledger.get('version') == ledger_version:
+                self.entries = ledger['entries']
+        except (OSError, ValueError):
+            pass
+
+    # ----------------------------------------------------------------------------------------------
+
+    def stored(self, store_args: dict) -> bool:
+
+        # Whether the same file was already stored with the same arguments
+        entry = self.entries.get(store_key(store_args))
+        return entry is not None and entry['source_file'] == store_args['source_file'] and \
+            file_unchanged(store_args['source_file'], entry)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def record(self, store_args: dict) -> None:
+
+        entry = {'source_file': store_args['source_file'],
+                 **file_signature(store_args['source_file'])}
+
+        # Stores run in threads, the ledger is written after every store so that it is never
+        # behind by more than the stores that were running when the task died
+        with self.lock:
+            self.entries[store_key(store_args)] = entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.ledger_path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': ledger_version, 'entries': self.entries}, f, indent=2,
+                          sort_keys=True)
+            os.replace(tmp_path, self.ledger_path)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def store_and_record(storer: Callable, ledger: StoreLedger, store_args: dict) -> None:
+
+    storer(**store_args)
+    ledger.record(store_args)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def store_files(
+    storer: Callable,
+    ledger: StoreLedger,
+    store_arg_list: list,
+    max_workers: int
+) -> tuple:
+
+    """
+    Store the files described by the keyword arguments of store_arg_list with storer, e.g.
+    r2d2.store, using up to max_workers threads. Files already recorded in the ledger are
+    skipped.
+
+    Returns the list of the store arguments that were skipped and a (store arguments, (result,
+    output, error)) pair per file stored, with the tuples of run_in_pool, in the order of
+    store_arg_list.
+    """
+
+    skipped = [store_args for store_args in store_arg_list if ledger.stored(store_args)]
+    to_store = [store_args for store_args in store_arg_list if store_args not in skipped]
+
+    results = run_in_pool(store_and_record, [(storer, ledger, store_args)
+                                             for store_args in to_store],
+                          max_workers, use_processes=False)
+
+    return skipped, list(zip(to_store, results))
+
+
+# --------------------------------------------------------------------------------------------------
@@ -0,0 +1,247 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import json
+import os
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Generator, Optional
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package task_metrics
+#
+#  Machine readable timing record of a task. Tasks time the phases of their work with named spans
+#  that can be nested, e.g.
+#
+#    with self.metrics.span('fetch'):
+#        ...
+#
+#  Each span records its wall time and the bytes read and written while it was open. The bytes
+#  come from the counters of the whole process, all threads included, so they are only counted for
+#  spans opened by the thread that created the metrics. Spans opened by worker threads (e.g. the
+#  thread pool of run_in_pool) would otherwise each count the input/output of every concurrent
+#  thread, they only record the bytes given to add_bytes. Work done in other processes (e.g. a
+#  process pool or an MPI executable) can be counted with add_bytes too.
+#
+#  The record is written as JSON when the task finishes, one file per try of the task.
+#
+#  Utilities that do not have access to the task, e.g. the shell commands, time themselves with
+#  metrics_span, which records into the metrics of the task running in the process if any.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+def process_io() -> dict:
+
+    # Bytes read and written by this process (all threads), where the kernel provides it
+    counters = {'bytes_read': 0, 'bytes_written': 0}
+    try:
+        with open('/proc/self/io', 'r') as io_file:
+            for line in io_file:
+                key, value = line.split(':')
+                if key == 'rchar':
+                    counters['bytes_read'] = int(value)
+                elif key == 'wchar':
+                    counters['bytes_written'] = int(value)
+    except OSError:
+        pass
+
+    return counters
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def peak_rss_bytes(who: int) -> int:
+
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(who).ru_maxrss * scale
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class TaskMetrics():
+
+    def __init__(
+        self,
+        task_name: str,
+        model: Optional[str] = None,
+        cycle: Optional[str] = None,
+        ensemble_packet: Optional[str] = None
+    ) -> None:
+
+        self.task_name = task_name
+        self.model = model
+        self.cycle = cycle
+        self.ensemble_packet = ensemble_packet
+
+        self.try_number = int(os.environ.get('CYLC_TASK_TRY_NUMBER', 1))
+
+        self.spans = []
+        self.thread_state = threading.local()
+        self.thread_id = threading.get_ident()
+        self.extra_bytes = {'bytes_read': 0, 'bytes_written': 0}
+        self.counters = {}
+
+        self.start_time = datetime.now(timezone.utc)
+        self.start_perf = time.perf_counter()
+        self.start_io = process_io()
+
+    # ----------------------------------------------------------------------------------------------
+
+    @property
+    def open_spans(self) -> list:
+
+        # Spans opened by threads of a task are nested within that thread only
+        if not hasattr(self.thread_state, 'open_spans'):
+            self.thread_state.open_spans = []
+        return self.thread_state.open_spans
+
+    # ----------------------------------------------------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str) -> Generator[None, None, None]:
+
+        # Nested spans are named after their parents, e.g. execute/fetch
+        path = '/'.join([span['name'] for span in self.open_spans] + [name])
+
+        # Process counters are only used by the thread that created the metrics
+        process_counters = threading.get_ident() == self.thread_id
+        no_io = {'bytes_read': 0, 'bytes_written': 0}
+        span = {'name': path, 'start_io': process_io() if process_counters else no_io,
+                'bytes_read': 0, 'bytes_written': 0, 'start_perf': time.perf_counter()}
+        self.open_spans.append(span)
+
+        try:
+            yield
+        finally:
+            self.open_spans.pop()
+            end_io = process_io() if process_counters else no_io
+            self.spans.append({
+                'name': path,
+                'start_seconds': round(span['start_perf'] - self.start_perf, 6),
+                'seconds': round(time.perf_counter() - span['start_perf'], 6),
+                'bytes_read': end_io['bytes_read'] - span['start_io']['bytes_read'] +
+                span['bytes_read'],
+                'bytes_written': end_io['bytes_written'] - span['start_io']['bytes_written'] +
+                span['bytes_written'],
+            })
+
+            # Bytes added explicitly inside this span also count for the enclosing spans
+            if self.open_spans:
+                self.open_spans[-1]['bytes_read'] += span['bytes_read']
+                self.open_spans[-1]['bytes_written'] += span['bytes_written']
+
+    # ----------------------------------------------------------------------------------------------
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+
+        # Span timed by the caller with time.perf_counter, e.g. the construction of the task that
+        # began before the metrics existed. The record then starts with this span.
+        self.start_perf = min(self.start_perf, start)
+        self.spans.append({'name': name, 'start_seconds': round(start - self.start_perf, 6),
+                           'seconds': round(end - start, 6), 'bytes_read': 0,
+                           'bytes_written': 0})
+
+    # ----------------------------------------------------------------------------------------------
+
+    def add_bytes(self, read: int = 0, written: int = 0) -> None:
+
+        # Count input/output that happened outside of this process
+        self.extra_bytes['bytes_read'] += read
+        self.extra_bytes['bytes_written'] += written
+        if self.open_spans:
+            self.open_spans[-1]['bytes_read'] += read
+            self.open_spans[-1]['bytes_written'] += written
+
+    # ----------------------------------------------------------------------------------------------
+
+    def add_counters(self, name: str, counters: dict) -> None:
+
+        # Named counters, e.g. the hits and misses of a cache used by the task
+        self.counters[name] = dict(counters)
+
+    # ----------------------------------------------------------------------------------------------
+
+    def record(self, status: str) -> dict:
+
+        end_io = process_io()
+
+        return {
+            'task': self.task_name,
+            'model': self.model,
+            'cycle': self.cycle,
+            'ensemble_packet': self.ensemble_packet,
+            'try_number': self.try_number,
+            'hostname': socket.gethostname(),
+            'status': status,
+            'start_time': self.start_time.isoformat(),
+            'seconds': round(time.perf_counter() - self.start_perf, 6),
+            'bytes_read': end_io['bytes_read'] - self.start_io['bytes_read'] +
+            self.extra_bytes['bytes_read'],
+            'bytes_written': end_io['bytes_written'] - self.start_io['bytes_written'] +
+            self.extra_bytes['bytes_written'],
+            'peak_rss_bytes': peak_rss_bytes(resource.RUSAGE_SELF),
+            'peak_rss_children_bytes': peak_rss_bytes(resource.RUSAGE_CHILDREN),
+            'counters': self.counters,
+            'spans': sorted(self.spans, key=lambda span: span['start_seconds']),
+        }
+
+    # ----------------------------------------------------------------------------------------------
+
+    def write(self, metrics_file: str, status: str) -> None:
+
+        # Write to a temporary file and rename so readers never see a partial record
+        os.makedirs(os.path.dirname(metrics_file), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(metrics_file), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.record(status), f, indent=2)
+        os.replace(tmp_path, metrics_file)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+# Metrics of the task running in this process
+active_metrics = None
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def set_active_metrics(metrics: Optional[TaskMetrics]) -> None:
+
+    global active_metrics
+    active_metrics = metrics
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+@contextmanager
+def metrics_span(name: str) -> Generator[None, None, None]:
+
+    if active_metrics is None:
+        yield
+    else:
+        with active_metrics.span(name):
+            yield
+
+
+# --------------------------------------------------------------------------------------------------
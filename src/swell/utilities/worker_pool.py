@@ -0,0 +1,143 @@
+# (C) Copyright 2021- United States Government as represented by the Administrator of the
+# National Aeronautics and Space Administration. All Rights Reserved.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+import io
+import sys
+import threading
+import traceback
+from contextlib import redirect_stdout
+from functools import partial
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from typing import Callable, Optional, Tuple
+
+
+# --------------------------------------------------------------------------------------------------
+#  @package worker_pool
+#
+#  Helpers for running independent pieces of work in a bounded pool of workers while keeping the
+#  log output of each piece of work together so that it can be printed in a deterministic order.
+#
+# --------------------------------------------------------------------------------------------------
+
+
+def run_captured(function: Callable, arguments: tuple) -> Tuple[object, str, Optional[str]]:
+
+    # Run a function and return its result, everything it printed and the traceback of any
+    # failure. Logger.abort calls sys.exit so SystemExit is treated as a failure too.
+    # ---------------------------------------------------------------------------------------
+    output = io.StringIO()
+    result = None
+    error = None
+    with redirect_stdout(output):
+        try:
+            result = function(*arguments)
+        except (Exception, SystemExit):
+            error = traceback.format_exc()
+
+    return result, output.getvalue(), error
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def run_captured_star(function_and_arguments: tuple) -> Tuple[object, str, Optional[str]]:
+
+    return run_captured(*function_and_arguments)
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+class ThreadOutput(io.TextIOBase):
+
+    """
+    Stand-in for sys.stdout while a pool of threads runs. Redirecting stdout is process wide so
+    the text printed by each worker thread is routed to the buffer of that thread, other threads
+    print to the original stream.
+    """
+
+    def __init__(self, stream: io.TextIOBase) -> None:
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self.local, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def run_thread_captured_star(
+    thread_output: ThreadOutput,
+    function_and_arguments: tuple
+) -> Tuple[object, str, Optional[str]]:
+
+    # Same as run_captured but collecting the output printed by the current thread only
+    # --------------------------------------------------------------------------------
+    function, arguments = function_and_arguments
+    thread_output.local.buffer = io.StringIO()
+    result = None
+    error = None
+    try:
+        result = function(*arguments)
+    except (Exception, SystemExit):
+        error = traceback.format_exc()
+    finally:
+        output = thread_output.local.buffer.getvalue()
+        thread_output.local.buffer = None
+
+    return result, output, error
+
+
+# --------------------------------------------------------------------------------------------------
+
+
+def run_in_pool(
+    function: Callable,
+    argument_list: list,
+    max_workers: int,
+    use_processes: bool = True
+) -> list:
+
+    """
+    Run function(*arguments) for every tuple in argument_list using at most max_workers workers.
+
+    Returns a list with one (result, output, error) tuple per entry of argument_list, in the
+    order of argument_list regardless of the order in which the work completed. Output is the
+    text printed by the function, captured separately for each piece of work whether it runs
+    serially, in processes or in threads, and error is the traceback of a failure or None.
+    Failures never stop the remaining work so that the caller can report all of them at once.
+
+    With max_workers of 1, or a single piece of work, everything runs serially in the calling
+    process. When processes are used the function and its arguments must be picklable, i.e.
+    the function has to be defined at module level.
+    """
+
+    jobs = [(function, tuple(arguments)) for arguments in argument_list]
+    number_of_workers = max(1, min(max_workers, len(jobs)))
+
+    if number_of_workers == 1:
+        return [run_captured_star(job) for job in jobs]
+
+    if use_processes:
+        with Pool(processes=number_of_workers) as pool:
+            return pool.map(run_captured_star, jobs, chunksize=1)
+
+    thread_output = ThreadOutput(sys.stdout)
+    with redirect_stdout(thread_output), ThreadPool(processes=number_of_workers) as pool:
+        return pool.map(partial(run_thread_captured_star, thread_output), jobs, chunksize=1)
+
+
+# --------------------------------------------------------------------------------------------------